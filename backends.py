@@ -0,0 +1,744 @@
+"""
+Window/automation backends for Gemini Desktop Tool.
+The automation code talks to an AutomationBackend instead of calling
+win32gui, pyautogui and keyboard directly, so it can run against a fake
+window manager on machines without a desktop.
+"""
+import ctypes
+import os
+import struct
+import threading
+import time
+
+try:
+    import win32clipboard
+    import win32gui
+    import win32con
+    import win32process
+except ImportError:
+    win32clipboard = None
+    win32gui = None
+    win32con = None
+    win32process = None
+
+
+class AutomationBackend:
+    """Interface used by the readiness engine and run_automation."""
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def call_later(self, delay, callback):
+        """Run callback() once, delay seconds from now, off the calling thread."""
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+
+    def list_windows(self):
+        """Return handles of all visible top-level windows."""
+        raise NotImplementedError
+
+    def is_window(self, hwnd):
+        raise NotImplementedError
+
+    def get_title(self, hwnd):
+        raise NotImplementedError
+
+    def get_rect(self, hwnd):
+        """Return (left, top, right, bottom) of the window."""
+        raise NotImplementedError
+
+    def is_minimized(self, hwnd):
+        raise NotImplementedError
+
+    def restore(self, hwnd):
+        raise NotImplementedError
+
+    def set_foreground(self, hwnd):
+        raise NotImplementedError
+
+    def get_foreground(self):
+        raise NotImplementedError
+
+    def has_input_focus(self, hwnd):
+        """
+        Return True if keyboard focus is somewhere inside the given window (any
+        child: the page, but also the address bar or a sidebar).
+        """
+        raise NotImplementedError
+
+    def focus_in_editable(self, hwnd):
+        """
+        Return True if the focused element is a text field of the window's page,
+        False if it is something else, None if the backend can't tell.
+        """
+        return None
+
+    def click(self, x, y):
+        raise NotImplementedError
+
+    def send_keys(self, combo):
+        raise NotImplementedError
+
+    def set_clipboard_text(self, text):
+        raise NotImplementedError
+
+    def set_clipboard_image(self, prepared):
+        """Put a PreparedImage's payloads on the clipboard."""
+        raise NotImplementedError
+
+    def set_clipboard_files(self, paths):
+        """Put a list of files on the clipboard, as Explorer's copy does."""
+        raise NotImplementedError
+
+    def get_clipboard_image(self):
+        """Return the clipboard's image (a PIL image), or None."""
+        raise NotImplementedError
+
+    def clipboard_sequence(self):
+        """A number that changes whenever the clipboard contents change."""
+        raise NotImplementedError
+
+    def get_clipboard_text(self):
+        raise NotImplementedError
+
+    def save_clipboard(self):
+        """Return an opaque snapshot of every restorable clipboard format."""
+        raise NotImplementedError
+
+    def restore_clipboard(self, snapshot):
+        raise NotImplementedError
+
+    def modifiers_pressed(self):
+        """True while Ctrl, Alt, Shift or Win is physically held down."""
+        return False
+
+    def open_url(self, url, new_window=False):
+        """
+        Open url in the default browser. With new_window, ask for a window of
+        its own rather than a tab; if that can't be asked for, nothing is
+        opened and False is returned.
+        """
+        raise NotImplementedError
+
+    def grab_screen(self):
+        """Return a screenshot of every monitor (a PIL image)."""
+        raise NotImplementedError
+
+    def watch_windows(self, callback):
+        """
+        Call callback(event, hwnd) with "create", "title" or "destroy" as
+        top-level windows change. Returns an unsubscribe function, or None
+        if the backend can't report window events.
+        """
+        return None
+
+
+class _GUITHREADINFO(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("hwndActive", ctypes.c_void_p),
+        ("hwndFocus", ctypes.c_void_p),
+        ("hwndCapture", ctypes.c_void_p),
+        ("hwndMenuOwner", ctypes.c_void_p),
+        ("hwndMoveSize", ctypes.c_void_p),
+        ("hwndCaret", ctypes.c_void_p),
+        ("rcCaret", ctypes.c_long * 4),
+    ]
+
+
+class Win32Backend(AutomationBackend):
+    """Real backend built on pywin32, pyautogui, keyboard and pyperclip."""
+
+    GA_ROOT = 2
+    EVENT_OBJECT_CREATE = 0x8000
+    EVENT_OBJECT_DESTROY = 0x8001
+    EVENT_OBJECT_NAMECHANGE = 0x800C
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    WM_QUIT = 0x0012
+    MODIFIER_KEYS = ("ctrl", "alt", "shift", "windows")
+    # GDI handle formats can't be copied as bytes; Windows re-synthesizes them from CF_DIB
+    UNSAVED_FORMATS = {2, 3, 9, 14, 0x80, 0x82, 0x83, 0x8E}
+
+    def __init__(self):
+        if win32gui is None:
+            raise RuntimeError("pywin32 is required for the Win32 backend")
+        import pyautogui
+        import keyboard
+        import pyperclip
+        pyautogui.FAILSAFE = False
+        self._pyautogui = pyautogui
+        self._keyboard = keyboard
+        self._pyperclip = pyperclip
+        self._user32 = ctypes.windll.user32
+
+    def list_windows(self):
+        handles = []
+
+        def callback(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd):
+                handles.append(hwnd)
+            return True
+
+        try:
+            win32gui.EnumWindows(callback, None)
+        except Exception:
+            pass
+        return handles
+
+    def is_window(self, hwnd):
+        return bool(hwnd) and bool(win32gui.IsWindow(hwnd))
+
+    def get_title(self, hwnd):
+        try:
+            return win32gui.GetWindowText(hwnd)
+        except Exception:
+            return ""
+
+    def get_rect(self, hwnd):
+        return win32gui.GetWindowRect(hwnd)
+
+    def is_minimized(self, hwnd):
+        return bool(win32gui.IsIconic(hwnd))
+
+    def restore(self, hwnd):
+        win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+
+    def set_foreground(self, hwnd):
+        try:
+            win32gui.SetForegroundWindow(hwnd)
+        except Exception as e:
+            print(f"  SetForegroundWindow failed: {e}")
+
+    def get_foreground(self):
+        return win32gui.GetForegroundWindow()
+
+    def has_input_focus(self, hwnd):
+        try:
+            thread_id, _ = win32process.GetWindowThreadProcessId(hwnd)
+            info = _GUITHREADINFO(cbSize=ctypes.sizeof(_GUITHREADINFO))
+            if not self._user32.GetGUIThreadInfo(thread_id, ctypes.byref(info)):
+                return False
+            if not info.hwndFocus:
+                return False
+            return self._user32.GetAncestor(info.hwndFocus, self.GA_ROOT) == hwnd
+        except Exception:
+            return False
+
+    def focus_in_editable(self, hwnd):
+        # The browser is one native window; only UI Automation sees which element has focus
+        try:
+            import uiautomation as auto
+        except ImportError:
+            return None
+        try:
+            control = auto.GetFocusedControl()
+            if not control or control.ControlTypeName != "EditControl":
+                return False
+            if control.GetTopLevelControl().NativeWindowHandle != hwnd:
+                return False
+            # A text box of the page sits inside the web document; the address bar doesn't
+            node = control.GetParentControl()
+            while node:
+                if node.ControlTypeName == "DocumentControl":
+                    return True
+                node = node.GetParentControl()
+            return False
+        except Exception:
+            return None
+
+    def click(self, x, y):
+        self._pyautogui.click(x, y)
+
+    def send_keys(self, combo):
+        self._keyboard.send(combo)
+
+    def set_clipboard_text(self, text):
+        self._pyperclip.copy(text)
+
+    def set_clipboard_image(self, prepared):
+        # PNG first so browsers upload the compressed payload, DIB for everything else
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            if prepared.png:
+                png_format = win32clipboard.RegisterClipboardFormat("PNG")
+                win32clipboard.SetClipboardData(png_format, prepared.png)
+            if prepared.dib:
+                win32clipboard.SetClipboardData(win32clipboard.CF_DIB, prepared.dib)
+        finally:
+            win32clipboard.CloseClipboard()
+
+    @staticmethod
+    def _dropfiles(paths):
+        # DROPFILES header (20 bytes, wide chars) followed by a double-null-terminated list
+        header = struct.pack("<IiiII", 20, 0, 0, 0, 1)
+        return header + ("\0".join(paths) + "\0\0").encode("utf-16-le")
+
+    def set_clipboard_files(self, paths):
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardData(win32con.CF_HDROP, self._dropfiles(paths))
+        finally:
+            win32clipboard.CloseClipboard()
+
+    def get_clipboard_image(self):
+        from PIL import Image, ImageGrab
+        img = ImageGrab.grabclipboard()
+        return img if isinstance(img, Image.Image) else None
+
+    def clipboard_sequence(self):
+        return self._user32.GetClipboardSequenceNumber()
+
+    def get_clipboard_text(self):
+        return self._pyperclip.paste() or ""
+
+    def save_clipboard(self):
+        snapshot = []
+        win32clipboard.OpenClipboard()
+        try:
+            fmt = win32clipboard.EnumClipboardFormats(0)
+            while fmt:
+                if fmt not in self.UNSAVED_FORMATS:
+                    try:
+                        data = win32clipboard.GetClipboardData(fmt)
+                        if fmt == win32con.CF_HDROP:
+                            data = self._dropfiles(data)
+                        snapshot.append((fmt, data))
+                    except Exception:
+                        pass  # Delay-rendered or private formats that can't be read back
+                fmt = win32clipboard.EnumClipboardFormats(fmt)
+        finally:
+            win32clipboard.CloseClipboard()
+        return snapshot
+
+    def restore_clipboard(self, snapshot):
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            for fmt, data in snapshot:
+                try:
+                    win32clipboard.SetClipboardData(fmt, data)
+                except Exception as e:
+                    print(f"  Could not restore clipboard format {fmt}: {e}")
+        finally:
+            win32clipboard.CloseClipboard()
+
+    def modifiers_pressed(self):
+        try:
+            return any(self._keyboard.is_pressed(key) for key in self.MODIFIER_KEYS)
+        except Exception:
+            return False
+
+    # Command-line switch for a new window, by browser executable
+    NEW_WINDOW_FLAGS = {"chrome.exe": "--new-window", "msedge.exe": "--new-window", "brave.exe": "--new-window",
+                        "vivaldi.exe": "--new-window", "opera.exe": "--new-window", "firefox.exe": "-new-window"}
+
+    def open_url(self, url, new_window=False):
+        if new_window:
+            exe = self.default_browser()
+            flag = self.NEW_WINDOW_FLAGS.get(os.path.basename(exe).lower()) if exe else None
+            if flag:
+                import subprocess
+                subprocess.Popen([exe, flag, url], close_fds=True)
+                return True
+            return False
+        import webbrowser
+        webbrowser.open(url)
+        return True
+
+    def default_browser(self):
+        """Executable registered for https links, or None."""
+        import shlex
+        import winreg
+        try:
+            key = r"Software\Microsoft\Windows\Shell\Associations\UrlAssociations\https\UserChoice"
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key) as k:
+                prog_id = winreg.QueryValueEx(k, "ProgId")[0]
+            with winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, rf"{prog_id}\shell\open\command") as k:
+                command = winreg.QueryValueEx(k, "")[0]
+            return shlex.split(command, posix=False)[0].strip('"')
+        except (OSError, IndexError, ValueError):
+            return None
+
+    def grab_screen(self):
+        from screenshot import grab_screen
+        return grab_screen()
+
+    def watch_windows(self, callback):
+        """Follow window create/destroy/title events with an out-of-context SetWinEventHook."""
+        from ctypes import wintypes
+        user32 = self._user32
+        names = {self.EVENT_OBJECT_CREATE: "create", self.EVENT_OBJECT_DESTROY: "destroy",
+                 self.EVENT_OBJECT_NAMECHANGE: "title"}
+        proc_type = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                       wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, proc_type,
+                                           wintypes.DWORD, wintypes.DWORD, wintypes.DWORD]
+
+        def on_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            # Whole windows only (OBJID_WINDOW, CHILDID_SELF), and only top-level ones
+            if id_object != 0 or id_child != 0 or not hwnd or event not in names:
+                return
+            if event != self.EVENT_OBJECT_DESTROY and user32.GetAncestor(hwnd, self.GA_ROOT) != hwnd:
+                return
+            try:
+                callback(names[event], hwnd)
+            except Exception as e:
+                print(f"  Window event handler failed: {e}")
+
+        state = {"proc": proc_type(on_event)}  # Keep the callback alive
+        ready = threading.Event()
+
+        def pump():
+            # Out-of-context hooks are delivered through this thread's message loop
+            hooks = [user32.SetWinEventHook(first, last, None, state["proc"], 0, 0, self.WINEVENT_SKIPOWNPROCESS)
+                     for first, last in ((self.EVENT_OBJECT_CREATE, self.EVENT_OBJECT_DESTROY),
+                                         (self.EVENT_OBJECT_NAMECHANGE, self.EVENT_OBJECT_NAMECHANGE))]
+            state["thread_id"] = ctypes.windll.kernel32.GetCurrentThreadId()
+            state["ok"] = all(hooks)
+            ready.set()
+            msg = wintypes.MSG()
+            if state["ok"]:
+                while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                    user32.TranslateMessage(ctypes.byref(msg))
+                    user32.DispatchMessageW(ctypes.byref(msg))
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+
+        threading.Thread(target=pump, name="window-events", daemon=True).start()
+        if not ready.wait(2.0) or not state.get("ok"):
+            return None
+
+        def unsubscribe():
+            user32.PostThreadMessageW(state["thread_id"], self.WM_QUIT, 0, 0)
+        return unsubscribe
+
+
+class FakeClock:
+    """Virtual clock: sleeping advances time instantly."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+
+class FakeWindow:
+    """A simulated top-level window whose state changes over time."""
+
+    def __init__(self, hwnd, title, created_at=0.0, rect=(0, 0, 1280, 800),
+                 titles=None, foreground_delay=0.0, focus_delay=0.0):
+        self.hwnd = hwnd
+        self.title = title
+        self.created_at = created_at
+        self.rect = rect
+        # List of (time, title) pairs applied as the clock advances
+        self.titles = sorted(titles or [])
+        self.foreground_delay = foreground_delay
+        self.focus_delay = focus_delay
+        self.minimized = False
+        self.focus_at = None
+        self.closed = False
+        self.received = []  # Clipboard contents pasted since the last enter
+        self.busy_until = 0.0  # Until then the page is still taking in a paste
+
+    def title_at(self, now):
+        title = self.title
+        for t, new_title in self.titles:
+            if now >= t:
+                title = new_title
+        return title
+
+
+class FakeBackend(AutomationBackend):
+    """
+    In-process fake of the platform for tests and benchmarks: window manager,
+    clipboard, keyboard/mouse injection, screen grabber and browser launcher.
+    Latencies are expressed in seconds of (by default virtual) time; pass
+    clock=time to run against the real clock instead. Every opened page gets
+    its own window, and what each window received before each enter is kept
+    in .sent, so sends to several windows can be checked.
+    """
+
+    def __init__(self, clock=None, load_latency=1.0, title_latency=0.3,
+                 foreground_delay=0.05, focus_delay=0.05, copy_latency=0.03,
+                 key_latency=0.0, click_latency=0.0, clipboard_latency=0.0, grab_latency=0.0,
+                 upload_latency=0.0, page_title="Google Gemini - Fake Browser"):
+        self.clock = clock or FakeClock()
+        self.load_latency = load_latency
+        self.title_latency = title_latency
+        self.foreground_delay = foreground_delay
+        self.focus_delay = focus_delay
+        # Time from ctrl+c until the foreground app has put the selection on the clipboard
+        self.copy_latency = copy_latency
+        # Cost of each injected key combo, click, clipboard write and screen grab
+        self.key_latency = key_latency
+        self.click_latency = click_latency
+        self.clipboard_latency = clipboard_latency
+        self.grab_latency = grab_latency
+        # Time a page needs to take in a paste; an enter sooner sends it incomplete
+        self.upload_latency = upload_latency
+        self.screen = None  # What grab_screen() returns
+        self.page_title = page_title
+        self.windows = {}
+        self.foreground = None
+        self._pending_foreground = None
+        self.clipboard = None  # (kind, data)
+        self.clipboard_seq = 0
+        self.selection = None  # Text (or PIL image) ctrl+c copies; None if nothing is selected
+        self.modifiers_released_at = 0.0
+        self._pending_copy = None
+        self.pasted = []  # clipboard contents at each ctrl+v, in order
+        self.sent = []  # (time, hwnd, contents pasted into it, complete) at each enter
+        self.misdirected = []  # (time, hwnd, keys) sent while the input box didn't have focus
+        self.supports_files = True
+        self.open_in_tabs = False  # Like real browsers: open_url() adds a tab to an open window
+        self.supports_new_window = True  # The browser can be asked for a new window
+        self.supports_window_events = False
+        self.actions = []
+        self.scans = 0  # list_windows() calls, i.e. full EnumWindows scans
+        self.title_reads = 0
+        self._watchers = []
+        self._reported = {}  # hwnd -> title last reported to watchers
+        self._next_hwnd = 100
+        self._timers = []  # (due, callback) from call_later, run as the clock passes them
+
+    # ---- Scenario helpers ----
+    def add_window(self, title, created_at=None, **kwargs):
+        hwnd = self._next_hwnd
+        self._next_hwnd += 1
+        kwargs.setdefault("foreground_delay", self.foreground_delay)
+        kwargs.setdefault("focus_delay", self.focus_delay)
+        created = self.monotonic() if created_at is None else created_at
+        self.windows[hwnd] = FakeWindow(hwnd, title, created_at=created, **kwargs)
+        return hwnd
+
+    def _log(self, action, *args):
+        self.actions.append((self.monotonic(), action) + args)
+
+    def _live(self, hwnd):
+        win = self.windows.get(hwnd)
+        if win and not win.closed and self.monotonic() >= win.created_at:
+            return win
+        return None
+
+    # ---- AutomationBackend ----
+    def monotonic(self):
+        return self.clock.monotonic()
+
+    def sleep(self, seconds):
+        self.clock.sleep(seconds)
+        if self._watchers:
+            self._emit_window_events()
+        if self._timers:
+            self._run_timers()
+
+    def call_later(self, delay, callback):
+        self._timers.append((self.monotonic() + delay, callback))
+
+    def _run_timers(self):
+        now = self.monotonic()
+        due = [timer for timer in self._timers if timer[0] <= now]
+        self._timers = [timer for timer in self._timers if timer[0] > now]
+        for _, callback in due:
+            callback()
+
+    def _current_titles(self):
+        now = self.monotonic()
+        return {hwnd: win.title_at(now) for hwnd, win in self.windows.items() if self._live(hwnd)}
+
+    def _emit_window_events(self):
+        """Report what changed since the last call, as a hook thread would."""
+        current = self._current_titles()
+        events = [("destroy", hwnd) for hwnd in self._reported if hwnd not in current]
+        for hwnd, title in current.items():
+            if hwnd not in self._reported:
+                events.append(("create", hwnd))
+            elif self._reported[hwnd] != title:
+                events.append(("title", hwnd))
+        self._reported = current
+        for event, hwnd in events:
+            for callback in list(self._watchers):
+                callback(event, hwnd)
+
+    def watch_windows(self, callback):
+        if not self.supports_window_events:
+            return None
+        if not self._watchers:
+            self._reported = self._current_titles()
+        self._watchers.append(callback)
+        return lambda: self._watchers.remove(callback)
+
+    def list_windows(self):
+        self.scans += 1
+        return [hwnd for hwnd in self.windows if self._live(hwnd)]
+
+    def is_window(self, hwnd):
+        return self._live(hwnd) is not None
+
+    def get_title(self, hwnd):
+        self.title_reads += 1
+        win = self._live(hwnd)
+        return win.title_at(self.monotonic()) if win else ""
+
+    def get_rect(self, hwnd):
+        return self.windows[hwnd].rect
+
+    def is_minimized(self, hwnd):
+        win = self._live(hwnd)
+        return bool(win and win.minimized)
+
+    def restore(self, hwnd):
+        win = self._live(hwnd)
+        if win:
+            win.minimized = False
+        self._log("restore", hwnd)
+
+    def set_foreground(self, hwnd):
+        win = self._live(hwnd)
+        if not win:
+            return
+        self._log("set_foreground", hwnd)
+        if self.foreground != hwnd and (not self._pending_foreground
+                                        or self._pending_foreground[0] != hwnd):
+            self._pending_foreground = (hwnd, self.monotonic() + win.foreground_delay)
+
+    def get_foreground(self):
+        pending = self._pending_foreground
+        if pending and self.monotonic() >= pending[1]:
+            self._pending_foreground = None
+            if self._live(pending[0]):
+                for win in self.windows.values():
+                    win.focus_at = None
+                self.foreground = pending[0]
+        return self.foreground
+
+    def has_input_focus(self, hwnd):
+        # Like the real check: focus is somewhere in the foreground window, input box or not
+        return self._live(hwnd) is not None and self.get_foreground() == hwnd
+
+    def focus_in_editable(self, hwnd):
+        win = self._live(hwnd)
+        return bool(win and self._in_input(win))
+
+    def _in_input(self, win):
+        """The input box has focus: clicked since the window last came forward, focus_delay ago."""
+        return (self.get_foreground() == win.hwnd and win.focus_at is not None
+                and self.monotonic() >= win.focus_at)
+
+    def click(self, x, y):
+        self._log("click", x, y)
+        self.sleep(self.click_latency)
+        hwnd = self.get_foreground()
+        win = self._live(hwnd)
+        if win and win.focus_at is None:
+            win.focus_at = self.monotonic() + win.focus_delay
+
+    def send_keys(self, combo):
+        self._log("keys", combo)
+        self.sleep(self.key_latency)
+        win = self._live(self.get_foreground())
+        if combo in ('ctrl+v', 'enter') and win and not self._in_input(win):
+            # Focus is on the page but not in the input box: the keys go somewhere else
+            self.misdirected.append((self.monotonic(), win.hwnd, combo))
+            if combo == 'ctrl+v' and self.clipboard is not None:
+                self.pasted.append(self.clipboard)
+        elif combo == 'ctrl+v' and self.clipboard is not None:
+            self.pasted.append(self.clipboard)
+            if win:
+                win.received.append(self.clipboard)
+                win.busy_until = self.monotonic() + self.upload_latency
+        elif combo == 'enter' and win:
+            self.sent.append((self.monotonic(), win.hwnd, win.received, self.monotonic() >= win.busy_until))
+            win.received = []
+        elif combo == 'ctrl+c' and self.selection is not None:
+            self._pending_copy = (self.monotonic() + self.copy_latency, self.selection)
+
+    def _set_clipboard(self, value):
+        self.sleep(self.clipboard_latency)
+        self.clipboard = value
+        self.clipboard_seq += 1
+
+    def _apply_pending_copy(self):
+        pending = self._pending_copy
+        if pending and self.monotonic() >= pending[0]:
+            self._pending_copy = None
+            self._set_clipboard(("text" if isinstance(pending[1], str) else "bitmap", pending[1]))
+
+    def set_clipboard_text(self, text):
+        self._set_clipboard(("text", text))
+        self._log("clipboard_text", text)
+
+    def set_clipboard_image(self, prepared):
+        self._set_clipboard(("image", prepared))
+        self._log("clipboard_image", prepared)
+
+    def set_clipboard_files(self, paths):
+        if not self.supports_files:
+            raise OSError("file lists not supported by fake clipboard")
+        self._set_clipboard(("files", list(paths)))
+        self._log("clipboard_files", list(paths))
+
+    def clipboard_sequence(self):
+        self._apply_pending_copy()
+        return self.clipboard_seq
+
+    def get_clipboard_text(self):
+        self._apply_pending_copy()
+        kind, data = self.clipboard or (None, None)
+        return data if kind == "text" else ""
+
+    def get_clipboard_image(self):
+        self._apply_pending_copy()
+        kind, data = self.clipboard or (None, None)
+        return data if kind == "bitmap" else None
+
+    def save_clipboard(self):
+        return self.clipboard
+
+    def restore_clipboard(self, snapshot):
+        self._set_clipboard(snapshot)
+        self._log("clipboard_restore", snapshot)
+
+    def modifiers_pressed(self):
+        return self.monotonic() < self.modifiers_released_at
+
+    def open_url(self, url, new_window=False):
+        """
+        Simulate the browser loading the page: in a new window, or with
+        open_in_tabs as a tab of the frontmost browser window, which then shows
+        its title. Asking for a new window fails unless supports_new_window.
+        """
+        now = self.monotonic()
+        self._log("open_url", url, new_window)
+        if new_window and not self.supports_new_window:
+            return False
+        browser = self._live(self.foreground) or next(
+            (w for w in reversed(list(self.windows.values())) if self._live(w.hwnd)), None)
+        if self.open_in_tabs and browser and not new_window:
+            browser.titles = sorted(browser.titles + [(now + self.title_latency, self.page_title)])
+            return True
+        self.add_window(
+            "New Tab - Fake Browser",
+            created_at=now + self.load_latency,
+            titles=[(now + self.load_latency + self.title_latency, self.page_title)],
+        )
+        return True
+
+    def grab_screen(self):
+        self._log("grab_screen")
+        self.sleep(self.grab_latency)
+        return self.screen
@@ -0,0 +1,362 @@
+"""
+Headless batch mode for Gemini Desktop Tool.
+
+    python batch.py DIR_OR_MANIFEST.jsonl -o results.jsonl (--instruction TEXT | --history N)
+                    [--concurrency 4] [--rpm 60] [--retries 3] [--api-url URL]
+
+Runs one instruction over every file in a directory (text files become
+the content, images are attached), or over the items of a JSONL manifest
+({"id", "instruction", "text", "file", "images"}, paths relative to the
+manifest; a line that isn't a JSON object is recorded as a failed item,
+"line-N"). Inputs are read lazily and sent through the Gemini API from an
+asyncio pipeline: at most `concurrency` requests in flight, started no
+faster than a token bucket allows, each retried with backoff. Every
+result is appended to the output JSONL as soon as it arrives; running
+again with the same output skips the items that already succeeded.
+
+Doesn't import main.py (hotkeys, tray), so it runs without a desktop.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+
+
+def load_settings(path=None):
+    """The config.json keys batch mode uses, with their defaults."""
+    defaults = {
+        "GEMINI_API_KEY": "",
+        "GEMINI_API_MODEL": "",
+        "GEMINI_API_URL": "",
+        "JOB_TIMEOUT": 60.0,
+        "IMAGE_MAX_DIMENSION": 3072,
+        "IMAGE_MAX_PIXELS": 6_000_000,
+        "PREPROCESS_STAGES": ["control", "trailing", "blank_lines"],
+        "PREPROCESS_MAX_TOKENS": 200000,
+        "BATCH_CONCURRENCY": 4,
+        "BATCH_REQUESTS_PER_MINUTE": 60,
+        "BATCH_MAX_RETRIES": 3,
+    }
+    try:
+        with open(path or CONFIG_FILE, 'r', encoding='utf-8') as f:
+            user_config = json.load(f)
+    except (OSError, ValueError):
+        return defaults
+    return {key: user_config.get(key.lower(), value) for key, value in defaults.items()}
+
+
+class BatchItem:
+    """One prompt: instruction plus inline text, text files and image files."""
+
+    def __init__(self, item_id, instruction="", text="", files=(), images=(), error=None):
+        self.id = item_id
+        self.instruction = instruction
+        self.text = text
+        self.files = list(files)
+        self.images = list(images)
+        self.error = error  # Why the input can't be sent (e.g. a malformed manifest line)
+
+    def load(self, max_dimension=3072, max_pixels=6_000_000, preprocess=None):
+        """Read the files (worker thread). Returns (prompt, png payloads)."""
+        if self.error:
+            raise ValueError(self.error)
+        parts = [self.text] if self.text else []
+        for path in self.files:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                parts.append(f.read())
+        content = "\n\n".join(parts)
+        if preprocess and content:
+            content = preprocess(content)
+        if self.instruction and content:
+            prompt = f"{self.instruction}\n\n{content}"
+        else:
+            prompt = self.instruction or content
+        pngs = []
+        if self.images:
+            from PIL import Image
+            from imageprep import prepare_image
+            for path in self.images:
+                with Image.open(path) as img:
+                    img.load()
+                    pngs.append(prepare_image(img, max_dimension, max_pixels, formats=("png",)).png)
+        return prompt, pngs
+
+
+def iter_directory(folder, instruction):
+    """One item per file under folder (sorted, hidden files skipped), id = relative path."""
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(names):
+            if name.startswith("."):
+                continue
+            path = os.path.join(root, name)
+            item_id = os.path.relpath(path, folder).replace(os.sep, "/")
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield BatchItem(item_id, instruction, images=[path])
+            else:
+                yield BatchItem(item_id, instruction, files=[path])
+
+
+def iter_manifest(path, instruction):
+    """
+    One item per JSONL line; an item's own "instruction" overrides the default.
+    A line that isn't a JSON object becomes an item that fails with the reason.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+
+    def resolve(p):
+        return os.path.join(folder, p)
+
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError as e:
+                yield BatchItem(f"line-{number}", error=f"line {number} is not valid JSON ({e})")
+                continue
+            if not isinstance(entry, dict):
+                yield BatchItem(f"line-{number}", error=f"line {number} is not a JSON object")
+                continue
+            files = [entry["file"]] if entry.get("file") else []
+            yield BatchItem(str(entry.get("id") or entry.get("file") or f"line-{number}"),
+                            entry.get("instruction") or instruction,
+                            text=entry.get("text", ""),
+                            files=[resolve(p) for p in files],
+                            images=[resolve(p) for p in entry.get("images", [])])
+
+
+def iter_inputs(path, instruction):
+    if os.path.isdir(path):
+        return iter_directory(path, instruction)
+    return iter_manifest(path, instruction)
+
+
+def load_done(output_path):
+    """Ids that already have a successful result in output_path."""
+    done = set()
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Cut off by an interrupted run
+                if record.get("ok"):
+                    done.add(record["id"])
+    except OSError:
+        pass
+    return done
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, in bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.tokens = float(self.burst)
+        self.updated = clock()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:  # First come, first served
+            while True:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+
+
+def is_retryable(error):
+    """Transient API errors (and dropped connections) are worth another attempt."""
+    from gemini_api import GeminiApiError, RETRY_STATUSES
+    if isinstance(error, GeminiApiError):
+        return error.status is None or error.status in RETRY_STATUSES
+    return isinstance(error, (OSError, TimeoutError))
+
+
+class BatchRunner:
+    """Sends BatchItems through a client with bounded concurrency, rate limiting and retries."""
+
+    def __init__(self, client, output_path, concurrency=4, requests_per_minute=60, max_retries=3,
+                 backoff=1.0, max_backoff=30.0, max_dimension=3072, max_pixels=6_000_000, preprocess=None):
+        self.client = client
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.requests_per_minute = requests_per_minute
+        self.bucket = None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_dimension = max_dimension
+        self.max_pixels = max_pixels
+        self.preprocess = preprocess  # text -> text, applied to each item's content
+        self.stats = {"done": 0, "failed": 0, "skipped": 0, "requests": 0, "retries": 0}
+        self._out = None
+
+    def run(self, items):
+        """Process items (any iterable, consumed lazily); returns the stats."""
+        return asyncio.run(self.run_async(items))
+
+    async def run_async(self, items):
+        start = time.perf_counter()
+        done = load_done(self.output_path)
+        self.bucket = TokenBucket(self.requests_per_minute / 60.0, burst=self.concurrency)
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch")
+        self._out = self._open_output()
+        try:
+            workers = [asyncio.create_task(self._worker(queue, executor)) for _ in range(self.concurrency)]
+            try:
+                for item in items:
+                    if item.id in done:
+                        self.stats["skipped"] += 1
+                        continue
+                    await queue.put(item)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+        finally:
+            self._out.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.stats["seconds"] = time.perf_counter() - start
+        self.stats["rate_limited_s"] = self.bucket.waited
+        return self.stats
+
+    def _open_output(self):
+        out = open(self.output_path, 'a+', encoding='utf-8')
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")  # Don't glue onto a line cut off by an interrupted run
+        return out
+
+    def _write(self, record):
+        self._out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._out.flush()
+
+    async def _worker(self, queue, executor):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            started = time.perf_counter()
+            attempts = 0
+            try:
+                prompt, pngs = await loop.run_in_executor(
+                    executor, item.load, self.max_dimension, self.max_pixels, self.preprocess)
+                while True:
+                    attempts += 1
+                    await self.bucket.acquire()
+                    self.stats["requests"] += 1
+                    try:
+                        response = await loop.run_in_executor(executor, self.client.generate, prompt, pngs)
+                        break
+                    except Exception as e:
+                        if attempts > self.max_retries or not is_retryable(e):
+                            raise
+                        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+                        delay *= random.uniform(0.8, 1.2)
+                        self.stats["retries"] += 1
+                        print(f"  {item.id}: attempt {attempts} failed ({e}), retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"  {item.id}: failed ({e})")
+                self._write({"id": item.id, "ok": False, "error": f"{type(e).__name__}: {e}",
+                             "attempts": attempts})
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.stats["done"] += 1
+            print(f"  {item.id}: done in {elapsed_ms:.0f}ms ({self.stats['done']} done)")
+            self._write({"id": item.id, "ok": True, "response": response,
+                         "attempts": attempts, "ms": round(elapsed_ms, 1)})
+
+
+def make_client(settings, api_url=None):
+    """API client for batch use: retries are left to BatchRunner so each attempt is rate limited."""
+    from gemini_api import GeminiApiClient, DEFAULT_BASE_URL, DEFAULT_MODEL
+    return GeminiApiClient(
+        settings["GEMINI_API_KEY"] or os.environ.get("GEMINI_API_KEY", ""),
+        model=settings["GEMINI_API_MODEL"] or DEFAULT_MODEL,
+        base_url=api_url or settings["GEMINI_API_URL"] or DEFAULT_BASE_URL,
+        pool_size=settings["BATCH_CONCURRENCY"],
+        timeout=settings["JOB_TIMEOUT"],
+        max_retries=0,
+    )
+
+
+def main(argv=None):
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="a directory of files or a JSONL manifest")
+    parser.add_argument("-o", "--output", required=True, help="results JSONL (appended to; reruns resume)")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--instruction", default="", help="instruction sent with every item")
+    source.add_argument("--history", type=int, metavar="N", help="use the Nth most recent instruction from history")
+    parser.add_argument("--concurrency", type=int, default=settings["BATCH_CONCURRENCY"])
+    parser.add_argument("--rpm", type=float, default=settings["BATCH_REQUESTS_PER_MINUTE"],
+                        help="requests per minute, retries included (0: unlimited)")
+    parser.add_argument("--retries", type=int, default=settings["BATCH_MAX_RETRIES"])
+    parser.add_argument("--api-url", help="e.g. http://127.0.0.1:8765 for benchmarks/stub_gemini_server.py")
+    args = parser.parse_args(argv)
+
+    instruction = args.instruction
+    if args.history:
+        from history import HistoryManager
+        entries = HistoryManager().get_recent(args.history)
+        if len(entries) < args.history:
+            parser.error(f"history has only {len(entries)} instruction(s)")
+        instruction = entries[-1]["instruction"]
+        print(f"Instruction: {instruction}")
+
+    preprocess = None
+    if settings["PREPROCESS_STAGES"]:
+        from preprocess import Preprocessor
+
+        def preprocess(text):
+            return Preprocessor(settings["PREPROCESS_STAGES"], settings["PREPROCESS_MAX_TOKENS"]).process(text)
+
+    settings["BATCH_CONCURRENCY"] = args.concurrency
+    client = make_client(settings, args.api_url)
+    runner = BatchRunner(client, args.output, concurrency=args.concurrency, requests_per_minute=args.rpm,
+                         max_retries=args.retries, max_dimension=settings["IMAGE_MAX_DIMENSION"],
+                         max_pixels=settings["IMAGE_MAX_PIXELS"], preprocess=preprocess)
+    try:
+        stats = runner.run(iter_inputs(args.input, instruction))
+    except KeyboardInterrupt:
+        print(f"Interrupted after {runner.stats['done']} item(s); run again to resume.")
+        return 130
+    finally:
+        client.close()
+    print(f"Batch finished in {stats['seconds']:.1f}s: {stats['done']} done, {stats['failed']} failed, "
+          f"{stats['skipped']} already done, {stats['retries']} retries")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Benchmark: batch mode throughput against the local API stub.
+
+    python benchmarks/bench_batch.py [--items 200] [--latency 0.2] [--fail-every 10]
+
+Writes a directory of text files, then runs batch.py's pipeline over it
+against stub_gemini_server.py at several concurrency limits and reports
+wall time, throughput and retries (the stub answers every Nth request
+with 503). A rate-limited run checks the token bucket holds the request
+rate, and a resumed run, after cutting the output file in half mid-line,
+checks that only the missing items are sent again.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import batch
+from gemini_api import GeminiApiClient
+from stub_gemini_server import start_stub_server
+
+
+def write_inputs(folder, count):
+    for i in range(count):
+        with open(os.path.join(folder, f"doc{i:04d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"Document {i}: " + "lorem ipsum dolor sit amet " * 20)
+
+
+def run(url, folder, output, concurrency, rpm=0, backoff=0.05):
+    client = GeminiApiClient("bench-key", base_url=url, pool_size=concurrency, max_retries=0)
+    runner = batch.BatchRunner(client, output, concurrency=concurrency, requests_per_minute=rpm,
+                               max_retries=3, backoff=backoff, max_backoff=0.5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = runner.run(batch.iter_directory(folder, "Summarize this"))
+    client.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds before the first chunk")
+    parser.add_argument("--fail-every", type=int, default=10)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="bench_batch_")
+    folder = os.path.join(work, "inputs")
+    os.makedirs(folder)
+    write_inputs(folder, args.items)
+    server, url = start_stub_server(latency=args.latency, fail_every=args.fail_every)
+
+    print(f"{args.items} items, stub latency {args.latency * 1000:.0f}ms, every {args.fail_every}th request fails")
+    print(f"{'run':<22}{'wall (s)':>9}{'items/s':>9}{'requests':>10}{'retries':>9}{'failed':>8}")
+
+    def report(name, stats):
+        print(f"{name:<22}{stats['seconds']:>9.2f}{stats['done'] / stats['seconds']:>9.1f}"
+              f"{stats['requests']:>10}{stats['retries']:>9}{stats['failed']:>8}")
+
+    for concurrency in (1, 4, 16):
+        output = os.path.join(work, f"c{concurrency}.jsonl")
+        report(f"concurrency {concurrency}", run(url, folder, output, concurrency))
+
+    # Token bucket: 600 rpm = 10 requests/s, regardless of concurrency
+    limited = min(args.items, 40)
+    small = os.path.join(work, "small")
+    os.makedirs(small)
+    write_inputs(small, limited)
+    stats = run(url, small, os.path.join(work, "limited.jsonl"), 16, rpm=600)
+    report("concurrency 16, 600rpm", stats)
+    rate = stats["requests"] / stats["seconds"]
+    print(f"  request rate {rate:.1f}/s (limit 10/s after a burst of 16)")
+
+    # Resume: keep the first half of a finished run, cutting the last kept line short
+    output = os.path.join(work, "c4.jsonl")
+    with open(output, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    kept = lines[:len(lines) // 2]
+    with open(output, 'w', encoding='utf-8') as f:
+        f.writelines(kept[:-1])
+        f.write(kept[-1][:len(kept[-1]) // 2])
+    before = len(batch.load_done(output))
+    stats = run(url, folder, output, 4)
+    report("resume, concurrency 4", stats)
+    with open(output, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip().endswith("}")]
+    ok = {r["id"] for r in records if r.get("ok")}
+    print(f"  {before} already done, {stats['skipped']} skipped, {stats['done']} sent; "
+          f"{len(ok)}/{args.items} items in the output")
+    server.shutdown()
+    if len(ok) != args.items or stats["skipped"] != before:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: selected-text capture latency, fixed sleeps vs clipboard-change waits.
+
+    python benchmarks/bench_capture.py [--latencies 0.01 0.03 0.1 0.3]
+
+Runs on a fake clipboard with a virtual clock. For each copy latency
+(time the foreground app takes to fill the clipboard after ctrl+c) it
+captures a text selection, a copied image and an empty selection, and
+checks that the user's previous clipboard contents (an image) survived
+and that only an image the copy produced is returned.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import FakeBackend
+from capture import TextCapture
+
+MODIFIER_RELEASE = 0.08  # Hotkey keys still held when capture starts
+COPIED_IMAGE = object()  # Stands in for a PIL image; the fake clipboard only passes it along
+
+
+def legacy_capture(backend):
+    """The old capture_text: sleep, wipe the clipboard, ctrl+c, sleep, read."""
+    backend.sleep(0.6)
+    backend.set_clipboard_text("")
+    backend.send_keys('ctrl+c')
+    backend.sleep(0.4)
+    return backend.get_clipboard_text(), None
+
+
+def run(latency, method, rounds=5):
+    backend = FakeBackend(copy_latency=latency)
+    capture = TextCapture(backend)
+    results = []
+    for i in range(rounds):
+        for selection in ("selected text", COPIED_IMAGE, None):
+            original = ("bitmap", f"screenshot {i}")
+            backend._set_clipboard(original)
+            backend.selection = selection
+            backend.modifiers_released_at = backend.monotonic() + MODIFIER_RELEASE
+            start = backend.monotonic()
+            text, image = legacy_capture(backend) if method == "legacy" else capture.capture()
+            elapsed = backend.monotonic() - start
+            copied_image = COPIED_IMAGE if selection is COPIED_IMAGE else None
+            results.append((selection, text == (selection if isinstance(selection, str) else ""),
+                            image is copied_image, elapsed, backend.clipboard == original))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latencies", type=float, nargs="+", default=[0.01, 0.03, 0.1, 0.3])
+    args = parser.parse_args()
+
+    print(f"{'copy latency':>12}{'method':>9}{'selected (ms)':>15}{'empty (ms)':>12}{'text ok':>9}{'image ok':>10}"
+          f"{'clipboard kept':>16}")
+    for latency in args.latencies:
+        for method in ("legacy", "signal"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = run(latency, method)
+            selected = [r for r in results if isinstance(r[0], str)]
+            empty = [r for r in results if r[0] is None]
+            # The first rounds calibrate the adaptive timeout; report the steady state
+            kept = f"{sum(r[4] for r in results)}/{len(results)}"
+            print(f"{latency * 1000:>10.0f}ms{method:>9}"
+                  f"{selected[-1][3] * 1000:>15.0f}{empty[-1][3] * 1000:>12.0f}"
+                  f"{'yes' if all(r[1] for r in results) else 'NO':>9}"
+                  f"{'yes' if all(r[2] for r in results) else 'NO':>10}{kept:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: adaptive wait tuning vs static paste delays on the fake platform.
+
+    python benchmarks/bench_delays.py [--sends 80] [--seed 1]
+
+Sends repeatedly to a reused Gemini window whose input focus takes a
+random time to confirm, or never confirms (e.g. focus can't be detected
+on that send). Compares static timeouts (adaptive_delays off) with the
+tuned ones: time spent waiting for focus, sends pasted without confirmed
+focus, and those of them that would have been confirmed had the tool
+waited the full static value (i.e. pasted too early). Tuning only pays
+off on the fast machine; on the slow one the waits' tail and on the
+unreliable one the unconfirmed waits keep the timeout at the static
+value, which is what keeps the tuned runs from pasting too early.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platform_stubs import install_stubs
+
+install_stubs(only_missing=True)
+
+import main
+import tuning
+from backends import FakeBackend
+from metrics import percentile
+
+NEVER = float("inf")
+
+# Input focus delay per send, in seconds
+MACHINES = {
+    "fast, 3% undetectable": lambda rng: NEVER if rng.random() < 0.03 else rng.uniform(0.03, 0.15),
+    "slow, long tail": lambda rng: min(rng.lognormvariate(-0.7, 0.5), 1.4),
+    "20% undetectable": lambda rng: NEVER if rng.random() < 0.2 else rng.uniform(0.03, 0.15),
+}
+
+
+def run(machine, adaptive, sends, seed, folder):
+    main.CONFIG["ADAPTIVE_DELAYS"] = adaptive
+    tuning.PROFILE_FILE = os.path.join(folder, f"profile_{adaptive}_{seed}.json")
+    rng = random.Random(seed)
+    backend = FakeBackend(load_latency=1.0, title_latency=0.3, foreground_delay=0.05)
+    hwnd = backend.add_window("Google Gemini - Fake Browser")
+    tool = main.GeminiDesktopTool(backend=backend)
+    outcomes = []
+    wait_for_input_focus = tool.readiness.wait_for_input_focus
+
+    def recorded(hwnd, timeout):
+        start = backend.monotonic()
+        ok = wait_for_input_focus(hwnd, timeout)
+        outcomes.append((backend.monotonic() - start, ok, delay))
+        return ok
+    tool.readiness.wait_for_input_focus = recorded
+
+    for _ in range(sends):
+        delay = MACHINES[machine](rng)
+        window = backend.windows[hwnd]
+        window.focus_delay = delay
+        window.focus_at = None  # Focus left the input box since the last send
+        with contextlib.redirect_stdout(io.StringIO()):
+            tool.run_automation("Summarize this", [], True)
+    timeout = tool.delays.timeout("input_focus_reuse", main.CONFIG["PASTE_DELAY_REUSE"])
+    return outcomes, timeout
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sends", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    main.CONFIG.update(main.load_config())
+    main.CONFIG["METRICS_ENABLED"] = False
+    main.CONFIG["IMAGE_CACHE_MB"] = 0
+    static = main.CONFIG["PASTE_DELAY_REUSE"]
+
+    folder = tempfile.mkdtemp(prefix="bench_delays_")
+    print(f"input focus wait per send, paste_delay_reuse {static}s, {args.sends} sends")
+    print(f"{'machine':<24}{'mode':>9}{'mean (s)':>10}{'p95 (s)':>9}{'total (s)':>11}"
+          f"{'unconfirmed':>13}{'too early':>11}{'timeout':>9}")
+    for machine in MACHINES:
+        for adaptive in (False, True):
+            outcomes, timeout = run(machine, adaptive, args.sends, args.seed, folder)
+            waits = [w for w, _, _ in outcomes]
+            unconfirmed = sum(1 for _, ok, _ in outcomes if not ok)
+            too_early = sum(1 for _, ok, delay in outcomes if not ok and delay <= static)
+            print(f"{machine:<24}{'tuned' if adaptive else 'static':>9}{sum(waits) / len(waits):>10.3f}"
+                  f"{percentile(waits, 95):>9.2f}{sum(waits):>11.1f}{unconfirmed:>13}{too_early:>11}"
+                  f"{timeout:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,135 @@
+"""
+Benchmark: end-to-end sends through GeminiDesktopTool on the fake platform.
+
+    python benchmarks/bench_e2e.py [--real-time] [--check]
+
+Drives capture_text, run_automation (reuse and new page) and the image
+paste loop against FakeBackend with configurable app latencies. Reports,
+per scenario, the simulated wall-clock time the user waits (virtual
+clock, or the real clock with --real-time) and the real CPU time spent.
+With --check, exits non-zero if a scenario exceeds its budget, so a new
+sleep or a longer delay shows up as a failure, or if a paste or enter
+reached a window whose input box didn't have focus.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platform_stubs import install_stubs
+
+install_stubs(only_missing=True)
+
+import main
+import tuning
+from backends import FakeBackend
+from PIL import Image
+
+# App latencies used by every scenario (seconds)
+LATENCIES = dict(load_latency=1.0, title_latency=0.3, foreground_delay=0.05, focus_delay=0.05,
+                 copy_latency=0.03, key_latency=0.005, click_latency=0.005, clipboard_latency=0.005)
+
+# Upper bounds on the simulated time per scenario (seconds)
+BUDGETS = {
+    "capture (selection)": 0.3,
+    "capture (nothing selected)": 1.2,
+    "send, reuse window": 1.2,
+    "send, new page": 3.0,
+    "send + 4 images, batch": 2.5,
+    "send + 4 images, per_image": 6.0,
+    "send + 1 MB content, file": 2.5,
+    "send + 1 MB content, chunks": 18.0,
+}
+
+
+def make_tool(clock, strategy="batch"):
+    backend = FakeBackend(clock=clock, **LATENCIES)
+    backend.add_window("Google Gemini - Fake Browser")
+    backend.modifiers_released_at = backend.monotonic() + 0.05
+    tool = main.GeminiDesktopTool(backend=backend)
+    tool.paster.strategy = strategy
+    tool.paster.staging_root = tempfile.mkdtemp(prefix="bench_e2e_")
+    return tool, backend
+
+
+def images(n):
+    return [Image.new("RGB", (800 + i, 600), (40 * i % 255, 120, 200)) for i in range(n)]
+
+
+def scenarios():
+    def capture(selection):
+        def run(tool, backend):
+            backend.selection = selection
+            tool.capture_text()
+        return run
+
+    def send(reuse, n_images=0, strategy="batch", attachment=None, text_mode="file"):
+        imgs = images(n_images)
+
+        def run(tool, backend):
+            tool.paster.strategy = strategy
+            main.CONFIG["LARGE_PASTE_MODE"] = text_mode
+            if not reuse:
+                backend.windows.clear()
+            for img in imgs:
+                tool.preparer.submit(img)  # As the popup does while it is open
+            tool.run_automation("Summarize this", imgs, reuse, attachment)
+        return run
+
+    log = "".join(f"2024-01-01 12:00:{i % 60:02d} INFO request {i} handled in {i % 97}ms\n"
+                  for i in range(20000))[:1_000_000]
+
+    return [
+        ("capture (selection)", capture("some selected text")),
+        ("capture (nothing selected)", capture(None)),
+        ("send, reuse window", send(True)),
+        ("send, new page", send(False)),
+        ("send + 4 images, batch", send(True, 4, "batch")),
+        ("send + 4 images, per_image", send(True, 4, "per_image")),
+        ("send + 1 MB content, file", send(True, attachment=log)),
+        ("send + 1 MB content, chunks", send(True, attachment=log, text_mode="chunks")),
+    ]
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--real-time", action="store_true", help="use the real clock instead of a virtual one")
+    parser.add_argument("--check", action="store_true", help="fail if a scenario exceeds its budget")
+    args = parser.parse_args()
+
+    main.CONFIG.update(main.load_config())
+    main.CONFIG["METRICS_ENABLED"] = False
+    main.CONFIG["IMAGE_CACHE_MB"] = 0  # Every scenario prepares its images cold
+    tuning.PROFILE_FILE = os.path.join(tempfile.mkdtemp(prefix="bench_e2e_"), "delay_profile.json")
+
+    print(f"{'scenario':<30}{'waited (s)':>11}{'cpu (ms)':>10}{'budget':>8}")
+    failed = []
+    for name, run in scenarios():
+        clock = time if args.real_time else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            tool, backend = make_tool(clock)
+            start_cpu = time.process_time()
+            start = backend.monotonic()
+            run(tool, backend)
+            waited = backend.monotonic() - start
+            cpu_ms = (time.process_time() - start_cpu) * 1000
+            tool.preparer.shutdown()
+        budget = BUDGETS[name]
+        over = waited > budget
+        if over or backend.misdirected:
+            failed.append(name)
+        note = ("  OVER" if over else "") + ("  MISDIRECTED" if backend.misdirected else "")
+        print(f"{name:<30}{waited:>11.2f}{cpu_ms:>10.1f}{budget:>7.1f}s{note}")
+
+    if args.check and failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
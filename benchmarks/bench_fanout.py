@@ -0,0 +1,179 @@
+"""
+Benchmark: one prompt to several Gemini sessions, sequential vs fan-out.
+
+    python benchmarks/bench_fanout.py [--targets 2 4 8] [--images 4] [--api-latency 0.3]
+
+Browser: on FakeBackend with several windows (virtual clock; like real
+browsers, a plain open_url adds a tab to the window in front), sends the
+same prompt and images to N sessions once with N sequential
+run_automation calls and once with run_fanout, both to open Gemini
+windows and to pages that have to be opened first (sequentially as tabs,
+by the fan-out as new windows). Reports the simulated time until the
+last session sent, the speedup, the per-target completion times and the
+clipboard writes, and checks that every session received the whole
+payload in its input box and had taken it in before its enter. Then
+checks that new-page targets fail fast when the browser can't be asked
+for a new window, or opens tabs anyway. API: N sessions against
+stub_gemini_server.py, one after the other vs run_api_fanout.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from platform_stubs import install_stubs
+
+install_stubs(only_missing=True)
+
+import main
+import tuning
+from backends import FakeBackend
+from PIL import Image
+from stub_gemini_server import start_stub_server
+
+# App latencies (seconds), as in bench_e2e.py; a page takes 0.5s to take in a paste
+LATENCIES = dict(load_latency=1.0, title_latency=0.3, foreground_delay=0.05, focus_delay=0.05,
+                 key_latency=0.005, click_latency=0.005, clipboard_latency=0.005, upload_latency=0.5)
+PROMPT = "Compare these charts and summarize the differences"
+
+
+def make_tool(windows):
+    backend = FakeBackend(**LATENCIES)
+    backend.open_in_tabs = True
+    for _ in range(windows):
+        backend.add_window("Google Gemini - Fake Browser")
+    tool = main.GeminiDesktopTool(backend=backend)
+    tool.paster.staging_root = tempfile.mkdtemp(prefix="bench_fanout_")
+    return tool, backend
+
+
+def images(n):
+    return [Image.new("RGB", (800 + i, 600), (40 * i % 255, 120, 200)) for i in range(n)]
+
+
+def sequential(tool, backend, imgs, count, reuse):
+    for hwnd in list(backend.windows)[:count] if reuse else [None] * count:
+        if hwnd:
+            tool.readiness.tracker.remember(hwnd)  # Each send goes to the next window
+        tool.run_automation(PROMPT, imgs, reuse)
+    return [round(sent_at, 3) for sent_at, *_ in backend.sent]
+
+
+def fanout(tool, backend, imgs, count, reuse):
+    return [entry["seconds"] for entry in tool.run_fanout(PROMPT, imgs, reuse, targets=count)]
+
+
+def delivered(backend, count, n_images, windows):
+    """Every target sent once, after taking in the prompt and all images, to as many windows."""
+    if len(backend.sent) != count or len({hwnd for _, hwnd, _, _ in backend.sent}) != windows:
+        return False
+    if backend.misdirected:
+        return False
+    for _, _, received, complete in backend.sent:
+        texts = [data for kind, data in received if kind == "text"]
+        files = [path for kind, data in received if kind == "files" for path in data]
+        if not complete or texts != [PROMPT] or len(files) != n_images:
+            return False
+    return True
+
+
+def run_browser(args, imgs):
+    print(f"{'scenario':<30}{'mode':<12}{'time (s)':>9}{'speedup':>9}{'clip':>6}  per-target completion (s)")
+    ok = True
+    for reuse in (True, False):
+        for count in args.targets:
+            name = f"{count} windows, {'reuse' if reuse else 'new pages'}"
+            baseline = None
+            for mode, send in (("sequential", sequential), ("fan-out", fanout)):
+                tool, backend = make_tool(count if reuse else 0)
+                for img in imgs:
+                    tool.preparer.submit(img)  # As the popup does while it is open
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = backend.monotonic()
+                    times = send(tool, backend, imgs, count, reuse)
+                    elapsed = backend.monotonic() - start
+                tool.preparer.shutdown()
+                baseline = baseline or elapsed
+                # Sequential new pages are tabs of one window
+                good = delivered(backend, count, len(imgs), 1 if mode == "sequential" and not reuse else count)
+                ok = ok and good
+                shown = " ".join(f"{t:.2f}" for t in times)
+                print(f"{name:<30}{mode:<12}{elapsed:>9.2f}{baseline / elapsed:>8.1f}x{backend.clipboard_seq:>6}  "
+                      f"{shown}{'' if good else '  INCOMPLETE'}")
+                name = ""
+    return ok
+
+
+def run_tabs_only(imgs):
+    """New-page targets the browser can't give windows of their own fail without waiting them out."""
+    print(f"\n{'browser':<34}{'time (s)':>9}  targets")
+    ok = True
+    for name, supported in (("can't be asked for a new window", False), ("ignores the new-window request", True)):
+        tool, backend = make_tool(1)
+        backend.supports_new_window = supported
+        if supported:
+            open_url = backend.open_url
+            backend.open_url = lambda url, new_window=False: open_url(url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = backend.monotonic()
+            report = tool.run_fanout(PROMPT, imgs, True, targets=4)
+            elapsed = backend.monotonic() - start
+        tool.preparer.shutdown()
+        failed = [entry for entry in report if entry["error"]]
+        ok = ok and len(failed) == 3 and elapsed < main.CONFIG["READY_TIMEOUT"]
+        print(f"{name:<34}{elapsed:>9.2f}  {4 - len(failed)} sent, {len(failed)} failed: {failed[0]['error']}")
+    return ok
+
+
+def run_api(args):
+    server, url = start_stub_server(latency=args.api_latency)
+    main.CONFIG.update(GEMINI_API_KEY="bench-key", GEMINI_API_URL=url, RESPONSE_CACHE_MB=0)
+    print(f"\nAPI sessions, stub latency {args.api_latency * 1000:.0f}ms (real time)")
+    print(f"{'sessions':<10}{'sequential (s)':>15}{'fan-out (s)':>12}{'speedup':>9}")
+    ok = True
+    for count in args.targets:
+        tool, _ = make_tool(0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _ in range(count):
+                tool.run_api(PROMPT, [])
+            serial = time.perf_counter() - start
+            before = server.state.requests
+            start = time.perf_counter()
+            report = tool.run_api_fanout(PROMPT, [], targets=count)
+            parallel = time.perf_counter() - start
+        tool.get_api_client().close()
+        ok = ok and server.state.requests - before == count and not any(e["error"] for e in report)
+        print(f"{count:<10}{serial:>15.2f}{parallel:>12.2f}{serial / parallel:>8.1f}x")
+    server.shutdown()
+    return ok
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--targets", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--api-latency", type=float, default=0.3, help="stub seconds before the first chunk")
+    args = parser.parse_args()
+
+    main.CONFIG.update(main.load_config())
+    main.CONFIG.update(METRICS_ENABLED=False, IMAGE_CACHE_MB=0)
+    tuning.PROFILE_FILE = os.path.join(tempfile.mkdtemp(prefix="bench_fanout_"), "delay_profile.json")
+
+    imgs = images(args.images)
+    ok = run_browser(args, imgs)
+    ok = run_tabs_only(imgs) and ok
+    ok = run_api(args) and ok
+    if not ok:
+        print("Some targets did not receive the whole payload")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
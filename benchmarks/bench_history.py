@@ -0,0 +1,142 @@
+"""
+Benchmark: history add and load latency, journal vs the old full rewrite.
+
+    python benchmarks/bench_history.py [--sizes 1000 10000 100000]
+
+Each size is pre-filled, then timed for 200 more adds and a cold load
+(the median of five).
+Then loads a journal that was never compacted (100k appends cycling over
+twice max_items instructions), which load() compacts in the background,
+and loads it again.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryManager
+
+LOADS = 5
+
+
+class LegacyHistory:
+    """The pre-journal behaviour: dedupe by list scan, rewrite the whole file."""
+
+    def __init__(self, path, max_items):
+        self.path = path
+        self.max_items = max_items
+        self.history = []
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.history = json.load(f).get('history', [])
+
+    def add(self, instruction, content=""):
+        entry = {'instruction': instruction, 'content_preview': content[:100],
+                 'timestamp': datetime.now().isoformat(), 'count': 1}
+        self.history = [h for h in self.history if h['instruction'] != instruction]
+        self.history.insert(0, entry)
+        self.history = self.history[:self.max_items]
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'history': self.history}, f, ensure_ascii=False, indent=2)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def time_adds(store, n, offset):
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        store.add(f"instruction number {offset + i} please summarize", "some content")
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench(size, folder, fsync):
+    journal = os.path.join(folder, f"h{size}.jsonl")
+    legacy = os.path.join(folder, f"h{size}.json")
+
+    store = HistoryManager(max_items=size, path=journal, fsync=False)
+    for i in range(size):
+        store.add(f"instruction number {i} please summarize", "some content")
+    store.compact()
+    store.close()
+    legacy_store = LegacyHistory(legacy, size)
+    # Same fields as the journal's entries, so both loads parse as much
+    legacy_store.history = [{'instruction': f"instruction number {i} please summarize",
+                             'content_preview': "some content", 'timestamp': datetime.now().isoformat(),
+                             'count': 1} for i in range(size)]
+    legacy_store.add("seed")
+
+    # Median of a few cold loads each, a single one is mostly noise
+    load_times, legacy_times = [], []
+    for _ in range(LOADS):
+        start = time.perf_counter()
+        store = HistoryManager(max_items=size, path=journal, fsync=fsync)
+        load_times.append((time.perf_counter() - start) * 1000)
+        store.close()
+        start = time.perf_counter()
+        legacy_store = LegacyHistory(legacy, size)
+        legacy_times.append((time.perf_counter() - start) * 1000)
+    load_ms = statistics.median(load_times)
+    legacy_load_ms = statistics.median(legacy_times)
+    store = HistoryManager(max_items=size, path=journal, fsync=fsync)
+
+    adds = time_adds(store, 200, size)
+    legacy_adds = time_adds(legacy_store, 20 if size >= 100000 else 200, size)
+    store.close()
+    return load_ms, legacy_load_ms, adds, legacy_adds
+
+
+def bench_uncompacted(folder, records=100000, max_items=1000):
+    path = os.path.join(folder, "uncompacted.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(records):
+            f.write(json.dumps({'instruction': f"instruction number {i % (2 * max_items)} please summarize",
+                                'content_preview': "some content", 'timestamp': datetime.now().isoformat(),
+                                'count': 1, 'op': 'add'}) + "\n")
+    times = []
+    for _ in range(2):
+        start = time.perf_counter()
+        store = HistoryManager(max_items=max_items, path=path, fsync=False)
+        times.append((time.perf_counter() - start) * 1000)
+        for thread in threading.enumerate():
+            if thread.name == "history-compact":
+                thread.join()
+        store.close()
+    return times, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--no-fsync", action="store_true", help="skip fsync on journal appends")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench_history_")
+    try:
+        print(f"{'entries':>8}{'load':>10}{'old load':>10}{'add p50':>10}{'add p95':>10}{'old p50':>10}{'old p95':>10}   (ms)")
+        for size in args.sizes:
+            load_ms, legacy_load_ms, adds, legacy_adds = bench(size, folder, not args.no_fsync)
+            print(f"{size:>8}{load_ms:>10.1f}{legacy_load_ms:>10.1f}"
+                  f"{statistics.median(adds):>10.2f}{percentile(adds, 95):>10.2f}"
+                  f"{statistics.median(legacy_adds):>10.2f}{percentile(legacy_adds, 95):>10.2f}")
+        (first, second), size = bench_uncompacted(folder)
+        print(f"\nuncompacted journal, 100000 records for 1000 entries: load {first:.1f}ms, "
+              f"after the on-load compaction {second:.1f}ms ({size // 1024} KB)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
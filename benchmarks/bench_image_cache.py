@@ -0,0 +1,139 @@
+"""
+Benchmark: image preparation cold vs from the disk cache, and duplicate detection.
+
+    python benchmarks/bench_image_cache.py [--images 6] [--size 2560x1440]
+
+Prepares screenshot-sized images with an empty cache, then again in a
+"new session" (fresh BlobCache over the same folder, fresh image objects),
+so the second pass only hashes and reads the cached PNG payloads; the
+DIB is then rebuilt from the PNG as a paste would. Also checks
+thumbnail reuse, the size cap, and which variants count as duplicates.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from imagecache import BlobCache
+from imageprep import ImagePreparer
+from thumbnails import ThumbnailCache, hamming, identify
+
+
+def screenshot(size, seed):
+    """A window-like picture: flat panels, text-ish bars and some noise."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, (30, 30, 46))
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    for _ in range(40):
+        x, y = rng.randrange(w), rng.randrange(h)
+        draw.rectangle([x, y, x + rng.randrange(50, w // 2), y + rng.randrange(20, h // 3)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    for row in range(0, h, 18):
+        draw.line([(20, row), (20 + rng.randrange(w // 2), row)], fill=(205, 214, 244), width=2)
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    return Image.blend(img, noise, 0.08)
+
+
+def jpeg(img):
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=75)
+    buffer.seek(0)
+    return Image.open(buffer).convert("RGB")
+
+
+def prepare_all(folder, images, max_bytes):
+    cache = BlobCache(folder, max_bytes=max_bytes)
+    preparer = ImagePreparer(cache=cache)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared = [preparer.get(img) for img in images]
+    total = (time.perf_counter() - start) * 1000
+    preparer.shutdown()
+    return cache, prepared, total
+
+
+def thumbnails_all(folder, images):
+    cache = ThumbnailCache(disk=BlobCache(folder))
+    for img in images:
+        cache._load(img)
+    cache.shutdown()
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--size", default="2560x1440")
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+
+    folder = tempfile.mkdtemp(prefix="bench_image_cache_")
+    try:
+        originals = [screenshot(size, seed) for seed in range(args.images)]
+        max_bytes = 256 * 1024 * 1024
+
+        cold_cache, cold, cold_ms = prepare_all(folder, originals, max_bytes)
+        # New session: nothing in memory, and new objects so no hash is remembered
+        warm_cache, warm, warm_ms = prepare_all(folder, [img.copy() for img in originals], max_bytes)
+        start = time.perf_counter()
+        for prepared in warm:
+            prepared.dib  # Decoded from the PNG on first use, as at paste time
+        dib_ms = (time.perf_counter() - start) * 1000
+        same = all(a.png == b.png and a.dib == b.dib and a.size == b.size for a, b in zip(cold, warm))
+        print(f"prepare {args.images} x {size[0]}x{size[1]}")
+        print(f"  cold (encode)       {cold_ms / args.images:8.1f}ms/image")
+        print(f"  new session (disk)  {warm_ms / args.images:8.1f}ms/image  "
+              f"disk hits {warm_cache.disk_hits}/{args.images}, payloads identical: {'yes' if same else 'NO'}")
+        print(f"  DIB from PNG        {dib_ms / args.images:8.1f}ms/image (at paste time)")
+        print(f"  cache: {len(warm_cache)} files, {warm_cache.disk_bytes / 1e6:.1f} MB")
+
+        thumbs_folder = os.path.join(folder, "thumbs")
+        thumbnails_all(thumbs_folder, originals)
+        thumbs = thumbnails_all(thumbs_folder, [img.copy() for img in originals])
+        print(f"  thumbnails in a new session: {thumbs.hits} hits, {thumbs.misses} renders")
+
+        capped_folder = os.path.join(folder, "capped")
+        cap = cold_cache.disk_bytes * 5 // (2 * args.images)  # Room for about two and a half images
+        capped, _, _ = prepare_all(capped_folder, originals, cap)
+        print(f"  capped at {cap / 1e6:.1f} MB: {len(capped)} files, {capped.disk_bytes / 1e6:.1f} MB kept")
+
+        base = originals[0]
+        edited = base.copy()
+        ImageDraw.Draw(edited).rectangle([100, 100, 400, 130], fill=(255, 255, 255))
+        variants = [
+            ("exact copy", base.copy(), True),
+            ("rescaled to 50%", base.resize((size[0] // 2, size[1] // 2)), True),
+            ("saved as JPEG, 75%", jpeg(base), False),
+            ("same size, edited", edited, False),
+            ("different screenshot", originals[1], False),
+        ]
+        ident = identify(base)
+        print("duplicates of image 0 (distance <= 4):")
+        failures = 0
+        for name, img, expected in variants:
+            start = time.perf_counter()
+            other = identify(img)
+            hash_ms = (time.perf_counter() - start) * 1000
+            dup = other.is_duplicate(ident, 4)
+            failures += dup != expected
+            print(f"  {name:<22} phash distance {hamming(ident.phash, other.phash):>2}  "
+                  f"duplicate: {'yes' if dup else 'no ':<3}  {'' if dup == expected else 'UNEXPECTED  '}"
+                  f"hashed in {hash_ms:.1f}ms")
+        if failures:
+            sys.exit(1)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: process memory of a popup session with several 4K screenshots.
+
+    python benchmarks/bench_image_memory.py [--images 6] [--size 3840x2160]
+
+Each mode runs in a fresh interpreter: it attaches the screenshots the
+way the popup does, waits for them to be prepared, then ends the session.
+"pil" keeps full-resolution PIL images (the old images_list); "compact"
+wraps them in CompactImage, which drops the pixels once prepared. DIB
+payloads are spilled to mapped temp files in both modes ("on heap" is
+what stays). Reports resident memory while attached and after the
+session, plus what the images themselves hold.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def rss_bytes():
+    """Resident set size of this process (peak size where the current one isn't available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def screenshot(size, seed):
+    """Flat panels and text-like lines, so it compresses like a real screenshot."""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, (30, 30, 46))
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    for _ in range(30):
+        x, y = rng.randrange(w), rng.randrange(h)
+        draw.rectangle([x, y, x + rng.randrange(100, w // 2), y + rng.randrange(50, h // 3)],
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    for row in range(0, h, 20):
+        x = 40
+        while x < w - 200 and rng.random() < 0.97:
+            word = rng.randrange(20, 90)
+            draw.rectangle([x, row + 4, x + word, row + 14], fill=(205, 214, 244))
+            x += word + 8
+    return img
+
+
+def child(mode, count, size):
+    import contextlib
+    import io
+    from imageprep import ImagePreparer
+    from imagestore import CompactImage, raw_size
+
+    preparer = ImagePreparer()
+    baseline = rss_bytes()
+    attached, peak_held = [], 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for seed in range(count):
+            img = screenshot(size, seed)
+            item = CompactImage(img) if mode == "compact" else img
+            del img
+            attached.append(item)
+            preparer.submit(item)
+            held = sum(i.nbytes if mode == "compact" else raw_size(i) for i in attached)
+            peak_held = max(peak_held, held)
+        prepared = [preparer.get(item) for item in attached]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held = sum(i.nbytes if mode == "compact" else raw_size(i) for i in attached)
+    payloads = sum(p.nbytes for p in prepared)
+    heap_payloads = sum(len(p.png or b"") + (len(p._dib) if isinstance(p._dib, bytes) else 0) for p in prepared)
+    attached_rss = rss_bytes() - baseline
+
+    # End of the session: the popup drops its list; the preparer keeps the payloads for sending
+    del attached, prepared
+    gc.collect()
+    after_rss = rss_bytes() - baseline
+    preparer.shutdown()
+    print(json.dumps({"attached_rss": attached_rss, "after_rss": after_rss, "held": held,
+                      "peak_held": peak_held, "payloads": payloads, "heap_payloads": heap_payloads,
+                      "seconds": elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--size", default="3840x2160")
+    parser.add_argument("--child", choices=("pil", "compact"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = tuple(int(v) for v in args.size.split("x"))
+    if args.child:
+        child(args.child, args.images, size)
+        return
+
+    mb = 1024 * 1024
+    print(f"{args.images} screenshots of {size[0]}x{size[1]} attached in one session (MB)")
+    print(f"{'mode':<9}{'images held':>12}{'held peak':>11}{'payloads':>10}{'on heap':>9}"
+          f"{'RSS attached':>14}{'RSS after':>11}{'prep (s)':>10}")
+    for mode in ("pil", "compact"):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode,
+                               "--images", str(args.images), "--size", args.size],
+                              capture_output=True, text=True, cwd=ROOT, timeout=600)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(proc.stdout + proc.stderr[-2000:])
+            sys.exit(1)
+        r = json.loads(lines[-1])
+        print(f"{mode:<9}{r['held'] / mb:>12.1f}{r['peak_held'] / mb:>11.1f}{r['payloads'] / mb:>10.1f}"
+              f"{r['heap_payloads'] / mb:>9.1f}{r['attached_rss'] / mb:>14.1f}{r['after_rss'] / mb:>11.1f}"
+              f"{r['seconds']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
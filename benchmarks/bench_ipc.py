@@ -0,0 +1,117 @@
+"""
+Benchmark: submitting to the warm tray process over IPC vs starting a second process.
+
+    python benchmarks/bench_ipc.py [--requests 200]
+
+Serves GeminiDesktopTool.handle_request (fake platform backend) on a
+private endpoint, then measures in-process request round trips (a new
+authenticated connection each time), the wall time of `cli.py send --wait`,
+and, for comparison, a fresh interpreter importing and constructing the
+tool, which is what a script would pay without the IPC endpoint.
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from platform_stubs import install_stubs
+
+install_stubs(only_missing=True)
+
+import ipc
+import main
+import tuning
+from backends import FakeBackend
+from metrics import percentile
+
+SECOND_PROCESS = f"""
+import sys, time
+start = time.perf_counter()
+sys.path[:0] = [{BENCH_DIR!r}, {ROOT!r}]
+from platform_stubs import install_stubs
+install_stubs(only_missing=True)
+import main
+from backends import FakeBackend
+main.GeminiDesktopTool(backend=FakeBackend())
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def timed(func, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=5, help="subprocess runs for the CLI and cold start")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench_ipc_")
+    main.CONFIG.update(main.load_config())
+    main.CONFIG["METRICS_ENABLED"] = False
+    main.CONFIG["IMAGE_CACHE_MB"] = 0
+    tuning.PROFILE_FILE = os.path.join(folder, "delay_profile.json")
+    backend = FakeBackend(load_latency=0.0, title_latency=0.0, foreground_delay=0.0, focus_delay=0.0)
+    backend.add_window("Google Gemini - Fake Browser")
+    tool = main.GeminiDesktopTool(backend=backend)
+    tool.history_manager.path = os.path.join(folder, "history.jsonl")
+
+    if sys.platform == "win32":
+        endpoint = (rf"\\.\pipe\gemini_bench_{os.getpid()}", "AF_PIPE")
+    else:
+        endpoint = (os.path.join(folder, "ipc.sock"), "AF_UNIX")
+    info = os.path.join(folder, "ipc.json")
+    server = ipc.IpcServer(tool.handle_request, [endpoint, (("127.0.0.1", 0), "AF_INET")], info_path=info)
+    server.start()
+    server.ready.wait(10)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ping = timed(lambda: ipc.request({"op": "ping"}, info), args.requests)
+        replies = []
+        submit = timed(lambda: replies.append(ipc.request({"op": "submit", "instruction": "Summarize this",
+                                                           "content": "some text"}, info)),
+                       min(args.requests, 50))
+        status = ipc.request({"op": "status", "job": replies[-1]["job"], "wait": True, "timeout": 60}, info)
+
+    cli = []
+    for _ in range(args.runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, os.path.join(ROOT, "cli.py"), "--info", info,
+                                   "send", "Summarize this", "--content", "some text", "--wait"],
+                                  capture_output=True, text=True, timeout=60)
+            cli.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            print(proc.stdout + proc.stderr)
+            sys.exit(1)
+    cold = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", SECOND_PROCESS], capture_output=True, text=True, timeout=60, cwd=ROOT)
+        cold.append((time.perf_counter() - start) * 1000)
+    server.close()
+
+    print(f"endpoint: {server.family} {server.address}")
+    print(f"  ping round trip         p50 {percentile(ping, 50):7.2f}ms  p95 {percentile(ping, 95):7.2f}ms")
+    print(f"  submit round trip       p50 {percentile(submit, 50):7.2f}ms  p95 {percentile(submit, 95):7.2f}ms"
+          f"  (last job: {status['status']})")
+    print(f"  cli.py send (process)   p50 {percentile(cli, 50):7.1f}ms")
+    print(f"  second tool process     p50 {percentile(cold, 50):7.1f}ms  (import + construct, no hotkeys/tray)")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,94 @@
+"""
+Benchmark: screenshot overlay preparation, old PNG round-trip vs new path.
+
+    python benchmarks/bench_overlay.py [--repeat N]
+
+The "encode" columns run anywhere Pillow is installed. The "to Tk" columns
+also build the PhotoImage and are skipped when no display is available.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from screenshot import display_buffer, photo_from_image, ppm_bytes
+
+RESOLUTIONS = [
+    ("1080p", 1920, 1080),
+    ("1440p", 2560, 1440),
+    ("4K", 3840, 2160),
+    ("2x4K", 7680, 2160),
+]
+
+
+def fake_screen(width, height):
+    """Screen-like test image: flat areas plus noise, like real desktops."""
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width // 4, height // 4), 64).resize((width, height)).convert("RGB")
+    return Image.blend(img, noise, 0.3)
+
+
+def old_path(img, tk_root=None):
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    data = buffer.getvalue()
+    if tk_root is not None:
+        import tkinter as tk
+        return tk.PhotoImage(master=tk_root, data=data)
+    return data
+
+
+def new_path(img, display_size, tk_root=None):
+    shown = display_buffer(img, *display_size)
+    if tk_root is not None:
+        return photo_from_image(shown, master=tk_root)
+    return ppm_bytes(shown)
+
+
+def timed(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tk_root = None
+    try:
+        import tkinter as tk
+        tk_root = tk.Tk()
+        tk_root.withdraw()
+    except Exception as e:
+        print(f"No display, skipping Tk columns ({e})")
+
+    print(f"{'screen':<8}{'old encode':>12}{'new encode':>12}{'old to Tk':>12}{'new to Tk':>12}   (best of {args.repeat}, ms)")
+    for name, w, h in RESOLUTIONS:
+        img = fake_screen(w, h)
+        # Typical 150% scaling: overlay is smaller than the physical grab
+        display = (int(w / 1.5), int(h / 1.5))
+        row = [
+            timed(lambda: old_path(img), args.repeat),
+            timed(lambda: new_path(img, display), args.repeat),
+        ]
+        if tk_root is not None:
+            row.append(timed(lambda: old_path(img, tk_root), args.repeat))
+            row.append(timed(lambda: new_path(img, display, tk_root), args.repeat))
+        print(f"{name:<8}" + "".join(f"{v:>12.1f}" for v in row))
+
+    if tk_root is not None:
+        tk_root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: multi-image paste strategies on a fake clipboard backend.
+
+    python benchmarks/bench_paste.py
+
+Runs on virtual time, so it finishes instantly and reports the waiting
+the real tool would do. Also checks that images arrive in order.
+"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import FakeBackend
+from paste import ImagePaster
+
+COUNTS = [1, 2, 4, 8, 16]
+# The pre-batching loop waited 0.5s before and 1.0s after every image
+LEGACY_SECONDS_PER_IMAGE = 1.5
+
+
+def fake_images(n):
+    return [SimpleNamespace(key=f"img{i}", png=f"png-{i}".encode(), dib=None) for i in range(n)]
+
+
+def run(strategy, images, staging_root, supports_files=True):
+    backend = FakeBackend()
+    backend.supports_files = supports_files
+    paster = ImagePaster(backend, strategy=strategy, staging_root=staging_root)
+    start = backend.monotonic()
+    with contextlib.redirect_stdout(io.StringIO()):
+        used = paster.paste(images)
+    elapsed = backend.monotonic() - start
+    return used, elapsed, backend.pasted
+
+
+def check_order(images, pasted):
+    """Return True if the pasted payloads match the attached images, in order."""
+    seen = []
+    for kind, data in pasted:
+        if kind == "files":
+            for path in data:
+                with open(path, 'rb') as f:
+                    seen.append(f.read())
+        elif kind == "image":
+            seen.append(data.png)
+    return seen == [img.png for img in images]
+
+
+def main():
+    staging_root = tempfile.mkdtemp(prefix="bench_paste_")
+    print(f"{'images':>6}{'legacy':>10}{'per_image':>12}{'batch':>10}{'fallback':>10}{'order':>8}   (seconds waited)")
+    for n in COUNTS:
+        images = fake_images(n)
+        _, per_image, pasted_each = run("per_image", images, staging_root)
+        used, batch, pasted_batch = run("batch", images, staging_root)
+        _, fallback, pasted_fallback = run("batch", images, staging_root, supports_files=False)
+        ordered = all(check_order(images, p) for p in (pasted_each, pasted_batch, pasted_fallback))
+        print(f"{n:>6}{n * LEGACY_SECONDS_PER_IMAGE:>10.1f}{per_image:>12.1f}{batch:>10.1f}{fallback:>10.1f}{'ok' if ordered else 'FAIL':>8}")
+        if not ordered:
+            sys.exit(1)
+    shutil.rmtree(staging_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: content preprocessing on large captures.
+
+    python benchmarks/bench_preprocess.py [--mb 4] [--max-tokens 200000]
+
+Builds captures of the given size (a colored build log with progress
+bars and repeated lines, a Python stack trace repeated by a retry loop,
+plain prose, and a numeric CSV table) and runs the preprocessing
+pipeline over each, once with the default lossless stages and once with
+the opt-in ones for logs added. Reports, per stage, the bytes saved and
+time taken, the overall throughput, and the peak memory the run
+allocated relative to the input size, and checks that prose and the
+table pass the default stages untouched.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content import format_size
+from preprocess import DEFAULT_STAGES, Preprocessor
+
+LOG_STAGES = DEFAULT_STAGES + ("spaces", "similar", "budget")
+
+
+def build_log(size, rng):
+    lines = []
+    total = 0
+    while total < size:
+        n = len(lines)
+        kind = rng.random()
+        if kind < 0.05:
+            line = "".join(f"\r[{'#' * p}{' ' * (20 - p)}] {p * 5}%" for p in range(0, 21, 4)) + "\r"
+        elif kind < 0.7:
+            line = (f"\x1b[32m2024-05-01 10:{n // 60 % 60:02d}:{n % 60:02d}\x1b[0m INFO  "
+                    f"compiled   module_{n % 40}.c    in {rng.randrange(5, 99)}ms   ")
+        else:
+            line = f"\x1b[33mWARN\x1b[0m  deprecated call in src/file_{rng.randrange(500)}.c:{rng.randrange(2000)}"
+        lines.append(line)
+        total += len(line) + 1
+    return "\r\n".join(lines)
+
+
+def build_traceback(size):
+    frames = "".join(f'  File "/srv/app/handlers/h{i}.py", line {10 + i}, in handle\n    return next_handler(request)\n'
+                     for i in range(30))
+    trace = f"Traceback (most recent call last):\n{frames}TimeoutError: upstream timed out\n\n\n"
+    out = []
+    attempt = 0
+    while sum(map(len, out)) < size:
+        out.append(f"Attempt {attempt} failed:\n" + trace)
+        attempt += 1
+    return "".join(out)
+
+
+def build_prose(size, rng):
+    words = ("the quick brown fox jumps over a lazy dog while seven wizards "
+             "quietly box jumping frogs near the old mill").split()
+    lines = []
+    total = 0
+    while total < size:
+        line = " ".join(rng.choice(words) for _ in range(rng.randrange(8, 16))).capitalize() + "."
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def build_table(size, rng):
+    lines = ["id,temperature,pressure"]
+    total = 0
+    while total < size:
+        line = f"{len(lines)},{rng.uniform(10, 30):.2f},{rng.randrange(990, 1030)}"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=float, default=4.0)
+    parser.add_argument("--max-tokens", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    size = int(args.mb * 1024 * 1024)
+    captures = [("build log", build_log(size, rng)), ("stack traces", build_traceback(size)),
+                ("prose", build_prose(size, rng)), ("numeric table", build_table(size, rng))]
+    ok = True
+    for label, stages in (("default stages", DEFAULT_STAGES), ("with the log stages", LOG_STAGES)):
+        print(f"{label}: {', '.join(stages)}")
+        for name, text in captures:
+            preprocessor = Preprocessor(stages, args.max_tokens)
+            tracemalloc.start()
+            out = preprocessor.process(text)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            # tracemalloc slows the run down; time it again without
+            preprocessor = Preprocessor(stages, args.max_tokens)
+            start = time.perf_counter()
+            preprocessor.process(text)
+            elapsed = time.perf_counter() - start
+            untouched = stages != DEFAULT_STAGES or name not in ("prose", "numeric table") or out == text
+            ok = ok and untouched
+            print(f"{name}: {format_size(len(text))} -> {format_size(len(out))} in {elapsed * 1000:.0f}ms "
+                  f"({len(text) / elapsed / 1024 / 1024:.0f} MB/s), peak allocation "
+                  f"{peak / max(len(text), 1):.1f}x the input{'' if untouched else '  CHANGED'}")
+            for stats in preprocessor.stats:
+                print(f"  {stats!r}")
+        print()
+    if not ok:
+        print("The default stages changed content they should pass through")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
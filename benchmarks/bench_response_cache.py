@@ -0,0 +1,128 @@
+"""
+Benchmark: API sends with and without the response cache.
+
+    python benchmarks/bench_response_cache.py [--sends 200] [--distinct 40] [--latency 0.3]
+
+Drives GeminiDesktopTool.run_api (fake platform, API stub with the given
+latency) with a stream of prompts drawn from a small set, resent with
+different line endings and trailing whitespace as captured text tends to
+be. Reports time to a finished answer for misses and hits, the hit rate,
+and the raw lookup/store cost of the SQLite cache; then checks LRU
+eviction under the size cap, TTL expiry, and that bypass asks the API.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from platform_stubs import install_stubs
+
+install_stubs(only_missing=True)
+
+import main
+import tuning
+from backends import FakeBackend
+from metrics import percentile
+from responsecache import ResponseCache, response_key
+from stub_gemini_server import start_stub_server
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def variant(text, rng):
+    """The same prompt as it might be captured again."""
+    if rng.random() < 0.5:
+        text = "\n".join(line + " " * rng.randrange(3) for line in text.split("\n")) + "\n"
+    if rng.random() < 0.5:
+        text = text.replace("\n", "\r\n")
+    return text
+
+
+def send(tool, text, use_cache=True):
+    """Time from run_api to the finished answer."""
+    start = time.perf_counter()
+    tool.run_api(text, [], use_cache)
+    return (time.perf_counter() - start) * 1000
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sends", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3, help="stub seconds before the first chunk")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench_response_cache_")
+    server, url = start_stub_server(latency=args.latency)
+    main.CONFIG.update(main.load_config())
+    main.CONFIG.update(METRICS_ENABLED=False, IMAGE_CACHE_MB=0, GEMINI_API_KEY="bench-key", GEMINI_API_URL=url)
+    tuning.PROFILE_FILE = os.path.join(folder, "delay_profile.json")
+    tool = main.GeminiDesktopTool(backend=FakeBackend())
+    tool._components["response_cache"] = cache = ResponseCache(path=os.path.join(folder, "responses.db"))
+
+    rng = random.Random(1)
+    prompts = [f"Summarize this\n\nReport {i}: " + "all systems nominal " * 30 for i in range(args.distinct)]
+    miss, hit = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.sends):
+            before = cache.hits
+            elapsed = send(tool, variant(rng.choice(prompts), rng))
+            (hit if cache.hits > before else miss).append(elapsed)
+        requests = server.state.requests
+        send(tool, prompts[0], use_cache=False)
+        bypassed = server.state.requests - requests
+
+    print(f"{args.sends} API sends over {args.distinct} distinct prompts, stub latency {args.latency * 1000:.0f}ms")
+    print(f"  miss  n={len(miss):<4} p50 {percentile(miss, 50):7.1f}ms  p95 {percentile(miss, 95):7.1f}ms")
+    print(f"  hit   n={len(hit):<4} p50 {percentile(hit, 50):7.1f}ms  p95 {percentile(hit, 95):7.1f}ms")
+    print(f"  hit rate {len(hit) / args.sends:.0%}, {server.state.requests} API requests; "
+          f"bypass sent {bypassed} request(s)")
+
+    # Raw cache operations at the default entry cap
+    store = ResponseCache(path=os.path.join(folder, "ops.db"))
+    answer = "An answer of a few paragraphs. " * 60
+    keys = [response_key(f"prompt {i}") for i in range(2000)]
+    start = time.perf_counter()
+    for key in keys:
+        store.put(key, answer)
+    put_us = (time.perf_counter() - start) / len(keys) * 1e6
+    start = time.perf_counter()
+    for key in keys:
+        store.get(key)
+    get_us = (time.perf_counter() - start) / len(keys) * 1e6
+    print(f"  {len(store)} entries: put {put_us:.0f}us, get {get_us:.0f}us")
+
+    # LRU under the size cap, and TTL expiry
+    clock = FakeClock()
+    small = ResponseCache(path=os.path.join(folder, "small.db"), max_bytes=10 * len(answer), ttl=3600, clock=clock)
+    for i in range(10):
+        clock.now += 1
+        small.put(f"k{i}", answer)
+    clock.now += 1
+    small.get("k0")  # Recently used: survives the next insert
+    small.put("k10", answer)
+    lru_ok = small.get("k0") is not None and small.get("k1") is None and len(small) == 10
+    clock.now += 3601
+    ttl_ok = small.get("k10") is None and small.expired == 1
+    print(f"  LRU eviction under the size cap: {'ok' if lru_ok else 'FAILED'}; "
+          f"TTL expiry: {'ok' if ttl_ok else 'FAILED'}")
+    server.shutdown()
+    if not (lru_ok and ttl_ok and bypassed == 1 and hit):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_()
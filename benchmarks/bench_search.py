@@ -0,0 +1,116 @@
+"""
+Benchmark: type-ahead search latency over a large instruction history.
+
+    python benchmarks/bench_search.py [--entries 50000]
+
+Builds the index from synthetic entries, then times typed queries
+(every prefix of each query, as the popup issues them) and incremental adds.
+Then attaches an index to a history that gets new entries while the index
+is being built, and checks that none of them is missed.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import HistorySearchIndex
+
+VERBS = ["summarize", "translate", "explain", "rewrite", "review", "fix", "shorten", "analyze", "outline", "critique"]
+OBJECTS = ["this email", "the code", "the error", "this paragraph", "the table", "my notes", "the diff", "this article"]
+STYLES = ["briefly", "in French", "as bullet points", "for a child", "formally", "in detail", "with examples"]
+QUERIES = ["summ", "translate the", "expln", "bullet", "review the code", "fix error", "in detail examples", "zzzz"]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def make_entries(n, seed=1):
+    rng = random.Random(seed)
+    now = datetime.now()
+    entries = []
+    for i in range(n):
+        text = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(STYLES)} #{i}"
+        stamp = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        entries.append({'instruction': text, 'timestamp': stamp.isoformat(), 'count': rng.randint(1, 20)})
+    return entries
+
+
+class GrowingHistory:
+    """Just enough of HistoryManager for attach(): entries, subscribe and add."""
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.listeners = []
+
+    @property
+    def history(self):
+        return list(self.entries)
+
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def add(self, entry):
+        self.entries.insert(0, entry)
+        for callback in self.listeners:
+            callback("add", entry)
+
+
+def attach_while_adding(entries, added):
+    history = GrowingHistory(entries)
+    index = HistorySearchIndex()
+    thread = threading.Thread(target=index.attach, args=(history,))
+    thread.start()
+    for entry in added:
+        history.add(entry)
+        time.sleep(0.001)
+    thread.join()
+    return sum(entry['instruction'] in index._docs for entry in added)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50000)
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries)
+    index = HistorySearchIndex()
+    start = time.perf_counter()
+    index.rebuild(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    samples = []
+    for query in QUERIES:
+        for end in range(2, len(query) + 1):
+            start = time.perf_counter()
+            index.search(query[:end])
+            samples.append((time.perf_counter() - start) * 1000)
+
+    adds = []
+    for entry in make_entries(200, seed=2):
+        start = time.perf_counter()
+        index.add(entry)
+        adds.append((time.perf_counter() - start) * 1000)
+
+    print(f"entries: {args.entries}, index build: {build_ms:.0f}ms")
+    print(f"query  p50 {statistics.median(samples):.2f}ms  p95 {percentile(samples, 95):.2f}ms  ({len(samples)} queries)")
+    print(f"add    p50 {statistics.median(adds):.3f}ms  p95 {percentile(adds, 95):.3f}ms")
+    for query in QUERIES[:3]:
+        print(f"  {query!r}: {index.search(query)[:3]}")
+
+    added = [dict(entry, instruction=f"added while building {i}") for i, entry in enumerate(make_entries(200, 3))]
+    indexed = attach_while_adding(entries, added)
+    print(f"attach during adds: {indexed}/{len(added)} new entries indexed")
+    if indexed != len(added):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: cold start of the tray process with stubbed platform modules.
+
+    python benchmarks/bench_startup.py [--runs 5] [--stub-cost-ms 0]
+
+Each run starts a fresh interpreter with -X importtime, imports main,
+constructs the tool and calls start() (hotkeys + tray) against stub
+keyboard/pystray/pywin32/pyautogui/uiautomation modules, so it runs
+headless in CI. Reports time-to-hotkey-ready, background warm-up time,
+which heavy modules were still deferred at hotkey-ready, and the
+slowest imports. --stub-cost-ms makes each stub import sleep, to
+approximate the real cost of the platform packages.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from platform_stubs import install_stubs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should not be on the critical path
+HEAVY_MODULES = ["tkinter", "PIL", "pyautogui", "pyperclip", "uiautomation", "win32gui",
+                 "http.client", "popup", "backends", "imageprep", "gemini_api", "history", "search"]
+
+
+def child(cost):
+    """One cold start; prints a JSON result line."""
+    install_stubs(cost)
+    sys.path.insert(0, ROOT)
+    folder = tempfile.mkdtemp(prefix="bench_startup_")
+
+    start = time.perf_counter()
+    import main
+    import_ms = (time.perf_counter() - start) * 1000
+
+    # Setup outside the measured path: fake automation backend, throwaway history and cache
+    import history
+    import imagecache
+    from backends import FakeBackend
+    history.HISTORY_FILE = os.path.join(folder, "history.jsonl")
+    history.LEGACY_HISTORY_FILE = os.path.join(folder, "history.json")
+    imagecache.CACHE_DIR = os.path.join(folder, "cache")
+    preloaded = {name for name in HEAVY_MODULES if name in sys.modules}
+    backend = FakeBackend()
+
+    start = time.perf_counter()
+    tool = main.GeminiDesktopTool(backend=backend)
+    tool.start()
+    start_ms = (time.perf_counter() - start) * 1000
+    # Modules the harness itself imported above are left out of the report
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules and name not in preloaded]
+    deferred = [name for name in HEAVY_MODULES if name not in sys.modules]
+
+    tool._warm_thread.join(timeout=30)
+    print(json.dumps({
+        "import_ms": import_ms,
+        "start_ms": start_ms,
+        "ready_ms": import_ms + start_ms,
+        "warm_ms": tool.warmed_up_ms,
+        "loaded_at_ready": loaded,
+        "deferred_at_ready": deferred,
+    }))
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def parse_importtime(stderr):
+    """Return {module: self_us} from -X importtime output."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        times[name] = max(times.get(name, 0), int(self_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--stub-cost-ms", type=float, default=0.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.stub_cost_ms / 1000)
+        return
+
+    results, imports = [], {}
+    for _ in range(args.runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child",
+             "--stub-cost-ms", str(args.stub_cost_ms)],
+            capture_output=True, text=True, cwd=ROOT, timeout=120)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(proc.stdout + proc.stderr[-2000:])
+            sys.exit(1)
+        results.append(json.loads(lines[-1]))
+        for name, us in parse_importtime(proc.stderr).items():
+            imports.setdefault(name, []).append(us)
+
+    def median(key):
+        return statistics.median(r[key] for r in results)
+
+    print(f"runs: {args.runs}, stub import cost: {args.stub_cost_ms:.0f}ms")
+    print(f"  import main           {median('import_ms'):8.1f}ms")
+    print(f"  construct + start()   {median('start_ms'):8.1f}ms")
+    print(f"  time to hotkey-ready  {median('ready_ms'):8.1f}ms")
+    print(f"  background warm-up    {median('warm_ms'):8.1f}ms")
+    print(f"  loaded before ready:  {', '.join(results[-1]['loaded_at_ready']) or '-'}")
+    print(f"  deferred:             {', '.join(results[-1]['deferred_at_ready']) or '-'}")
+    print("slowest imports (self time, median):")
+    top = sorted(imports.items(), key=lambda kv: statistics.median(kv[1]), reverse=True)[:10]
+    for name, samples in top:
+        print(f"  {name:<32}{statistics.median(samples) / 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: window scans per send, old full-scan lookups vs the cached tracker.
+
+    python benchmarks/bench_windows.py [--windows 40] [--sends 20]
+
+Runs reuse sends (find the Gemini window) and new-page sends (snapshot,
+open the page, wait for the window) against a fake window manager with
+many unrelated windows, on a virtual clock. Counts full scans
+(EnumWindows) and title reads per send, and the virtual time until the
+new window was detected.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import FakeBackend
+from readiness import ReadinessEngine
+
+
+class LegacyReadiness(ReadinessEngine):
+    """The pre-tracker lookups: a full scan per lookup and per poll."""
+
+    def find_window(self):
+        for hwnd in self.backend.list_windows():
+            if self.matches(self.backend.get_title(hwnd)):
+                return hwnd
+        return None
+
+    def wait_for_window(self, timeout, baseline=None):
+        backend = self.backend
+        baseline = baseline or {}
+        start = backend.monotonic()
+        transitioned = set()
+
+        def condition():
+            stale = None
+            for hwnd in backend.list_windows():
+                title = backend.get_title(hwnd)
+                if not self.matches(title):
+                    if hwnd in baseline:
+                        transitioned.add(hwnd)
+                    continue
+                if hwnd not in baseline or hwnd in transitioned or title != baseline[hwnd]:
+                    return hwnd
+                stale = hwnd
+            if stale and backend.monotonic() - start >= self.stale_grace \
+                    and backend.get_foreground() == stale:
+                return stale
+            return None
+
+        return self._wait(condition, timeout)
+
+
+def make_backend(n_windows, events):
+    backend = FakeBackend(load_latency=1.0, title_latency=0.3)
+    backend.supports_window_events = events
+    for i in range(n_windows):
+        backend.add_window(f"Document {i} - Editor")
+    backend.add_window("Google Gemini - Fake Browser")
+    return backend
+
+
+def run(mode, n_windows, sends):
+    backend = make_backend(n_windows, events=(mode == "tracker+events"))
+    engine_cls = LegacyReadiness if mode == "legacy" else ReadinessEngine
+    engine = engine_cls(backend, window_events=(mode == "tracker+events"))
+
+    def measure(send):
+        scans, reads = backend.scans, backend.title_reads
+        result = send()
+        return backend.scans - scans, backend.title_reads - reads, result
+
+    reuse = [measure(engine.find_window) for _ in range(sends)]
+
+    def new_page():
+        baseline = engine.snapshot()
+        start = backend.monotonic()
+        backend.open_url("https://gemini.google.com/app")
+        hwnd = engine.wait_for_window(15.0, baseline=baseline)
+        return backend.monotonic() - start if hwnd else None
+
+    fresh = [measure(new_page) for _ in range(max(1, sends // 4))]
+    return reuse, fresh
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--windows", type=int, default=40, help="unrelated top-level windows")
+    parser.add_argument("--sends", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.windows} other windows, {args.sends} reuse sends")
+    print(f"{'mode':<16}{'reuse scans':>12}{'reuse reads':>12}{'new scans':>11}{'new reads':>11}{'detect (s)':>12}")
+    for mode in ("legacy", "tracker", "tracker+events"):
+        with contextlib.redirect_stdout(io.StringIO()):
+            reuse, fresh = run(mode, args.windows, args.sends)
+        detect = [r for _, _, r in fresh if r is not None]
+        print(f"{mode:<16}"
+              f"{sum(s for s, _, _ in reuse) / len(reuse):>12.2f}{sum(r for _, r, _ in reuse) / len(reuse):>12.1f}"
+              f"{sum(s for s, _, _ in fresh) / len(fresh):>11.1f}{sum(r for _, r, _ in fresh) / len(fresh):>11.1f}"
+              f"{(sum(detect) / len(detect)) if detect else float('nan'):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
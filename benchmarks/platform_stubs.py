@@ -0,0 +1,77 @@
+"""
+Stand-ins for the Windows-only packages main.py imports, so benchmarks can
+import it headless. Used only by scripts in this folder.
+"""
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import sys
+import time
+import types
+
+PLATFORM_MODULES = ["keyboard", "pystray", "pyautogui", "pyperclip", "uiautomation", "pythoncom",
+                    "win32clipboard", "win32gui", "win32con", "win32process"]
+# Stubbed only when the real package isn't installed
+OPTIONAL_MODULES = ["PIL"]
+
+
+class _Anything:
+    """Accepts any call or attribute access; stands in for platform APIs."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __getattr__(self, name):
+        return _Anything()
+
+    def __iter__(self):
+        return iter(())
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Anything()
+
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self, names, cost):
+        self.names = set(names)
+        self.cost = cost
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split(".")[0] in self.names:
+            return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        return _StubModule(spec.name)
+
+    def exec_module(self, module):
+        module.__path__ = []
+        time.sleep(self.cost)
+
+
+def _importable(name):
+    # e.g. keyboard is installed on Linux but refuses to import without root
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def install_stubs(cost=0.0, only_missing=False):
+    """
+    Serve stub modules for the platform packages. With only_missing, real
+    packages that are installed are used instead. cost (seconds) is slept
+    on each stub import to mimic a heavy package.
+    """
+    names = [name for name in PLATFORM_MODULES if not (only_missing and _importable(name))]
+    # find_spec doesn't import, so startup timings still include the real package
+    names += [name for name in OPTIONAL_MODULES if importlib.util.find_spec(name) is None]
+    sys.meta_path.insert(0, _StubFinder(names, cost))
@@ -0,0 +1,117 @@
+"""
+Local stub of the Gemini streamGenerateContent endpoint.
+
+    python benchmarks/stub_gemini_server.py --port 8765 [--latency 0.05] [--fail-every 0]
+
+Point the tool at it with "gemini_api_url": "http://127.0.0.1:8765" in
+config.json. The reply echoes the prompt back word by word as SSE events.
+Other benchmarks start it in-process with start_stub_server().
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    """Counters and knobs shared by all handler threads."""
+
+    def __init__(self, latency=0.0, chunk_delay=0.0, fail_every=0, words_per_chunk=4):
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.fail_every = fail_every
+        self.words_per_chunk = words_per_chunk
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client pooling is observable
+
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        state = self.server.state
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with state.lock:
+            state.requests += 1
+            count = state.requests
+
+        if ":streamGenerateContent" not in self.path and ":generateContent" not in self.path:
+            self.send_error(404)
+            return
+        if not self.headers.get("x-goog-api-key"):
+            self._reply_json(403, {"error": {"message": "API key missing"}})
+            return
+        if state.fail_every and count % state.fail_every == 0:
+            self._reply_json(503, {"error": {"message": "stub overloaded"}})
+            return
+
+        time.sleep(state.latency)
+        parts = body.get("contents", [{}])[0].get("parts", [])
+        prompt = " ".join(p.get("text", "") for p in parts if "text" in p)
+        images = sum(1 for p in parts if "inline_data" in p)
+        words = f"Echo ({images} image(s)): {prompt}".split()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = state.words_per_chunk
+        for i in range(0, len(words), step):
+            text = " ".join(words[i:i + step]) + " "
+            event = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+            self._send_chunk(f"data: {json.dumps(event)}\r\n\r\n".encode())
+            time.sleep(state.chunk_delay)
+        self._send_chunk(b"")
+
+    def _reply_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stub_server(port=0, **options):
+    """Start the stub in a daemon thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini API stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before the first chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="seconds between chunks")
+    parser.add_argument("--fail-every", type=int, default=0, help="answer every Nth request with 503")
+    args = parser.parse_args()
+    server, url = start_stub_server(args.port, latency=args.latency,
+                                    chunk_delay=args.chunk_delay, fail_every=args.fail_every)
+    print(f"Stub Gemini API listening on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Selected-text capture for Gemini Desktop Tool.
+Sends ctrl+c and waits for the clipboard sequence number to change instead
+of sleeping a fixed time, reads the text and image the copy produced, then
+puts the user's previous clipboard back.
+"""
+from readiness import wait_until
+
+
+class TextCapture:
+    """
+    Copies the current selection through the backend's clipboard.
+    The wait for the copy adapts to how fast copies have completed so far,
+    so an empty selection (no clipboard change) costs little; each wait that
+    sees no copy doubles the estimate, so a slower app is caught again.
+    """
+
+    def __init__(self, backend, min_timeout=0.15, max_timeout=1.0, release_timeout=0.6,
+                 initial_delay=0.005, max_delay=0.03):
+        self.backend = backend
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        # Cap on waiting for the hotkey's modifiers to be released before ctrl+c
+        self.release_timeout = release_timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.latency = None  # Smoothed copy latency (seconds)
+        self._captures = 0  # Lets a late restore see that a newer capture has started
+        self.last_ms = None
+
+    def timeout(self):
+        """How long to wait for the copy: a few times the typical latency, within bounds."""
+        if self.latency is None:
+            return self.max_timeout
+        return max(self.min_timeout, min(self.max_timeout, self.latency * 4 + 0.05))
+
+    def _wait(self, condition, timeout):
+        backend = self.backend
+        return wait_until(condition, timeout, backend.monotonic, backend.sleep,
+                          initial_delay=self.initial_delay, max_delay=self.max_delay)
+
+    def _record(self, seconds):
+        self.latency = seconds if self.latency is None else 0.7 * self.latency + 0.3 * seconds
+
+    def _widen(self):
+        """No copy within the timeout: the app may just be slower than the estimate."""
+        if self.latency is not None:
+            self.latency = min(self.max_timeout, self.latency * 2)
+
+    def _restore_late(self, saved, sequence, capture_id):
+        """Put the user's clipboard back if a missed copy has landed since (and no capture followed)."""
+        backend = self.backend
+        if capture_id != self._captures:
+            return
+        try:
+            if backend.clipboard_sequence() != sequence:
+                backend.restore_clipboard(saved)
+        except Exception as e:
+            print(f"  Could not restore clipboard: {e}")
+
+    def capture(self):
+        """
+        Return (text, image) copied from the selection: "" and None if nothing
+        was copied, so an image left on the clipboard earlier isn't picked up.
+        """
+        backend = self.backend
+        self._captures += 1
+        capture_id = self._captures
+        start = backend.monotonic()
+        # Ctrl/Alt from the hotkey would turn ctrl+c into another shortcut
+        self._wait(lambda: not backend.modifiers_pressed(), self.release_timeout)
+
+        try:
+            saved = backend.save_clipboard()
+        except Exception as e:
+            print(f"  Could not save clipboard: {e}")
+            saved = None
+        sequence = backend.clipboard_sequence()
+        sent_at = backend.monotonic()
+        backend.send_keys('ctrl+c')
+        changed = self._wait(lambda: backend.clipboard_sequence() != sequence, self.timeout())
+
+        text, image = "", None
+        try:
+            if changed:
+                self._record(backend.monotonic() - sent_at)
+                text = backend.get_clipboard_text()
+                try:
+                    image = backend.get_clipboard_image()
+                except Exception as e:
+                    print(f"  Could not read copied image: {e}")
+            else:
+                self._widen()
+                if saved is not None:
+                    # A copy slower than the timeout would still replace the user's clipboard
+                    backend.call_later(self.max_timeout, lambda: self._restore_late(saved, sequence, capture_id))
+        finally:
+            # Only now that the copy has been read; also undoes a copy that landed after the timeout
+            if saved is not None and backend.clipboard_sequence() != sequence:
+                try:
+                    backend.restore_clipboard(saved)
+                except Exception as e:
+                    print(f"  Could not restore clipboard: {e}")
+        self.last_ms = (backend.monotonic() - start) * 1000
+        return text, image
@@ -0,0 +1,93 @@
+"""
+Command-line client for a running Gemini Desktop Tool.
+
+    python cli.py send "Summarize this" [--content TEXT | --content-file PATH|-]
+                       [--image PATH ...] [--backend browser|api] [--new-page] [--no-cache]
+                       [--targets N] [--wait]
+    python cli.py status JOB_ID [--wait]
+    python cli.py cancel JOB_ID
+    python cli.py ping
+
+Jobs run in the already-started tray process (queued behind any send in
+progress), so nothing here imports the tool itself. Prints the job id
+and status; exits 1 if the request or the job failed and 2 if the tool
+isn't running.
+"""
+import argparse
+import json
+import os
+import sys
+
+import ipc
+
+
+def build_request(args):
+    if args.command == "send":
+        content = args.content or ""
+        if args.content_file == "-":
+            content = sys.stdin.read()
+        elif args.content_file:
+            with open(args.content_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+        request = {"op": "submit", "instruction": args.instruction, "content": content,
+                   # The tray process has its own working directory
+                   "images": [os.path.abspath(path) for path in args.image],
+                   "backend": args.backend, "bypass_cache": args.no_cache, "targets": args.targets,
+                   "wait": args.wait, "timeout": args.timeout}
+        if args.new_page:
+            request["reuse"] = False
+        return request
+    if args.command == "status":
+        return {"op": "status", "job": args.job, "wait": args.wait, "timeout": args.timeout}
+    if args.command == "cancel":
+        return {"op": "cancel", "job": args.job}
+    return {"op": "ping"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print the raw reply")
+    parser.add_argument("--info", help="connection file of the instance (default: ipc.json in the per-user app data folder)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    send = commands.add_parser("send", help="queue a prompt")
+    send.add_argument("instruction")
+    send.add_argument("--content", help="text sent below the instruction")
+    send.add_argument("--content-file", help="read the content from a file ('-' for stdin)")
+    send.add_argument("--image", action="append", default=[], help="attach an image file (repeatable)")
+    send.add_argument("--backend", choices=("browser", "api"), help="default: the tray's current choice")
+    send.add_argument("--new-page", action="store_true", help="open a new Gemini page instead of reusing one")
+    send.add_argument("--no-cache", action="store_true", help="ask the API even if the answer is cached")
+    send.add_argument("--targets", type=int, help="send to this many Gemini windows or API sessions at once")
+    send.add_argument("--wait", action="store_true", help="return once the job has finished")
+    send.add_argument("--timeout", type=float, help="with --wait, give up after this many seconds")
+    status = commands.add_parser("status", help="show a job's status")
+    status.add_argument("job", type=int)
+    status.add_argument("--wait", action="store_true")
+    status.add_argument("--timeout", type=float)
+    cancel = commands.add_parser("cancel", help="cancel a queued or running job")
+    cancel.add_argument("job", type=int)
+    commands.add_parser("ping", help="check that the tray process is running")
+    args = parser.parse_args(argv)
+
+    try:
+        reply = ipc.request(build_request(args), info_path=args.info)
+    except Exception as e:
+        print(f"Gemini Desktop Tool is not reachable: {e}", file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(reply))
+    elif not reply.get("ok"):
+        print(f"Error: {reply.get('error')}", file=sys.stderr)
+    elif "job" in reply:
+        print(f"job {reply['job']}: {reply['status']}" + (f" ({reply['error']})" if reply.get("error") else ""))
+        for entry in reply.get("result") or []:
+            print(f"  target {entry['target']}: " + (f"failed ({entry['error']})" if entry.get("error")
+                                                     else f"done after {entry['seconds']:.2f}s"))
+    else:
+        print(f"running (pid {reply['pid']})" if "pid" in reply else "ok")
+    failed = not reply.get("ok") or (args.command != "cancel" and reply.get("status") in ("failed", "cancelled"))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
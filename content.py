@@ -0,0 +1,70 @@
+"""
+Large captured text for Gemini Desktop Tool.
+Selections beyond a size threshold are kept out of the Tk text widget:
+the popup shows a bounded preview while the full text stays in a side
+buffer and is sent as a file attachment or in chunks, not one giant paste.
+"""
+CHARS_PER_TOKEN = 4  # Rough average for English text and code
+PREVIEW_HEAD = 20000
+PREVIEW_TAIL = 2000
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def format_size(n_bytes):
+    for unit in ("B", "KB", "MB"):
+        if n_bytes < 1024 or unit == "MB":
+            return f"{n_bytes:.0f} {unit}" if unit == "B" else f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024
+
+
+def format_tokens(n):
+    if n >= 1_000_000:
+        return f"{n / 1_000_000:.1f}M"
+    if n >= 1000:
+        return f"{n / 1000:.0f}k"
+    return str(n)
+
+
+def split_chunks(text, size):
+    """Split text into pieces of at most size chars, preferring line breaks."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+class LargeContent:
+    """Full text of an oversized selection plus what the popup displays."""
+
+    def __init__(self, text, head=PREVIEW_HEAD, tail=PREVIEW_TAIL):
+        self.text = text
+        self.size = len(text.encode("utf-8", errors="replace"))
+        self.tokens = estimate_tokens(text)
+        self.head = head
+        self.tail = tail
+
+    def __len__(self):
+        return len(self.text)
+
+    def summary(self):
+        return f"{format_size(self.size)} · ~{format_tokens(self.tokens)} tokens"
+
+    def preview(self):
+        """A bounded excerpt: the start and end of the text with a marker between."""
+        text = self.text
+        if len(text) <= self.head + self.tail:
+            return text
+        hidden = len(text) - self.head - self.tail
+        return (f"{text[:self.head]}\n\n"
+                f"[... {hidden:,} more characters not shown; the full text will be sent ...]\n\n"
+                f"{text[-self.tail:]}")
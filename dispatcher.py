@@ -0,0 +1,108 @@
+"""
+Event dispatcher for Gemini Desktop Tool.
+Hotkey, tray and exit callbacks post typed events to a thread-safe queue;
+the main thread blocks on that queue instead of polling flags.
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+from enum import Enum
+
+
+class EventType(Enum):
+    SHOW_POPUP = "show_popup"
+    SHOW_RESULT = "show_result"
+    EXIT = "exit"
+
+
+Event = namedtuple("Event", ["type", "payload", "posted_at"])
+
+
+class EventDispatcher:
+    """
+    Blocking event loop with explicit coalescing.
+    A coalesced event type is dropped while another event of the same type
+    is queued or being handled, so repeated hotkey presses open one popup.
+    """
+
+    def __init__(self, coalesce=(EventType.SHOW_POPUP,)):
+        self._queue = queue.Queue()
+        self._handlers = {}
+        self._coalesce = set(coalesce)
+        self._pending = set()
+        self._active = set()
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._stopped = threading.Event()
+
+    def on(self, event_type, handler):
+        """Register the handler for an event type (one handler per type)."""
+        self._handlers[event_type] = handler
+
+    def set_wakeup(self, callback):
+        """
+        Set a callback run after each post. A UI event loop that temporarily
+        owns the main thread uses it to call dispatch_pending().
+        """
+        self._wakeup = callback
+
+    @property
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def post(self, event_type, payload=None):
+        """Queue an event. Safe to call from any thread. Returns False if coalesced."""
+        with self._lock:
+            if self._stopped.is_set():
+                return False
+            if event_type in self._coalesce:
+                if event_type in self._pending or event_type in self._active:
+                    print(f"  Coalesced {event_type.value} event")
+                    return False
+                self._pending.add(event_type)
+        self._queue.put(Event(event_type, payload, time.perf_counter()))
+        wakeup = self._wakeup
+        if wakeup:
+            try:
+                wakeup()
+            except Exception as e:
+                print(f"  Dispatcher wakeup failed: {e}")
+        return True
+
+    def stop(self):
+        """Request a deterministic shutdown of run()."""
+        self.post(EventType.EXIT)
+
+    def _dispatch(self, event):
+        with self._lock:
+            self._pending.discard(event.type)
+            self._active.add(event.type)
+        try:
+            handler = self._handlers.get(event.type)
+            if handler:
+                handler(event)
+        except Exception as e:
+            print(f"Handler Error ({event.type.value}): {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            with self._lock:
+                self._active.discard(event.type)
+        if event.type is EventType.EXIT:
+            self._stopped.set()
+
+    def dispatch_pending(self):
+        """Dispatch queued events without blocking (for use inside a UI loop)."""
+        while not self._stopped.is_set():
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._dispatch(event)
+
+    def run(self):
+        """Block on the queue and dispatch events until EXIT is handled."""
+        while not self._stopped.is_set():
+            event = self._queue.get()
+            self._dispatch(event)
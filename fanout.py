@@ -0,0 +1,330 @@
+"""
+Multi-window fan-out for Gemini Desktop Tool.
+One prompt is sent to several Gemini windows: the payload (text, staged
+attachment and image files) is built once, the pages that have to be
+opened load side by side, and while one window takes in a paste the next
+is focused and pasted into. The clipboard is only rewritten when the part
+being pasted changes, so each part is usually written once for all
+targets rather than once per window.
+"""
+from content import split_chunks
+
+TEXT_SETTLE = 0.8  # Same pause run_automation leaves after pasting text
+SEND = "send"  # Last step of every target
+# A running browser shows a window asked for within this (seconds); the page may take longer
+WINDOW_GRACE = 3.0
+
+
+class Part:
+    """One clipboard paste ("text", "files" or "image") and how long the page needs to take it in."""
+
+    def __init__(self, kind, data, settle, fallback=None):
+        self.kind = kind
+        self.data = data
+        self.settle = settle
+        # Pasted instead if the clipboard refuses this part (file lists)
+        self.fallback = fallback or []
+
+    def write(self, backend):
+        if self.kind == "text":
+            backend.set_clipboard_text(self.data)
+        elif self.kind == "files":
+            backend.set_clipboard_files(self.data)
+        else:
+            backend.set_clipboard_image(self.data)
+
+    def __repr__(self):
+        return f"<Part {self.kind}>"
+
+
+def build_parts(paster, text="", attachment="", prepared=(), attach_mode="file", chunk_chars=20000,
+                chunk_settle=0.3):
+    """
+    Stage the payload once, in paste order: the typed text, then the attachment
+    and images as one file list. Without file staging the attachment goes in
+    text chunks and the images one at a time, as ImagePaster does.
+    """
+    parts = [Part("text", text, TEXT_SETTLE)] if text else []
+    chunks = [Part("text", piece, chunk_settle) for piece in split_chunks(attachment, chunk_chars)] if attachment else []
+    singles = [Part("image", item, paster.settle) for item in prepared]
+    files, fallback, rest = [], [], []
+    if attachment and attach_mode == "file":
+        try:
+            files.append(paster.stage_text(attachment))
+            fallback += chunks
+        except Exception as e:
+            print(f"  Staging text attachment failed ({e}), pasting in chunks")
+            parts += chunks
+    elif attachment:
+        parts += chunks
+    if prepared and paster.strategy == "batch":
+        try:
+            files += paster.stage_files(prepared)
+            fallback += singles
+        except Exception as e:
+            print(f"  Batch staging failed ({e}), pasting images one by one")
+            rest = singles
+    elif prepared:
+        rest = singles
+    if files:
+        settle = paster.settle + paster.batch_settle_per_image * (len(files) - 1)
+        parts.append(Part("files", files, settle, fallback))
+    return parts + rest
+
+
+def report_rows(report, label="Target"):
+    """One console line per target of a fan-out report."""
+    rows = []
+    for entry in report:
+        if entry.get("error"):
+            rows.append(f"  {label} {entry['target']}: failed ({entry['error']})")
+            continue
+        row = f"  {label} {entry['target']}: done after {entry['seconds']:.2f}s"
+        if entry.get("first_chunk") is not None:
+            row += f" (first chunk after {entry['first_chunk']:.2f}s)"
+        if entry.get("title"):
+            row += f" - {entry['title'][:50]}"
+        rows.append(row)
+    return rows
+
+
+class FanoutTarget:
+    """One window of a fan-out; times are on the backend's clock."""
+
+    def __init__(self, index, hwnd=None, title="", opened=False):
+        self.index = index
+        self.hwnd = hwnd
+        self.title = title
+        self.opened = opened  # A page opened for this fan-out rather than an existing window
+        self.steps = []  # Parts still to paste, then SEND
+        self.visits = 0
+        self.found_at = None
+        self.settled_at = 0.0  # When its last paste has been taken in
+        self.sent_at = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self.sent_at is not None or self.error is not None
+
+    def report(self, start):
+        return {"target": self.index, "title": self.title,
+                "seconds": None if self.sent_at is None else round(self.sent_at - start, 3),
+                "error": self.error}
+
+
+class FanoutDispatcher:
+    """
+    Pastes one payload into several Gemini windows and sends it, as a loop
+    that always does whatever is possible now: send to a window whose pastes
+    have been taken in, paste the part on the clipboard into the next window
+    that needs it, put the next part on the clipboard once every earlier
+    paste was taken in, or pick up a page that finished loading.
+    """
+
+    def __init__(self, backend, readiness, url, focus_timeout=1.5, new_focus_timeout=6.0,
+                 ready_timeout=15.0, waiter=None):
+        self.backend = backend
+        self.readiness = readiness
+        self.url = url
+        self.focus_timeout = focus_timeout
+        self.new_focus_timeout = new_focus_timeout
+        self.ready_timeout = ready_timeout
+        # waiter(step, ceiling, wait) runs wait(timeout); the tool passes its tuned waits
+        self.waiter = waiter or (lambda step, ceiling, wait: wait(ceiling))
+        self.clipboard_writes = 0
+        self._clip = None  # Part on the clipboard
+        self._clip_seq = None
+        self._free_at = 0.0  # The clipboard may change once every paste so far was taken in
+        self._next_scan = 0.0
+        self._focused = None  # Window whose input box was clicked last, if still in front since
+        self._before = set()  # Top-level windows before any page was opened
+        self._new_windows = {}  # hwnd -> when first seen, whatever its title
+
+    def dispatch(self, parts, count, reuse=True, check=None):
+        """
+        Paste parts into count windows and send: open Gemini windows first (with
+        reuse), then pages opened for the rest. Returns one report entry per
+        target, with the seconds from the start until its send.
+        """
+        backend = self.backend
+        start = backend.monotonic()
+        baseline = self.readiness.snapshot()
+        self._before, self._new_windows = set(backend.list_windows()), {}
+        last_used = self.readiness.tracker.hwnd
+        existing = sorted(baseline, key=lambda hwnd: hwnd != last_used) if reuse else []
+        targets = [FanoutTarget(i + 1, hwnd, baseline[hwnd]) for i, hwnd in enumerate(existing[:count])]
+        for target in targets:
+            target.found_at = start
+            print(f"  Target {target.index}: {target.title[:50]}")
+        missing = count - len(targets)
+        if missing:
+            # Browsers open a plain URL as a tab of the window in front, which would be one target
+            print(f"  Opening {missing} new Gemini window{'s' if missing > 1 else ''}...")
+            opened = 0
+            while opened < missing and backend.open_url(self.url, new_window=True):
+                opened += 1
+            new = [FanoutTarget(len(targets) + 1 + i, opened=True) for i in range(missing)]
+            for target in new[opened:]:
+                target.error = "the default browser can't be asked for a new window; open more Gemini windows first"
+                print(f"  Target {target.index}: {target.error}")
+            targets += new
+        for target in targets:
+            target.steps = list(parts) + [SEND]
+        known = {t.hwnd for t in targets if t.hwnd}
+        self._clip = self._clip_seq = self._focused = None
+        self._free_at = self._next_scan = start
+
+        while True:
+            if check:
+                check()
+            now = backend.monotonic()
+            if any(t.hwnd is None and not t.done for t in targets):
+                self._discover(targets, baseline, known, now, start)
+                self._give_up(targets, bool(baseline), now, start)
+            active = [t for t in targets if not t.done]
+            if not active:
+                break
+            target = self._choose(active, backend.monotonic())
+            if target:
+                self._step(target, start)
+                continue
+            # Nothing to do yet: sleep until a paste settles or it's time to look for pages again
+            ready = [t for t in active if t.hwnd]
+            wake = [t.settled_at for t in ready if t.steps[0] is SEND]
+            if any(t.steps[0] is not SEND for t in ready):
+                wake.append(self._free_at)
+            if any(t.hwnd is None for t in active):
+                wake += [self._next_scan, start + self.ready_timeout, self._window_deadline(bool(baseline), start)]
+            now = backend.monotonic()
+            delay = min(wake) - now if wake else self.readiness.max_delay
+            backend.sleep(min(max(delay, 0.005), self.readiness.max_delay))
+        return [t.report(start) for t in targets]
+
+    def _window_deadline(self, browser_running, start):
+        """
+        When every window asked for should exist, loaded or not: WINDOW_GRACE
+        after asking if a browser was already running (there were Gemini
+        windows), else after the first new window (a cold browser start).
+        """
+        if browser_running:
+            return start + WINDOW_GRACE
+        if self._new_windows:
+            return min(self._new_windows.values()) + WINDOW_GRACE
+        return float("inf")
+
+    def _give_up(self, targets, browser_running, now, start):
+        """
+        Fail the targets still loading that can't be served any more: all of
+        them after ready_timeout, and once the requested windows should exist,
+        those beyond the new windows that may still turn into Gemini pages
+        (the browser put their pages in tabs instead).
+        """
+        loading = [t for t in targets if t.hwnd is None and not t.done]
+        if now - start >= self.ready_timeout:
+            failed, error = loading, f"page did not load within {self.ready_timeout:.0f}s"
+        elif now >= self._window_deadline(browser_running, start):
+            unused = len(self._new_windows) - sum(1 for t in targets if t.opened and t.hwnd)
+            failed = loading[max(unused, 0):]
+            error = "no window of its own appeared (the browser opened the page as a tab)"
+        else:
+            return
+        for target in failed:
+            target.error = error
+            print(f"  Target {target.index}: {target.error}")
+
+    def _discover(self, targets, baseline, known, now, start):
+        """Match windows that appeared (or turned into Gemini pages) to targets still loading."""
+        tracker = self.readiness.tracker
+        if now < self._next_scan and not (tracker.subscribed and tracker.changed()):
+            return
+        self._next_scan = now + self.readiness.scan_interval
+        loading = [t for t in targets if t.hwnd is None and not t.done]
+        for hwnd in self.backend.list_windows():
+            if hwnd not in self._before:
+                self._new_windows.setdefault(hwnd, now)
+            if hwnd in known or not loading:
+                continue
+            title = self.backend.get_title(hwnd)
+            if not self.readiness.matches(title) or baseline.get(hwnd) == title:
+                continue
+            known.add(hwnd)
+            target = loading.pop(0)
+            target.hwnd, target.title, target.found_at = hwnd, title, now
+            print(f"  Target {target.index} loaded after {now - start:.2f}s: {title[:50]}")
+
+    def _choose(self, active, now):
+        """The target to act on now, or None if everything has to wait."""
+        ready = [t for t in active if t.hwnd]
+        due = [t for t in ready if t.steps[0] is SEND and t.settled_at <= now]
+        if due:
+            return min(due, key=lambda t: t.settled_at)
+        if self._clip is not None and self.backend.clipboard_sequence() != self._clip_seq:
+            self._clip = None  # Someone else wrote the clipboard
+        for target in ready:
+            if target.steps[0] is self._clip:
+                return target
+        if now < self._free_at:
+            return None
+        for target in ready:
+            if target.steps[0] is not SEND:
+                part = target.steps[0]
+                if self._write(part, active):
+                    return target
+                return self._choose(active, now)  # Replaced by its fallback parts
+        return None
+
+    def _write(self, part, active):
+        """Put part on the clipboard; if refused, swap in its fallback parts and return False."""
+        try:
+            part.write(self.backend)
+        except Exception as e:
+            if not part.fallback:
+                raise
+            print(f"  Clipboard refused the {part.kind} ({e}), pasting in pieces")
+            for target in active:
+                if part in target.steps:
+                    i = target.steps.index(part)
+                    target.steps[i:i + 1] = part.fallback
+            return False
+        self.clipboard_writes += 1
+        self._clip, self._clip_seq = part, self.backend.clipboard_sequence()
+        return True
+
+    def _step(self, target, start):
+        if not self._focus(target):
+            return
+        backend = self.backend
+        step = target.steps.pop(0)
+        if step is SEND:
+            backend.send_keys('enter')
+            target.sent_at = backend.monotonic()
+            print(f"  Target {target.index}: sent after {target.sent_at - start:.2f}s")
+            return
+        backend.send_keys('ctrl+v')
+        target.settled_at = backend.monotonic() + step.settle
+        self._free_at = max(self._free_at, target.settled_at)
+
+    def _focus(self, target):
+        """Bring the target forward with keyboard focus in its input; False if it was closed."""
+        backend, readiness, hwnd = self.backend, self.readiness, target.hwnd
+        if not backend.is_window(hwnd):
+            target.error = "window closed"
+            print(f"  Target {target.index}: {target.error}")
+            return False
+        # Another window in between may have taken the focus out of the input box
+        if self._focused == hwnd and backend.get_foreground() == hwnd:
+            return True
+        self._focused = None
+        # A page opened for the fan-out gets the longer first-load allowance
+        new = target.opened and not target.visits
+        target.visits += 1
+        ceiling = self.new_focus_timeout if new else self.focus_timeout
+        self.waiter("page_foreground" if new else "window_focus", ceiling,
+                    lambda t: readiness.wait_for_foreground(hwnd, t))
+        if not self.waiter("input_focus_new" if new else "input_focus_reuse", ceiling,
+                           lambda t: readiness.wait_for_input_focus(hwnd, t)):
+            print(f"  Target {target.index}: input focus not confirmed, pasting anyway")
+        else:
+            self._focused = hwnd
+        return True
@@ -0,0 +1,191 @@
+"""
+Direct Gemini REST API backend for Gemini Desktop Tool.
+Posts the prompt and images to the streamGenerateContent endpoint over a
+pool of persistent HTTP connections and yields the response text as it
+streams in. Transient failures are retried with exponential backoff.
+"""
+import base64
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+DEFAULT_MODEL = "gemini-2.0-flash"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class GeminiApiError(Exception):
+    """The API returned an error that retrying will not fix (or retries ran out)."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class _RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConnectionPool:
+    """Keeps idle keep-alive connections to one host for reuse."""
+
+    def __init__(self, base_url, size=4, timeout=60.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path_prefix = parts.path.rstrip("/")
+        self.size = size
+        self.timeout = timeout
+        self.created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        with self._lock:
+            self.created += 1
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn, reuse=True):
+        """Return a connection whose response was fully read; otherwise close it."""
+        if reuse and self._idle.qsize() < self.size:
+            self._idle.put(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def build_request(text, png_images=()):
+    """Request body with the prompt text followed by inline PNG images."""
+    parts = []
+    if text:
+        parts.append({"text": text})
+    for png in png_images:
+        parts.append({"inline_data": {"mime_type": "image/png",
+                                      "data": base64.b64encode(png).decode("ascii")}})
+    return {"contents": [{"role": "user", "parts": parts}]}
+
+
+def _chunk_text(event):
+    """Extract the text of one streamed GenerateContentResponse."""
+    pieces = []
+    for candidate in event.get("candidates", []):
+        for part in candidate.get("content", {}).get("parts", []):
+            if "text" in part:
+                pieces.append(part["text"])
+    return "".join(pieces)
+
+
+class GeminiApiClient:
+    """Streaming Gemini API client with pooled connections and retry/backoff."""
+
+    def __init__(self, api_key, model=DEFAULT_MODEL, base_url=DEFAULT_BASE_URL, pool_size=4,
+                 timeout=60.0, max_retries=3, backoff=0.5, max_backoff=8.0):
+        self.api_key = api_key
+        self.model = model
+        self.pool = ConnectionPool(base_url, size=pool_size, timeout=timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _path(self):
+        return f"{self.pool.path_prefix}/v1beta/models/{self.model}:streamGenerateContent?alt=sse"
+
+    def stream_generate(self, text, png_images=(), cancelled=None):
+        """
+        Yield response text chunks. Retries only happen before the first chunk,
+        so a retried request never duplicates text that was already yielded.
+        """
+        body = json.dumps(build_request(text, png_images)).encode("utf-8")
+        attempt = 0
+        while True:
+            try:
+                yield from self._stream_once(body, cancelled)
+                return
+            except _RetryableError as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise GeminiApiError(f"Giving up after {attempt} attempts: {e}")
+                delay = e.retry_after or min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                delay *= random.uniform(0.8, 1.2)
+                print(f"  API attempt {attempt} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _stream_once(self, body, cancelled):
+        conn = self.pool.acquire()
+        reuse = False
+        started = False
+        try:
+            try:
+                conn.request("POST", self._path(), body=body, headers={
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream",
+                    "x-goog-api-key": self.api_key,
+                })
+                response = conn.getresponse()
+            except (OSError, http.client.HTTPException) as e:
+                raise _RetryableError(str(e))
+
+            if response.status != 200:
+                detail = response.read().decode("utf-8", "replace")[:300]
+                reuse = not response.will_close
+                retry_after = response.getheader("Retry-After")
+                if response.status in RETRY_STATUSES:
+                    raise _RetryableError(f"HTTP {response.status}",
+                                          float(retry_after) if retry_after and retry_after.isdigit() else None)
+                raise GeminiApiError(f"HTTP {response.status}: {detail}", response.status)
+
+            data_lines = []
+            try:
+                while True:
+                    if cancelled and cancelled():
+                        return
+                    line = response.readline()
+                    if not line:
+                        break
+                    line = line.decode("utf-8").rstrip("\r\n")
+                    if line.startswith("data:"):
+                        data_lines.append(line[5:].lstrip())
+                    elif not line and data_lines:
+                        chunk = _chunk_text(json.loads("\n".join(data_lines)))
+                        data_lines = []
+                        if chunk:
+                            started = True
+                            yield chunk
+                if data_lines:
+                    chunk = _chunk_text(json.loads("\n".join(data_lines)))
+                    if chunk:
+                        yield chunk
+            except (OSError, http.client.HTTPException) as e:
+                if started:
+                    raise GeminiApiError(f"Stream interrupted: {e}")
+                raise _RetryableError(str(e))
+            reuse = not response.will_close
+        finally:
+            self.pool.release(conn, reuse=reuse)
+
+    def generate(self, text, png_images=()):
+        """Non-streaming convenience wrapper: return the whole response text."""
+        return "".join(self.stream_generate(text, png_images))
+
+    def close(self):
+        self.pool.close()
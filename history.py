@@ -1,65 +1,314 @@
 """
 History management module for Gemini Desktop Tool.
 Provides functionality to save and load recent instructions.
+
+Entries are appended to a JSON-lines journal instead of rewriting the
+whole file on every send. An in-memory index keyed by instruction gives
+O(1) dedupe, and the journal is compacted (atomically) in the background
+once it holds too many superseded records. A compacted journal starts
+with a snapshot of the live entries: a header line, then one JSON array
+of [instruction, preview, timestamp, count] rows, which parses faster
+than the old single-document history.json. load() indexes the rows as
+they are (entries are turned into dicts when read) and replays only the
+records appended after the snapshot.
 """
+import gc
 import json
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+
+# Columns of a snapshot row
+FIELDS = ('instruction', 'content_preview', 'timestamp', 'count')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(BASE_DIR, "history.jsonl")
+LEGACY_HISTORY_FILE = os.path.join(BASE_DIR, "history.json")
+
+
+def _fsync_dir(path):
+    """Make a rename durable on POSIX; a no-op where directories can't be opened."""
+    try:
+        fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    except (OSError, AttributeError):
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
-HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
 
 class HistoryManager:
-    def __init__(self, max_items=10):
+    def __init__(self, max_items=1000, path=None, legacy_path=None, fsync=True, compact_slack=200):
         self.max_items = max_items
-        self.history = []
+        self.path = path or HISTORY_FILE
+        self.legacy_path = legacy_path if legacy_path is not None else (
+            LEGACY_HISTORY_FILE if path is None else None)
+        self.fsync = fsync
+        # Compact once the journal holds this many records beyond the live entries
+        self.compact_slack = compact_slack
+        self._entries = OrderedDict()  # instruction -> entry dict or snapshot row, most recent last
+        self._records = 0
+        self._lock = threading.RLock()
+        self._file = None
+        self._compacting = False
+        self._tail = None  # records appended while a compaction is running
+        self._generation = 0  # Bumped by save(); a compaction started before one is discarded
+        self._listeners = []
         self.load()
-    
-    def load(self):
-        """Load history from file."""
+
+    @property
+    def history(self):
+        """All entries, most recent first."""
+        return self.get_recent(len(self._entries))
+
+    def subscribe(self, callback):
+        """Call callback(event, payload) on "add" (entry), "remove" (instruction) and "clear"."""
+        self._listeners.append(callback)
+
+    def _notify(self, event, payload=None):
+        for callback in list(self._listeners):
+            try:
+                callback(event, payload)
+            except Exception as e:
+                print(f"  History listener failed: {e}")
+
+    def _apply(self, record, trim=True):
+        """Replay one journal record; returns the instructions trimmed out."""
+        op = record.pop('op', 'add')
+        if op == 'clear':
+            self._entries.clear()
+        elif op == 'add':
+            instruction = record['instruction']
+            self._entries.pop(instruction, None)
+            self._entries[instruction] = record
+            if trim:
+                return self._trim()
+        return []
+
+    @staticmethod
+    def _as_entry(value):
+        """An entry dict for an index value, which is a dict or a snapshot row."""
+        if isinstance(value, list):
+            return {field: v for field, v in zip(FIELDS, value) if v is not None}
+        return value
+
+    def _trim(self):
+        removed = []
+        while len(self._entries) > self.max_items:
+            removed.append(self._entries.popitem(last=False)[0])
+        return removed
+
+    @staticmethod
+    def _parse(data):
+        """Parse journal lines; one C-level json.loads when the journal is clean."""
         try:
-            if os.path.exists(HISTORY_FILE):
-                with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.history = data.get('history', [])
-        except Exception as e:
-            print(f"Failed to load history: {e}")
-            self.history = []
-    
-    def save(self):
-        """Save history to file."""
+            return json.loads(b"[" + data.rstrip(b"\n").replace(b"\n", b",") + b"]")
+        except ValueError:
+            records = []
+            for line in data.split(b"\n"):
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+            return records
+
+    @staticmethod
+    def _snapshot(entries):
+        """Journal lines for a compacted file: a header, then all live entries as one line of rows."""
+        rows = [value if isinstance(value, list) else [value.get(field) for field in FIELDS]
+                for value in entries]
+        yield json.dumps({'op': 'snapshot', 'entries': len(rows), 'fields': FIELDS}) + "\n"
+        yield json.dumps(rows, ensure_ascii=False) + "\n"
+
+    def _load_snapshot(self, data):
+        """Index a leading snapshot's rows as they are; returns the journal data after it."""
+        if not data.startswith(b'{"op": "snapshot"'):
+            return data
+        # The rows are one allocation burst with nothing to collect; keep the GC out of it
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            first = data.index(b"\n") + 1
+            header = json.loads(data[:first])
+            second = data.index(b"\n", first) + 1
+            rows = json.loads(data[first:second])
+            if header.get('fields') != list(FIELDS) or len(rows) != header.get('entries'):
+                raise ValueError("unexpected snapshot layout")
+            entries = OrderedDict(zip(map(itemgetter(0), rows), rows))
+        except (ValueError, TypeError, IndexError) as e:
+            print(f"  History snapshot unreadable ({e}), replaying the journal")
+            return data
+        finally:
+            if collecting:
+                gc.enable()
+        if len(entries) != len(rows):
+            return data
+        self._entries = entries
+        self._records = len(rows)
+        return data[second:]
+
+    def load(self):
+        """Load history by replaying the journal."""
+        with self._lock:
+            self._entries.clear()
+            self._records = 0
+            try:
+                if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+                    self._migrate_legacy()
+                if os.path.exists(self.path):
+                    with open(self.path, 'rb') as f:
+                        data = f.read()
+                    # A crash mid-append can leave a torn last line; drop it
+                    end = data.rfind(b'\n') + 1
+                    if end < len(data):
+                        with open(self.path, 'r+b') as f:
+                            f.truncate(end)
+                    tail = self._load_snapshot(data[:end])
+                    for record in self._parse(tail) if tail else ():
+                        try:
+                            self._apply(record, trim=False)
+                            self._records += 1
+                        except (KeyError, AttributeError, TypeError):
+                            continue
+                    self._trim()
+            except Exception as e:
+                print(f"Failed to load history: {e}")
+                self._entries.clear()
+            if self._records > len(self._entries) + self.compact_slack:
+                self.compact(background=True)
+
+    def _migrate_legacy(self):
+        """Convert the old single-document history.json into a journal."""
+        with open(self.legacy_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f).get('history', [])
+        # The old file stored newest first; the journal replays oldest first
+        self._write_atomic(self.path, list(reversed(entries)))
+        print(f"  Migrated {len(entries)} history entries to {os.path.basename(self.path)}")
+
+    def _write_atomic(self, path, entries):
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(self._snapshot(entries))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if self.fsync:
+            _fsync_dir(path)
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
         try:
-            with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump({'history': self.history}, f, ensure_ascii=False, indent=2)
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._records += 1
+            if self._tail is not None:
+                self._tail.append(line)
         except Exception as e:
             print(f"Failed to save history: {e}")
-    
+
+    def save(self):
+        """Rewrite the journal with only the live entries (atomic)."""
+        with self._lock:
+            self._close_file()
+            self._generation += 1
+            try:
+                self._write_atomic(self.path, list(self._entries.values()))
+                self._records = len(self._entries)
+            except Exception as e:
+                print(f"Failed to save history: {e}")
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
     def add(self, instruction, content=""):
         """Add a new entry to history."""
         if not instruction.strip():
             return
-        
-        entry = {
-            'instruction': instruction.strip(),
-            'content_preview': content[:100] if content else "",
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        # Remove duplicate if exists
-        self.history = [h for h in self.history if h['instruction'] != entry['instruction']]
-        
-        # Add to front
-        self.history.insert(0, entry)
-        
-        # Trim to max
-        self.history = self.history[:self.max_items]
-        
-        self.save()
-    
+
+        instruction = instruction.strip()
+        with self._lock:
+            previous = self._as_entry(self._entries.get(instruction))
+            entry = {
+                'instruction': instruction,
+                'content_preview': content[:100] if content else "",
+                'timestamp': datetime.now().isoformat(),
+                'count': (previous.get('count', 1) if previous else 0) + 1
+            }
+            removed = self._apply(dict(entry))
+            self._append(dict(entry, op='add'))
+            if self._records > len(self._entries) + self.compact_slack and not self._compacting:
+                self.compact(background=True)
+
+        for old in removed:
+            self._notify("remove", old)
+        self._notify("add", entry)
+
+    def compact(self, background=False):
+        """Rewrite the journal without superseded records."""
+        if background:
+            threading.Thread(target=self.compact, name="history-compact", daemon=True).start()
+            return
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            self._tail = []
+            generation = self._generation
+            snapshot = list(self._entries.values())
+        try:
+            tmp = f"{self.path}.compact"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(self._snapshot(snapshot))
+                f.flush()
+                with self._lock:
+                    if self._generation != generation:
+                        # save() or clear() rewrote the journal meanwhile; the snapshot is stale
+                        f.close()
+                        os.remove(tmp)
+                        return
+                    # Carry over anything appended since the snapshot, then swap files
+                    f.writelines(self._tail)
+                    f.flush()
+                    if self.fsync:
+                        os.fsync(f.fileno())
+                    f.close()
+                    self._close_file()
+                    os.replace(tmp, self.path)
+                    if self.fsync:
+                        _fsync_dir(self.path)
+                    self._records = len(snapshot) + len(self._tail)
+        except Exception as e:
+            print(f"History compaction failed: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+                self._tail = None
+
     def get_recent(self, count=5):
         """Get recent history entries."""
-        return self.history[:count]
-    
+        with self._lock:
+            return [self._as_entry(value) for value in islice(reversed(self._entries.values()), count)]
+
     def clear(self):
         """Clear all history."""
-        self.history = []
-        self.save()
+        with self._lock:
+            self._entries.clear()
+            self.save()
+        self._notify("clear")
+
+    def close(self):
+        with self._lock:
+            self._close_file()
@@ -0,0 +1,147 @@
+"""
+Persistent image cache for Gemini Desktop Tool.
+Encoded paste payloads and thumbnails are kept in a bounded LRU: the most
+recent entries in memory, all entries as files under cache/, so sending
+the same screenshot again, even after a restart, skips re-encoding.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+
+
+def cache_key(*parts):
+    """File-name-safe key for a tuple of parts (content hash, parameters...)."""
+    return hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+
+
+class BlobCache:
+    """LRU of byte blobs bounded by total size, spilled to one file per entry."""
+
+    def __init__(self, root=None, max_bytes=256 * 1024 * 1024, memory_bytes=32 * 1024 * 1024):
+        self.root = root or CACHE_DIR
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()  # key -> bytes, most recent last
+        self._memory_total = 0
+        self._index = OrderedDict()  # key -> size on disk, least recently used first
+        self._disk_total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def _load_index(self):
+        """Rebuild the LRU order from file modification times (bumped on every hit)."""
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            files = []
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.name.endswith(".tmp"):
+                        os.remove(entry.path)  # Left over from an interrupted write
+                    elif entry.is_file():
+                        st = entry.stat()
+                        files.append((st.st_mtime, entry.name, st.st_size))
+        except OSError as e:
+            print(f"  Image cache unavailable: {e}")
+            return
+        for _, name, size in sorted(files):
+            self._index[name] = size
+            self._disk_total += size
+        self._evict_disk()
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            on_disk = key in self._index
+            if on_disk:
+                self._index.move_to_end(key)
+        if data is not None:
+            if on_disk:
+                self._touch(key)
+            return data
+        if on_disk:
+            try:
+                path = self._path(key)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                self._touch(key)
+            except OSError:
+                data = None
+            with self._lock:
+                if data is None:
+                    self._forget(key)
+                else:
+                    self._remember(key, data)
+                    self.disk_hits += 1
+                    return data
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _touch(self, key):
+        try:
+            os.utime(self._path(key))  # Persist the LRU position for the next session
+        except OSError:
+            pass
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"  Failed to write image cache: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            path = None
+        with self._lock:
+            self._remember(key, data)
+            if path is not None:
+                self._disk_total += len(data) - self._index.pop(key, 0)
+                self._index[key] = len(data)
+                self._evict_disk()
+
+    def _remember(self, key, data):
+        self._memory_total += len(data) - len(self._memory.pop(key, b""))
+        self._memory[key] = data
+        while self._memory_total > self.memory_bytes and len(self._memory) > 1:
+            _, old = self._memory.popitem(last=False)
+            self._memory_total -= len(old)
+
+    def _forget(self, key):
+        self._disk_total -= self._index.pop(key, 0)
+
+    def _evict_disk(self):
+        while self._disk_total > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._disk_total -= size
+            data = self._memory.pop(key, None)
+            if data is not None:
+                self._memory_total -= len(data)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    @property
+    def disk_bytes(self):
+        return self._disk_total
+
+    def __len__(self):
+        return len(self._index)
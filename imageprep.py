@@ -0,0 +1,200 @@
+"""
+Background image preparation for Gemini Desktop Tool.
+As soon as an image is attached it is downscaled to a size budget and
+encoded into ready-to-paste clipboard payloads on a worker pool, so the
+send path only copies prepared bytes onto the clipboard. With a BlobCache
+the PNG payload persists, keyed by content hash and the size budget; the
+DIB of a cached image is decoded from it when it is first pasted. A
+CompactImage source is compacted once its payloads are ready.
+"""
+import io
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from imagecache import cache_key
+from imagestore import CompactImage, MappedBuffer, pixels, spill
+from thumbnails import identify, image_key
+
+
+class PreparedImage:
+    """Ready-to-paste payloads for one attached image."""
+
+    def __init__(self, key, size, original_size, png=None, dib=None, prep_ms=0.0, dib_from_png=False):
+        self.key = key
+        self.size = size
+        self.original_size = original_size
+        self.png = png
+        self._dib = dib  # bytes, or a MappedBuffer once spilled
+        self.prep_ms = prep_ms
+        self.dib_from_png = dib_from_png  # DIB wanted but not stored; decode it from the PNG
+
+    @property
+    def dib(self):
+        if self._dib is None and self.dib_from_png and self.png is not None:
+            with Image.open(io.BytesIO(self.png)) as img:
+                self._dib = spill(encode_dib(img.convert("RGB")))
+        dib = self._dib
+        return dib.tobytes() if isinstance(dib, MappedBuffer) else dib
+
+    @property
+    def nbytes(self):
+        return len(self.png or b"") + len(self._dib or b"")
+
+    def spill(self):
+        """Move the (large, uncompressed) DIB payload out of the heap into a mapped temp file."""
+        self._dib = spill(self._dib)
+
+    def to_bytes(self):
+        """
+        Serialize as a JSON header line followed by the payloads. A DIB is
+        only stored without a PNG to rebuild it from (it is ~10x larger).
+        """
+        has_dib = self._dib is not None or self.dib_from_png
+        dib = self.dib if has_dib and self.png is None else None
+        header = {"key": self.key, "size": self.size, "original_size": self.original_size,
+                  "png": len(self.png) if self.png is not None else None,
+                  "dib": len(dib) if dib is not None else None,
+                  "dib_from_png": has_dib and self.png is not None}
+        return json.dumps(header).encode() + b"\n" + (self.png or b"") + (dib or b"")
+
+    @classmethod
+    def from_bytes(cls, data):
+        end = data.index(b"\n")
+        header = json.loads(data[:end])
+        payloads = {}
+        offset = end + 1
+        for name in ("png", "dib"):
+            length = header[name]
+            if length is not None:
+                payloads[name] = data[offset:offset + length]
+                offset += length
+        return cls(header["key"], tuple(header["size"]), tuple(header["original_size"]),
+                   dib_from_png=header.get("dib_from_png", False), **payloads)
+
+    def __repr__(self):
+        return (f"<PreparedImage {self.original_size[0]}x{self.original_size[1]}"
+                f" -> {self.size[0]}x{self.size[1]}, {self.nbytes // 1024}KB, {self.prep_ms:.0f}ms>")
+
+
+def fit_to_budget(size, max_dimension, max_pixels):
+    """Return the largest size <= size that fits both the dimension and pixel budget."""
+    w, h = size
+    scale = 1.0
+    if max_dimension:
+        scale = min(scale, max_dimension / max(w, h))
+    if max_pixels:
+        scale = min(scale, math.sqrt(max_pixels / (w * h)))
+    if scale >= 1.0:
+        return size
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+def encode_dib(img):
+    """CF_DIB payload: a BMP file without its 14-byte file header."""
+    output = io.BytesIO()
+    img.save(output, "BMP")
+    return output.getvalue()[14:]
+
+
+def encode_png(img):
+    """PNG payload; fast compression since it is decoded right away by the browser."""
+    output = io.BytesIO()
+    img.save(output, "PNG", compress_level=1)
+    return output.getvalue()
+
+
+def prepare_image(img, max_dimension=3072, max_pixels=6_000_000, formats=("png", "dib"), key=None):
+    """Downscale img to the budget and encode the requested clipboard formats."""
+    start = time.perf_counter()
+    key = key or image_key(img)
+    original_size = img.size
+    target = fit_to_budget(img.size, max_dimension, max_pixels)
+    if target != img.size:
+        img = img.resize(target, Image.LANCZOS, reducing_gap=3.0)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+    png = encode_png(img) if "png" in formats else None
+    dib = encode_dib(img.convert("RGB")) if "dib" in formats else None
+    return PreparedImage(key, img.size, original_size, png=png, dib=dib,
+                         prep_ms=(time.perf_counter() - start) * 1000)
+
+
+class ImagePreparer:
+    """Prepares attached images on a worker pool and caches the payloads."""
+
+    def __init__(self, max_dimension=3072, max_pixels=6_000_000, formats=("png", "dib"),
+                 workers=2, max_entries=32, cache=None):
+        self.max_dimension = max_dimension
+        self.max_pixels = max_pixels
+        self.formats = tuple(formats)
+        self.max_entries = max_entries
+        self.cache = cache  # Optional BlobCache shared across sessions
+        self.metrics = deque(maxlen=200)  # (key, prep_ms) in completion order
+        self._futures = OrderedDict()  # id(img) -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="imageprep")
+
+    def _prepare(self, source):
+        start = time.perf_counter()
+        img = pixels(source)
+        key = identify(img).key  # Shared with the thumbnail worker
+        entry = cache_key("prepared", key, self.max_dimension, self.max_pixels, *self.formats)
+        prepared = self._load_cached(entry)
+        if prepared is not None:
+            prepared.prep_ms = (time.perf_counter() - start) * 1000
+            print(f"  Prepared image (cached): {prepared}")
+        else:
+            prepared = prepare_image(img, self.max_dimension, self.max_pixels, self.formats, key=key)
+            if self.cache is not None:
+                self.cache.put(entry, prepared.to_bytes())
+            print(f"  Prepared image: {prepared}")
+        self.metrics.append((prepared.key, prepared.prep_ms))
+        prepared.spill()
+        if isinstance(source, CompactImage):
+            # Same size and an RGB(A) mode: the PNG payload is a lossless copy
+            lossless = prepared.size == source.size and source.mode in ("RGB", "RGBA")
+            source.compact(prepared.png if lossless else None)
+        return prepared
+
+    def _load_cached(self, entry):
+        if self.cache is None:
+            return None
+        data = self.cache.get(entry)
+        if data is None:
+            return None
+        try:
+            return PreparedImage.from_bytes(data)
+        except Exception as e:
+            print(f"  Ignoring bad image cache entry: {e}")
+            return None
+
+    def submit(self, img):
+        """Start preparing img (a PIL or CompactImage) in the background (no-op if already submitted)."""
+        with self._lock:
+            future = self._futures.get(id(img))
+            if future is not None and future.image is img:
+                self._futures.move_to_end(id(img))
+                return future
+            future = self._executor.submit(self._prepare, img)
+            future.image = img  # Also keeps the object alive, so id() stays unique
+            self._futures[id(img)] = future
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+            return future
+
+    def get(self, img, timeout=None):
+        """Return the PreparedImage for img, waiting for (or starting) its preparation."""
+        return self.submit(img).result(timeout)
+
+    def prep_times(self):
+        return [ms for _, ms in self.metrics]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
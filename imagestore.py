@@ -0,0 +1,127 @@
+"""
+Compact storage for attached images in Gemini Desktop Tool.
+A popup session keeps each attachment as a PNG in memory rather than a
+full-resolution PIL image: the pixels are dropped once the preparer has
+encoded them and decoded again only when needed (preview). The large DIB
+paste payload lives in a memory-mapped temp file instead of the heap.
+"""
+import io
+import mmap
+import tempfile
+import threading
+
+from PIL import Image
+
+SPILL_MIN_BYTES = 256 * 1024  # Smaller payloads stay on the heap
+
+
+def pixels(img):
+    """PIL image for an attachment, decoding a CompactImage if needed."""
+    return img.image() if isinstance(img, CompactImage) else img
+
+
+def raw_size(img):
+    return img.width * img.height * len(img.getbands())
+
+
+class MappedBuffer:
+    """Bytes kept in a memory-mapped temp file; paged in from the OS cache on read."""
+
+    def __init__(self, data):
+        self._file = tempfile.TemporaryFile(prefix="gemini_img_")
+        self._file.write(data)
+        self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), len(data), access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self._map)
+
+    def tobytes(self):
+        return self._map[:]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def spill(data):
+    """Move a large payload into a MappedBuffer; small ones are returned unchanged."""
+    if data is None or len(data) < SPILL_MIN_BYTES:
+        return data
+    try:
+        return MappedBuffer(data)
+    except (OSError, ValueError) as e:
+        print(f"  Keeping payload in memory: {e}")
+        return data
+
+
+class CompactImage:
+    """
+    An attached image. The original PIL image is held only until compact()
+    swaps it for a PNG; image() then decodes a fresh copy on demand.
+    """
+
+    def __init__(self, img):
+        self.size = img.size
+        self.mode = img.mode
+        self._img = img
+        self._png = None
+        self._lock = threading.Lock()
+
+    @property
+    def width(self):
+        return self.size[0]
+
+    @property
+    def height(self):
+        return self.size[1]
+
+    @property
+    def compacted(self):
+        return self._img is None
+
+    @property
+    def nbytes(self):
+        """Memory held: the raw pixels until compacted, then the PNG."""
+        img = self._img
+        return raw_size(img) if img is not None else len(self._png)
+
+    def compact(self, png=None):
+        """Drop the pixels, keeping png (if it encodes them losslessly) or a fresh PNG encode."""
+        with self._lock:
+            img = self._img
+        if img is None:
+            return
+        if png is None:
+            try:
+                buffer = io.BytesIO()
+                img.save(buffer, "PNG", compress_level=1)
+                png = buffer.getvalue()
+            except Exception as e:
+                print(f"  Keeping image uncompressed: {e}")
+                return
+        with self._lock:
+            self._png = png
+            self._img = None
+
+    def image(self):
+        """The pixels: the original until compacted, then a decoded copy the caller owns."""
+        with self._lock:
+            img, png = self._img, self._png
+        if img is not None:
+            return img
+        decoded = Image.open(io.BytesIO(png))
+        decoded.load()
+        return decoded
+
+    def preview(self, max_size):
+        """A downscaled copy for display; the stored image is left untouched."""
+        img = self.image()
+        scale = min(max_size[0] / img.width, max_size[1] / img.height, 1.0)
+        size = max(1, round(img.width * scale)), max(1, round(img.height * scale))
+        return img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+    def __repr__(self):
+        state = "png" if self.compacted else "raw"
+        return f"<CompactImage {self.size[0]}x{self.size[1]} {state} {self.nbytes // 1024}KB>"
+
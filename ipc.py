@@ -0,0 +1,250 @@
+"""
+Local IPC for Gemini Desktop Tool.
+The tray process holds a single-instance lock and serves requests
+(submit a prompt, query or cancel a job) on a named pipe (Windows) or a
+Unix socket, falling back to TCP on the loopback interface. Connections
+are authenticated with a random key that is written, together with the
+address, to ipc.json in a per-user folder that only the current user can
+open (%LOCALAPPDATA% with an ACL granting only that user on Windows, a
+0700 directory elsewhere). Requests and replies are JSON; nothing a peer
+sends is unpickled.
+"""
+import getpass
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+
+LOCK_NAME = "gemini_desktop_tool"
+ERROR_ALREADY_EXISTS = 183
+MAX_MESSAGE = 64 * 1024 * 1024  # Bytes; large captures are sent inline
+
+
+def _info_dir():
+    if sys.platform == "win32":
+        root = os.environ.get("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+        return os.path.join(root, "GeminiDesktopTool")
+    root = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, LOCK_NAME)
+
+
+INFO_FILE = os.path.join(_info_dir(), "ipc.json")
+
+
+def _user():
+    try:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", getpass.getuser())
+    except Exception:
+        return "user"
+
+
+def default_endpoints(tcp_port=47653):
+    """(address, family) pairs to try, in order."""
+    name = f"{LOCK_NAME}-{_user()}"
+    if sys.platform == "win32":
+        primary = (rf"\\.\pipe\{name}", "AF_PIPE")
+    else:
+        primary = (os.path.join(tempfile.gettempdir(), f"{name}.sock"), "AF_UNIX")
+    return [primary, (("127.0.0.1", tcp_port), "AF_INET")]
+
+
+def _kernel32():
+    """kernel32 with the last error saved after every call, and 64-bit safe handles."""
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateMutexW.argtypes = (wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR)
+    kernel32.CreateMutexW.restype = wintypes.HANDLE
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    kernel32.CloseHandle.restype = wintypes.BOOL
+    return kernel32
+
+
+class InstanceLock:
+    """Held by the one running tray process; a second acquire() in any process fails."""
+
+    def __init__(self, name=None):
+        self.name = name or f"{LOCK_NAME}-{_user()}"
+        self._handle = None
+
+    def acquire(self):
+        """Return True if this process now owns the lock."""
+        try:
+            if sys.platform == "win32":
+                import ctypes
+                kernel32 = _kernel32()
+                handle = kernel32.CreateMutexW(None, False, f"Local\\{self.name}")
+                if not handle:
+                    return True  # Can't tell; don't block startup
+                # Read through use_last_error: a plain GetLastError() call may see a
+                # value overwritten by ctypes or the interpreter in between
+                if ctypes.get_last_error() == ERROR_ALREADY_EXISTS:
+                    kernel32.CloseHandle(handle)
+                    return False
+                self._handle = handle
+            else:
+                import fcntl
+                f = open(os.path.join(tempfile.gettempdir(), f"{self.name}.lock"), 'w')
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    f.close()
+                    return False
+                self._handle = f
+        except Exception as e:
+            print(f"  Instance lock unavailable: {e}")
+        return True
+
+    def release(self):
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        if sys.platform == "win32":
+            _kernel32().CloseHandle(handle)
+        else:
+            handle.close()
+
+
+def _private_dir(path):
+    """Create path if needed and make it accessible to the current user only."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if sys.platform != "win32":
+        os.chmod(path, 0o700)
+        return
+    # os.open's mode bits don't apply on Windows: replace the inherited ACL with one
+    # entry for this user, inherited by the files created inside
+    user = f"{os.environ['USERDOMAIN']}\\{os.environ['USERNAME']}" if "USERDOMAIN" in os.environ \
+        else os.environ.get("USERNAME", getpass.getuser())
+    subprocess.run(["icacls", path, "/inheritance:r", "/grant:r", f"{user}:(OI)(CI)F"],
+                   check=True, capture_output=True, creationflags=subprocess.CREATE_NO_WINDOW)
+
+
+def _send(conn, message):
+    conn.send_bytes(json.dumps(message, default=str).encode('utf-8'))
+
+
+def _recv(conn):
+    return json.loads(conn.recv_bytes(MAX_MESSAGE).decode('utf-8'))
+
+
+class IpcServer:
+    """Serves handler(request) -> reply for authenticated local clients, one thread per connection."""
+
+    def __init__(self, handler, endpoints=None, info_path=None):
+        self.handler = handler
+        self.endpoints = endpoints or default_endpoints()
+        self.info_path = info_path or INFO_FILE
+        self.address = None
+        self.family = None
+        self._listener = None
+        self._thread = None
+        self.ready = threading.Event()
+
+    def start(self):
+        """Bind and serve on a background thread (importing the IPC stack is kept off the caller)."""
+        self._thread = threading.Thread(target=self._serve, name="ipc", daemon=True)
+        self._thread.start()
+
+    def _bind(self):
+        from multiprocessing.connection import Listener
+        authkey = os.urandom(32)
+        for address, family in self.endpoints:
+            try:
+                if family == "AF_UNIX" and os.path.exists(address):
+                    os.remove(address)  # Left by a crashed instance; the instance lock is ours
+                listener = Listener(address, family, authkey=authkey)
+            except Exception as e:
+                print(f"  IPC endpoint {address} unavailable: {e}")
+                continue
+            self._listener = listener
+            self.address, self.family = listener.address, family
+            self._write_info(authkey)
+            return True
+        return False
+
+    def _write_info(self, authkey):
+        info = {"address": self.address, "family": self.family, "authkey": authkey.hex(), "pid": os.getpid()}
+        _private_dir(os.path.dirname(os.path.abspath(self.info_path)))
+        tmp = self.info_path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        os.replace(tmp, self.info_path)
+
+    def _serve(self):
+        try:
+            bound = self._bind()
+        except Exception as e:
+            print(f"  IPC server failed to start: {e}")
+            bound = False
+        self.ready.set()
+        if not bound:
+            return
+        print(f"  IPC listening on {self.address}")
+        listener = self._listener
+        while self._listener is not None:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                if self._listener is None:
+                    return
+                print(f"  IPC connection rejected: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), name="ipc-conn", daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = _recv(conn)
+                except (EOFError, OSError):
+                    return
+                except ValueError:
+                    request = None  # Not JSON
+                try:
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    reply = self.handler(request)
+                except Exception as e:
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                try:
+                    _send(conn, reply)
+                except OSError:
+                    return
+
+    def close(self):
+        listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        try:
+            listener.close()
+        except Exception:
+            pass
+        try:
+            os.remove(self.info_path)
+        except OSError:
+            pass
+
+
+def connect(info_path=None):
+    """Open an authenticated connection to the running instance; raises OSError if none."""
+    from multiprocessing.connection import Client
+    try:
+        with open(info_path or INFO_FILE, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        raise ConnectionRefusedError("no running instance found")
+    address = info["address"]
+    if isinstance(address, list):
+        address = tuple(address)
+    return Client(address, info["family"], authkey=bytes.fromhex(info["authkey"]))
+
+
+def request(message, info_path=None):
+    """Send one request to the running instance and return its reply."""
+    with connect(info_path) as conn:
+        _send(conn, message)
+        return _recv(conn)
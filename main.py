@@ -1,32 +1,34 @@
-import tkinter as tk
-from tkinter import ttk
-import pyperclip
-import webbrowser
+# Only the hotkey listener and the tray are imported up front. Tk, PIL,
+# pywin32, pyautogui, uiautomation and the API client are imported on
+# first use or by warm_up() once the tray is showing.
 import keyboard
-import pyautogui
 import time
 import threading
-import sys
+import itertools
 import signal
 import json
 import os
-from PIL import Image, ImageGrab, ImageDraw
 import io
-import win32clipboard
-import win32gui
-import win32con
+import contextlib
 import pystray
 from pystray import MenuItem as item
-from history import HistoryManager
+from dispatcher import EventDispatcher, EventType
+from scheduler import AutomationScheduler, ClipboardOwner
+from metrics import Metrics
 
-try:
-    import uiautomation as auto
-    import pythoncom
-except ImportError:
-    auto = None
-    pythoncom = None
+_uia = None
 
-pyautogui.FAILSAFE = False
+
+def load_uiautomation():
+    """Import uiautomation on first use; returns None when it isn't installed."""
+    global _uia
+    if _uia is None:
+        try:
+            import uiautomation
+            _uia = uiautomation
+        except ImportError:
+            _uia = False
+    return _uia or None
 
 # ================= CONFIGURATION =================
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
@@ -39,7 +41,38 @@ def load_config():
         "GEMINI_URL": "https://gemini.google.com/app",
         "PASTE_DELAY_NEW": 6.0,
         "PASTE_DELAY_REUSE": 1.5,
-        "MAX_HISTORY": 10,
+        "READY_TIMEOUT": 15.0,
+        "ADAPTIVE_DELAYS": True,
+        "DELAY_TARGET_FAILURE_RATE": 0.05,
+        "CAPTURE_TIMEOUT": 1.0,
+        "LARGE_CONTENT_CHARS": 100000,
+        "LARGE_PASTE_MODE": "file",
+        "PASTE_CHUNK_CHARS": 20000,
+        "METRICS_ENABLED": True,
+        "METRICS_MAX_BYTES": 1000000,
+        "MAX_HISTORY": 1000,
+        "POPUP_PAINT_TARGET_MS": 100,
+        "JOB_QUEUE_SIZE": 8,
+        "JOB_TIMEOUT": 60.0,
+        "IMAGE_MAX_DIMENSION": 3072,
+        "IMAGE_MAX_PIXELS": 6000000,
+        "IMAGE_CLIPBOARD_FORMATS": ["png", "dib"],
+        "IMAGE_PASTE_STRATEGY": "batch",
+        "IMAGE_PASTE_SETTLE": 1.0,
+        "IMAGE_CACHE_MB": 256,
+        "IMAGE_DEDUPE_DISTANCE": 4,
+        "PREPROCESS_STAGES": ["control", "trailing", "blank_lines"],  # [] sends content verbatim
+        "PREPROCESS_MAX_TOKENS": 200000,  # For the opt-in "budget" stage; 0 for no limit
+        "SEND_BACKEND": "browser",
+        "RESPONSE_CACHE_MB": 16,  # 0 disables the API response cache
+        "RESPONSE_CACHE_TTL_HOURS": 24,
+        "FANOUT_TARGETS": 1,  # Windows (or API sessions) each send goes to; 1 disables fan-out
+        "FANOUT_MAX_TARGETS": 8,  # Upper bound for fanout_targets and IPC "targets"
+        "IPC_ENABLED": True,
+        "IPC_PORT": 47653,  # Loopback TCP, only if the pipe/socket can't be created
+        "GEMINI_API_KEY": "",
+        "GEMINI_API_MODEL": "",  # Empty: the API client's defaults
+        "GEMINI_API_URL": "",
     }
     try:
         if os.path.exists(CONFIG_FILE):
@@ -51,21 +84,88 @@ def load_config():
                     "GEMINI_URL": user_config.get("gemini_url", default_config["GEMINI_URL"]),
                     "PASTE_DELAY_NEW": user_config.get("paste_delay_new", default_config["PASTE_DELAY_NEW"]),
                     "PASTE_DELAY_REUSE": user_config.get("paste_delay_reuse", default_config["PASTE_DELAY_REUSE"]),
+                    "READY_TIMEOUT": user_config.get("ready_timeout", default_config["READY_TIMEOUT"]),
+                    "ADAPTIVE_DELAYS": user_config.get("adaptive_delays", default_config["ADAPTIVE_DELAYS"]),
+                    "DELAY_TARGET_FAILURE_RATE": user_config.get("delay_target_failure_rate", default_config["DELAY_TARGET_FAILURE_RATE"]),
+                    "CAPTURE_TIMEOUT": user_config.get("capture_timeout", default_config["CAPTURE_TIMEOUT"]),
+                    "LARGE_CONTENT_CHARS": user_config.get("large_content_chars", default_config["LARGE_CONTENT_CHARS"]),
+                    "LARGE_PASTE_MODE": user_config.get("large_paste_mode", default_config["LARGE_PASTE_MODE"]),
+                    "PASTE_CHUNK_CHARS": user_config.get("paste_chunk_chars", default_config["PASTE_CHUNK_CHARS"]),
+                    "METRICS_ENABLED": user_config.get("metrics_enabled", default_config["METRICS_ENABLED"]),
+                    "METRICS_MAX_BYTES": user_config.get("metrics_max_bytes", default_config["METRICS_MAX_BYTES"]),
                     "MAX_HISTORY": user_config.get("max_history", default_config["MAX_HISTORY"]),
+                    "POPUP_PAINT_TARGET_MS": user_config.get("popup_paint_target_ms", default_config["POPUP_PAINT_TARGET_MS"]),
+                    "JOB_QUEUE_SIZE": user_config.get("job_queue_size", default_config["JOB_QUEUE_SIZE"]),
+                    "JOB_TIMEOUT": user_config.get("job_timeout", default_config["JOB_TIMEOUT"]),
+                    "IMAGE_MAX_DIMENSION": user_config.get("image_max_dimension", default_config["IMAGE_MAX_DIMENSION"]),
+                    "IMAGE_MAX_PIXELS": user_config.get("image_max_pixels", default_config["IMAGE_MAX_PIXELS"]),
+                    "IMAGE_CLIPBOARD_FORMATS": user_config.get("image_clipboard_formats", default_config["IMAGE_CLIPBOARD_FORMATS"]),
+                    "IMAGE_PASTE_STRATEGY": user_config.get("image_paste_strategy", default_config["IMAGE_PASTE_STRATEGY"]),
+                    "IMAGE_PASTE_SETTLE": user_config.get("image_paste_settle", default_config["IMAGE_PASTE_SETTLE"]),
+                    "IMAGE_CACHE_MB": user_config.get("image_cache_mb", default_config["IMAGE_CACHE_MB"]),
+                    "IMAGE_DEDUPE_DISTANCE": user_config.get("image_dedupe_distance", default_config["IMAGE_DEDUPE_DISTANCE"]),
+                    "PREPROCESS_STAGES": user_config.get("preprocess_stages", default_config["PREPROCESS_STAGES"]),
+                    "PREPROCESS_MAX_TOKENS": user_config.get("preprocess_max_tokens", default_config["PREPROCESS_MAX_TOKENS"]),
+                    "SEND_BACKEND": user_config.get("send_backend", default_config["SEND_BACKEND"]),
+                    "RESPONSE_CACHE_MB": user_config.get("response_cache_mb", default_config["RESPONSE_CACHE_MB"]),
+                    "RESPONSE_CACHE_TTL_HOURS": user_config.get("response_cache_ttl_hours", default_config["RESPONSE_CACHE_TTL_HOURS"]),
+                    "FANOUT_TARGETS": user_config.get("fanout_targets", default_config["FANOUT_TARGETS"]),
+                    "FANOUT_MAX_TARGETS": user_config.get("fanout_max_targets", default_config["FANOUT_MAX_TARGETS"]),
+                    "IPC_ENABLED": user_config.get("ipc_enabled", default_config["IPC_ENABLED"]),
+                    "IPC_PORT": user_config.get("ipc_port", default_config["IPC_PORT"]),
+                    "GEMINI_API_KEY": user_config.get("gemini_api_key", default_config["GEMINI_API_KEY"]),
+                    "GEMINI_API_MODEL": user_config.get("gemini_api_model", default_config["GEMINI_API_MODEL"]),
+                    "GEMINI_API_URL": user_config.get("gemini_api_url", default_config["GEMINI_API_URL"]),
                 }
     except Exception as e:
         print(f"Failed to load config: {e}")
     return default_config
 
-CONFIG = load_config()
+# Filled by GeminiDesktopTool() rather than at import time
+CONFIG = {}
 # =================================================
 
 class GeminiDesktopTool:
-    def __init__(self):
-        self.should_exit = False
-        self.should_show_popup = False
+    def __init__(self, backend=None):
+        if not CONFIG:
+            CONFIG.update(load_config())
+        # Heavier components are created on first use, see _component()
+        self._components = {}
+        if backend is not None:
+            self._components["backend"] = backend
+        self._warm_lock = threading.Lock()  # Guards _component_locks
+        self._component_locks = {}  # name -> RLock held while that component is created
+        self.warmed_up_ms = None
+        self.popup = None
+        self.metrics = Metrics(enabled=CONFIG["METRICS_ENABLED"], max_bytes=CONFIG["METRICS_MAX_BYTES"])
+        self.dispatcher = EventDispatcher(coalesce=(EventType.SHOW_POPUP,))
+        self.clipboard = ClipboardOwner()
+        job_ids = itertools.count(1)
+        self.scheduler = AutomationScheduler(
+            self.clipboard,
+            max_queue=CONFIG["JOB_QUEUE_SIZE"],
+            default_timeout=CONFIG["JOB_TIMEOUT"],
+            on_status=self.on_job_status,
+            ids=job_ids,
+        )
+        # API sends never touch the clipboard, so they don't wait behind pastes
+        self.api_scheduler = AutomationScheduler(
+            None,
+            max_queue=CONFIG["JOB_QUEUE_SIZE"],
+            default_timeout=CONFIG["JOB_TIMEOUT"],
+            on_status=self.on_job_status,
+            ids=job_ids,
+            name="api",
+        )
+        self.send_backend = CONFIG["SEND_BACKEND"]
+        self._api_client = None
+        self.tray_icon = None
+        self._tray_thread = None
+        self._warm_thread = None
+        self.instance_lock = None
+        self.ipc_server = None
+        self.last_job = None
         self.reuse_session = True  # Remember last reuse checkbox state
-        self.history_manager = HistoryManager(max_items=CONFIG.get("MAX_HISTORY", 10))
         self.colors = {
             'bg': '#1e1e2e', 'fg': '#cdd6f4', 'accent': '#89b4fa',
             'secondary': '#313244', 'input_bg': '#45475a', 
@@ -73,24 +173,137 @@ class GeminiDesktopTool:
             'error': '#f38ba8'
         }
 
-    def set_clipboard_image(self, image):
-        try:
-            output = io.BytesIO()
-            image.convert("RGB").save(output, "BMP")
-            data = output.getvalue()[14:]
-            output.close()
-            win32clipboard.OpenClipboard()
-            win32clipboard.EmptyClipboard()
-            win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
-            win32clipboard.CloseClipboard()
-        except Exception as e:
-            print(f"Clipboard Error: {e}")
+    # ---- Lazily created components ----
+    def _component(self, name, factory):
+        """
+        Return the named component, creating it on first use (thread-safe). Each
+        component has its own lock, so a slow one (the search index over a long
+        history) doesn't hold up the others.
+        """
+        value = self._components.get(name)
+        if value is None:
+            with self._warm_lock:
+                lock = self._component_locks.setdefault(name, threading.RLock())
+            with lock:
+                value = self._components.get(name)
+                if value is None:
+                    value = self._components[name] = factory()
+        return value
+
+    @property
+    def backend(self):
+        def create():
+            from backends import Win32Backend
+            return Win32Backend()
+        return self._component("backend", create)
+
+    @property
+    def readiness(self):
+        def create():
+            from readiness import ReadinessEngine
+            return ReadinessEngine(self.backend)
+        return self._component("readiness", create)
+
+    @property
+    def text_capture(self):
+        def create():
+            from capture import TextCapture
+            return TextCapture(self.backend, max_timeout=CONFIG["CAPTURE_TIMEOUT"])
+        return self._component("capture", create)
+
+    @property
+    def delays(self):
+        def create():
+            from tuning import DelayTuner
+            return DelayTuner(enabled=CONFIG["ADAPTIVE_DELAYS"],
+                              target_failure_rate=CONFIG["DELAY_TARGET_FAILURE_RATE"])
+        return self._component("delays", create)
+
+    @property
+    def preparer(self):
+        def create():
+            from imageprep import ImagePreparer
+            return ImagePreparer(
+                max_dimension=CONFIG["IMAGE_MAX_DIMENSION"],
+                max_pixels=CONFIG["IMAGE_MAX_PIXELS"],
+                formats=CONFIG["IMAGE_CLIPBOARD_FORMATS"],
+                cache=self.image_cache,
+            )
+        return self._component("preparer", create)
+
+    @property
+    def image_cache(self):
+        """Disk-backed cache of prepared images and thumbnails; None when image_cache_mb is 0."""
+        if not CONFIG["IMAGE_CACHE_MB"]:
+            return None
+
+        def create():
+            from imagecache import BlobCache
+            return BlobCache(max_bytes=int(CONFIG["IMAGE_CACHE_MB"] * 1024 * 1024))
+        return self._component("image_cache", create)
+
+    @property
+    def response_cache(self):
+        """SQLite cache of API answers; None when response_cache_mb is 0 or it can't be opened."""
+        if not CONFIG["RESPONSE_CACHE_MB"]:
+            return None
+
+        def create():
+            from responsecache import ResponseCache
+            try:
+                return ResponseCache(max_bytes=int(CONFIG["RESPONSE_CACHE_MB"] * 1024 * 1024),
+                                     ttl=CONFIG["RESPONSE_CACHE_TTL_HOURS"] * 3600.0)
+            except Exception as e:
+                print(f"  Response cache unavailable: {e}")
+                return None
+        return self._component("response_cache", create)
+
+    @property
+    def paster(self):
+        def create():
+            from paste import ImagePaster
+            return ImagePaster(
+                self.backend,
+                strategy=CONFIG["IMAGE_PASTE_STRATEGY"],
+                settle=CONFIG["IMAGE_PASTE_SETTLE"],
+                metrics=self.metrics,
+            )
+        return self._component("paster", create)
+
+    @property
+    def history_manager(self):
+        def create():
+            from history import HistoryManager
+            return HistoryManager(max_items=CONFIG.get("MAX_HISTORY", 1000))
+        return self._component("history", create)
+
+    @property
+    def search_index(self):
+        def create():
+            from search import HistorySearchIndex
+            index = HistorySearchIndex()
+            index.attach(self.history_manager)
+            return index
+        return self._component("search", create)
+
+    def warm_up(self):
+        """Load history and import the heavy modules; run in the background after the tray is up."""
+        start = time.perf_counter()
+        for name in ("search_index", "backend", "readiness", "delays", "text_capture", "preparer", "paster"):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                print(f"  Warm-up of {name} failed: {e}")
+        load_uiautomation()
+        if self.send_backend == "api":
+            import gemini_api  # noqa: F401
+        self.warmed_up_ms = (time.perf_counter() - start) * 1000
+        print(f"  Warmed up in {self.warmed_up_ms:.0f}ms")
 
     def get_clipboard_image(self):
         try:
-            img = ImageGrab.grabclipboard()
-            if isinstance(img, Image.Image):
-                return img
+            with self.clipboard.hold("popup", timeout=1.0):
+                return self.backend.get_clipboard_image()
         except: pass
         return None
 
@@ -100,395 +313,375 @@ class GeminiDesktopTool:
         image.save(buffer, format='PNG')
         return buffer.getvalue()
 
-    def focus_gemini_window(self):
-        """Find and focus Gemini browser window."""
-        found_hwnd = None
-        found_title = ""
-        
-        def callback(hwnd, _):
-            nonlocal found_hwnd, found_title
-            if win32gui.IsWindowVisible(hwnd):
-                title = win32gui.GetWindowText(hwnd)
-                if "Gemini" in title or "gemini.google.com" in title:
-                    found_hwnd = hwnd
-                    found_title = title
-                    return False
-            return True
-        
-        try:
-            win32gui.EnumWindows(callback, None)
-        except:
-            pass
-        
-        if found_hwnd:
-            print(f"  Found window: {found_title[:50]}")
-            try:
-                if win32gui.IsIconic(found_hwnd):
-                    win32gui.ShowWindow(found_hwnd, win32con.SW_RESTORE)
-                win32gui.SetForegroundWindow(found_hwnd)
-                time.sleep(0.5)
-                return found_hwnd
-            except Exception as e:
-                print(f"  Focus failed: {e}")
-                return found_hwnd
-        else:
+    def tuned_wait(self, step, ceiling, wait, budget=None):
+        """
+        Run wait(timeout) with the tuned timeout for step (at most ceiling, the
+        static config value) and record how long it took in the delay profile.
+        """
+        tuned = self.delays.timeout(step, ceiling)
+        timeout = budget(tuned) if budget else tuned
+        start = self.backend.monotonic()
+        result = wait(timeout)
+        # A wait cut short by the job's deadline says nothing about the step
+        if result or timeout >= tuned:
+            self.delays.observe(step, self.backend.monotonic() - start, result)
+        if not result and tuned < ceiling:
+            print(f"  {step} not confirmed within the tuned {tuned:.2f}s ({self.delays.profile})")
+        return result
+
+    def focus_gemini_window(self, budget=None):
+        """Find Gemini browser window and wait until it is in the foreground."""
+        hwnd = self.readiness.find_window()
+        if not hwnd:
             print("  No Gemini window found")
-        return None
+            return None
+        title = self.backend.get_title(hwnd)
+        print(f"  Found window: {title[:50]}")
+        self.delays.set_browser(title)
+        if not self.tuned_wait("window_focus", CONFIG["PASTE_DELAY_REUSE"],
+                               lambda t: self.readiness.wait_for_foreground(hwnd, t), budget):
+            print("  Focus not confirmed")
+        return hwnd
 
     def capture_text(self):
+        """Copy the selection; returns (text, image), the image only if the copy produced one."""
         print("  Capturing text...")
-        time.sleep(0.6)
-        pyperclip.copy('')
-        
-        # Temporarily ignore SIGINT (Ctrl+C signal) during the copy simulation
-        original_handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
         try:
-            # Use keyboard library instead of pyautogui for safer Ctrl+C
-            keyboard.send('ctrl+c')
-            time.sleep(0.4)
-        finally:
-            # Restore original handler
-            signal.signal(signal.SIGINT, original_handler)
-        
-        result = pyperclip.paste()
-        print(f"  Captured: {len(result)} chars")
-        return result if result else ""
+            # A running automation job owns the clipboard; don't clobber its paste
+            with self.clipboard.hold("capture", timeout=2.0):
+                # Temporarily ignore SIGINT (Ctrl+C signal) during the copy simulation
+                original_handler = signal.signal(signal.SIGINT, signal.SIG_IGN)
+                try:
+                    with self.metrics.span("capture"):
+                        result = self.text_capture.capture()
+                finally:
+                    signal.signal(signal.SIGINT, original_handler)
+        except TimeoutError as e:
+            print(f"  Skipping capture: {e}")
+            return "", None
+        except Exception as e:
+            print(f"  Capture failed: {e}")
+            return "", None
+        text, image = result
+        print(f"  Captured: {len(text)} chars{' and an image' if image else ''} in {self.text_capture.last_ms:.0f}ms")
+        return text, image
 
-    def wait_for_gemini_ready(self, max_wait=15):
-        """Wait for Gemini page to be ready by polling for window."""
+    def wait_for_gemini_ready(self, max_wait=15, baseline=None, budget=None):
+        """Wait for a new or re-titled Gemini window after opening the page."""
         print(f"  Waiting for Gemini to load (max {max_wait}s)...")
-        start_time = time.time()
-        
-        while time.time() - start_time < max_wait:
-            hwnd = self.focus_gemini_window()
-            if hwnd:
-                time.sleep(0.8)
-                try:
-                    win32gui.SetForegroundWindow(hwnd)
-                    print(f"  Gemini ready after {time.time() - start_time:.1f}s")
-                    return True
-                except:
-                    pass
-            time.sleep(0.3)
-        
-        print(f"  Timeout waiting for Gemini")
-        return False
+        hwnd = self.tuned_wait("page_load", max_wait,
+                               lambda t: self.readiness.wait_for_window(t, baseline=baseline), budget)
+        if hwnd:
+            self.delays.set_browser(self.backend.get_title(hwnd))
+            self.tuned_wait("page_foreground", CONFIG["PASTE_DELAY_NEW"],
+                            lambda t: self.readiness.wait_for_foreground(hwnd, t), budget)
+        return hwnd
+
+    def run_automation(self, text, images, reuse, attachment=None, job=None):
+        """
+        Paste text, oversized content (attachment) and images to Gemini, then
+        send. Runs on the scheduler worker.
+        """
+        def check():
+            if job:
+                job.check()
+
+        def budget(timeout):
+            # Never wait past the job's own deadline
+            return min(timeout, job.remaining(timeout)) if job else timeout
 
-    def run_automation(self, text, images, reuse):
-        """Paste text and images to Gemini, then send."""
         print(f"Running automation... (reuse={reuse}, images={len(images) if images else 0})")
-        
-        # Initialize UIA for this thread
-        uia_init = None
-        if auto:
-            try:
-                uia_init = auto.UIAutomationInitializerInThread()
-            except:
-                pass
 
-        try:
-            hwnd = self.focus_gemini_window() if reuse else None
+        metrics = self.metrics
+        with self._uia_thread():
+            with metrics.span("window_focus", reuse=reuse):
+                hwnd = self.focus_gemini_window(budget) if reuse else None
+                focus_step, focus_timeout = "input_focus_reuse", CONFIG["PASTE_DELAY_REUSE"]
+                check()
             
             if not hwnd:
                 print("  Opening new Gemini page...")
-                webbrowser.open(CONFIG["GEMINI_URL"])
-                hwnd = self.wait_for_gemini_ready(max_wait=15)
+                with metrics.span("page_load"):
+                    baseline = self.readiness.snapshot()
+                    self.backend.open_url(CONFIG["GEMINI_URL"])
+                    hwnd = self.wait_for_gemini_ready(max_wait=CONFIG["READY_TIMEOUT"], baseline=baseline,
+                                                      budget=budget)
+                focus_step, focus_timeout = "input_focus_new", CONFIG["PASTE_DELAY_NEW"]
+                check()
             
-            if hwnd and win32gui.IsWindow(hwnd):
+            if hwnd and self.backend.is_window(hwnd):
                 print("  Focusing input area...")
-                
-                # Use coordinate-based clicking (UIA disabled due to complexity)
-                try:
-                    rect = win32gui.GetWindowRect(hwnd)
-                    x, y, w, h = rect[0], rect[1], rect[2] - rect[0], rect[3] - rect[1]
-                    
-                    # Click in the input area - it's at the bottom center of the window
-                    # The input box is typically about 150-200px from the bottom edge
-                    click_x = x + w // 2
-                    click_y = y + h - 160
-                    
-                    print(f"  Clicking at: ({click_x}, {click_y})")
-                    pyautogui.click(click_x, click_y)
-                    time.sleep(0.3)
-                    # Click again to ensure focus
-                    pyautogui.click(click_x, click_y)
-                except Exception as e:
-                    print(f"  Focus click failed: {e}")
-            
-            time.sleep(0.5)
+                # Paste delays are upper bounds on waiting for input focus, tuned down from the profile
+                with metrics.span("input_focus"):
+                    if not self.tuned_wait(focus_step, focus_timeout,
+                                           lambda t: self.readiness.wait_for_input_focus(hwnd, t), budget):
+                        print("  Input focus not confirmed, pasting anyway")
+                check()
             
             # Paste text
-            print("  Pasting text...")
-            pyperclip.copy(text)
-            keyboard.send('ctrl+v')
-            time.sleep(0.8)
+            if text:
+                print("  Pasting text...")
+                with metrics.span("paste_text", chars=len(text)):
+                    self.backend.set_clipboard_text(text)
+                    self.backend.send_keys('ctrl+v')
+                    self.backend.sleep(0.8)
+
+            if attachment:
+                check()
+                self.paster.paste_text(attachment, mode=CONFIG["LARGE_PASTE_MODE"],
+                                       chunk_chars=CONFIG["PASTE_CHUNK_CHARS"], check=check)
             
-            # Paste images if any
+            # Paste images if any (usually prepared in the background while the popup was open)
             if images:
-                for i, img in enumerate(images):
-                    print(f"  Pasting image {i+1}/{len(images)}...")
-                    self.set_clipboard_image(img)
-                    time.sleep(0.5)
-                    keyboard.send('ctrl+v')
-                    time.sleep(1.0)
+                with metrics.span("image_prepare", images=len(images)):
+                    prepared = [self.preparer.get(img, timeout=budget(30.0)) for img in images]
+                check()
+                self.paster.paste(prepared, check=check)
             
             # Send
-            keyboard.send('enter')
+            check()
+            with metrics.span("send"):
+                self.backend.send_keys('enter')
             print("Done!")
+
+    @contextlib.contextmanager
+    def _uia_thread(self):
+        """Initialize UIA for the calling worker thread; saves the delay profile afterwards."""
+        uia_init = None
+        auto = load_uiautomation()
+        if auto:
+            try:
+                uia_init = auto.UIAutomationInitializerInThread()
+            except:
+                pass
+        try:
+            yield
         finally:
+            self.delays.save()
             if uia_init:
                 del uia_init
 
-    def show_popup(self):
-        print("Creating popup...")
+    def run_fanout(self, text, images, reuse, attachment=None, targets=2, job=None):
+        """
+        Send the same prompt to several Gemini windows at once (fanout.py),
+        opening pages for any that are missing. Runs on the scheduler worker;
+        returns the per-target report.
+        """
+        from fanout import FanoutDispatcher, build_parts, report_rows
+
+        def check():
+            if job:
+                job.check()
+
+        def budget(timeout):
+            return min(timeout, job.remaining(timeout)) if job else timeout
+
+        print(f"Running fan-out to {targets} windows... (reuse={reuse}, images={len(images) if images else 0})")
+        metrics = self.metrics
+        with self._uia_thread():
+            with metrics.span("image_prepare", images=len(images or [])):
+                prepared = [self.preparer.get(img, timeout=budget(30.0)) for img in images or []]
+            check()
+            parts = build_parts(self.paster, text, attachment or "", prepared,
+                                attach_mode=CONFIG["LARGE_PASTE_MODE"], chunk_chars=CONFIG["PASTE_CHUNK_CHARS"])
+            dispatcher = FanoutDispatcher(
+                self.backend, self.readiness, CONFIG["GEMINI_URL"],
+                focus_timeout=CONFIG["PASTE_DELAY_REUSE"], new_focus_timeout=CONFIG["PASTE_DELAY_NEW"],
+                ready_timeout=CONFIG["READY_TIMEOUT"],
+                waiter=lambda step, ceiling, wait: self.tuned_wait(step, ceiling, wait, budget))
+            with metrics.span("fanout", targets=targets, reuse=reuse):
+                report = dispatcher.dispatch(parts, targets, reuse=reuse, check=check)
+        for entry in report:
+            if entry["seconds"] is not None:
+                metrics.record("fanout_target", entry["seconds"] * 1000)
+        print(f"Fan-out finished ({dispatcher.clipboard_writes} clipboard writes):")
+        for row in report_rows(report):
+            print(row)
+        if not any(entry["seconds"] is not None for entry in report):
+            raise RuntimeError("fan-out reached no window")
+        return report
+
+    def run_api_fanout(self, text, images, targets=2, job=None):
+        """
+        Stream the same prompt from several API sessions at once, each into its
+        own result window. Answers are meant to be compared, so the response
+        cache is neither read nor written. Returns the per-session report.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from fanout import report_rows
+        from imageprep import encode_png
+        from imagestore import pixels
+        from result_window import ResultStream
+        pngs = []
+        for img in images or []:
+            prepared = self.preparer.get(img, timeout=job.remaining(30.0) if job else 30.0)
+            pngs.append(prepared.png or encode_png(pixels(img)))
+        client = self.get_api_client()
+        cancelled = (lambda: job.cancelled) if job else None
+        start = time.perf_counter()
+
+        def session(index):
+            title = f"Gemini API - job {job.id} ({index}/{targets})" if job else f"Gemini API ({index}/{targets})"
+            stream = ResultStream(title)
+            self.dispatcher.post(EventType.SHOW_RESULT, stream)
+            first_chunk = None
+            try:
+                for chunk in client.stream_generate(text, pngs, cancelled=cancelled):
+                    if first_chunk is None:
+                        first_chunk = time.perf_counter() - start
+                    stream.put(chunk)
+                stream.finish()
+            except Exception as e:
+                stream.finish(e)
+                return {"target": index, "seconds": None, "first_chunk": None, "error": str(e)}
+            seconds = time.perf_counter() - start
+            self.metrics.record("fanout_target", seconds * 1000)
+            return {"target": index, "seconds": round(seconds, 3),
+                    "first_chunk": None if first_chunk is None else round(first_chunk, 3), "error": None}
+
+        print(f"Running API fan-out to {targets} sessions...")
+        with ThreadPoolExecutor(max_workers=targets, thread_name_prefix="fanout") as pool:
+            report = list(pool.map(session, range(1, targets + 1)))
+        print("API fan-out finished:")
+        for row in report_rows(report, label="Session"):
+            print(row)
+        if job:
+            job.check()
+        if not any(entry["seconds"] is not None for entry in report):
+            raise RuntimeError(report[0]["error"])
+        return report
+
+    def get_api_client(self):
+        """Create the pooled API client on first use."""
+        if self._api_client is None:
+            from gemini_api import GeminiApiClient, DEFAULT_BASE_URL, DEFAULT_MODEL
+            api_key = CONFIG["GEMINI_API_KEY"] or os.environ.get("GEMINI_API_KEY", "")
+            self._api_client = GeminiApiClient(
+                api_key,
+                model=CONFIG["GEMINI_API_MODEL"] or DEFAULT_MODEL,
+                base_url=CONFIG["GEMINI_API_URL"] or DEFAULT_BASE_URL,
+                timeout=CONFIG["JOB_TIMEOUT"],
+            )
+        return self._api_client
+
+    def run_api(self, text, images, use_cache=True, job=None):
+        """
+        Send the prompt through the Gemini API and stream the reply into a result
+        window. A cached answer to the same prompt and images is shown instead;
+        with use_cache=False the API is always asked and the answer replaces it.
+        """
+        from imageprep import encode_png
+        from imagestore import pixels
+        from result_window import ResultStream
+        stream = ResultStream(f"Gemini API - job {job.id}" if job else "Gemini API")
+        self.dispatcher.post(EventType.SHOW_RESULT, stream)
         try:
-            captured_text = self.capture_text()
-            initial_img = self.get_clipboard_image()
-            screenshot_container = [initial_img]
-            
-            root = tk.Tk()
-            root.title("Gemini Assistant")
-            root.geometry("600x680")
-            root.configure(bg=self.colors['bg'])
-            root.overrideredirect(True)
-            root.attributes("-topmost", True)
-            
-            reuse_var = tk.BooleanVar(value=self.reuse_session)
-            sw, sh = root.winfo_screenwidth(), root.winfo_screenheight()
-            root.geometry(f"+{sw//2-300}+{sh//2-340}")
-
-            title_bar = tk.Frame(root, bg=self.colors['secondary'], height=40)
-            title_bar.pack(fill=tk.X)
-            tk.Label(title_bar, text="GEMINI DESKTOP", bg=self.colors['secondary'], fg=self.colors['accent'], font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=15)
-            tk.Button(title_bar, text="✕", command=root.destroy, bg=self.colors['secondary'], fg=self.colors['fg'], bd=0, padx=15).pack(side=tk.RIGHT)
-
-            main = tk.Frame(root, bg=self.colors['bg'], padx=25, pady=15)
-            main.pack(fill=tk.BOTH, expand=True)
-
-            # Instruction header with history dropdown
-            inst_header = tk.Frame(main, bg=self.colors['bg'])
-            inst_header.pack(fill=tk.X)
-            tk.Label(inst_header, text="INSTRUCTION", bg=self.colors['bg'], fg=self.colors['accent'], font=("Segoe UI", 8, "bold")).pack(side=tk.LEFT)
-            
-            # History dropdown
-            history_items = self.history_manager.get_recent(5)
-            if history_items:
-                history_var = tk.StringVar(value="📜 Recent...")
-                history_menu = ttk.Combobox(inst_header, textvariable=history_var, state="readonly", width=25)
-                history_menu['values'] = ["📜 Recent..."] + [h['instruction'][:40] + "..." if len(h['instruction']) > 40 else h['instruction'] for h in history_items]
-                history_menu.pack(side=tk.RIGHT)
-                
-                def on_history_select(event):
-                    idx = history_menu.current()
-                    if idx > 0:  # Skip the placeholder
-                        desc_entry.delete("1.0", tk.END)
-                        desc_entry.insert("1.0", history_items[idx-1]['instruction'])
-                        history_var.set("📜 Recent...")
-                history_menu.bind("<<ComboboxSelected>>", on_history_select)
-            
-            desc_entry = tk.Text(main, height=3, bg=self.colors['input_bg'], fg=self.colors['fg'], insertbackground='white', font=("Segoe UI", 10), relief='flat', padx=10, pady=8)
-            desc_entry.pack(fill=tk.X, pady=(5, 12))
-            desc_entry.insert("1.0", "")
+            pngs, image_keys = [], []
+            for img in images or []:
+                prepared = self.preparer.get(img, timeout=job.remaining(30.0) if job else 30.0)
+                pngs.append(prepared.png or encode_png(pixels(img)))
+                image_keys.append(prepared.key)
+            client = self.get_api_client()
+            cache = self.response_cache
+            key = None
+            if cache is not None:
+                from responsecache import response_key
+                key = response_key(text, image_keys, client.model)
+                cached = cache.get(key) if use_cache else None
+                if cached is not None:
+                    print(f"  Response cache hit ({cache.hits} hits, {cache.misses} misses)")
+                    stream.cached_age = cache.age(key) or 0.0
+                    stream.put(cached)
+                    stream.finish()
+                    return
+            cancelled = (lambda: job.cancelled) if job else None
+            sent_at = time.perf_counter()
+            chunks = []
+            for chunk in client.stream_generate(text, pngs, cancelled=cancelled):
+                if sent_at is not None:
+                    self.metrics.record("api_first_chunk", (time.perf_counter() - sent_at) * 1000)
+                    sent_at = None
+                stream.put(chunk)
+                chunks.append(chunk)
+                if job:
+                    job.check()
+            if job:
+                job.check()
+            if key is not None:
+                cache.put(key, "".join(chunks))
+            stream.finish()
+        except Exception as e:
+            stream.finish(e)
+            raise
+
+    def submit(self, instruction, content, images, reuse, backend=None, remember=True, use_cache=True,
+               targets=None):
+        """
+        Handle a send from the popup (or an IPC client, with remember=False so the
+        popup's defaults stay put): record history and queue the chosen backend.
+        use_cache=False asks the API even if the answer is cached; targets > 1
+        fans the prompt out to that many windows or API sessions (at most
+        fanout_max_targets). Returns the Job, or None if the queue is full.
+        """
+        backend = backend or self.send_backend
+        targets = max(1, min(int(targets or CONFIG["FANOUT_TARGETS"] or 1), CONFIG["FANOUT_MAX_TARGETS"]))
+        content = self.preprocess(content)
+        attachment = None
+        if backend != "api" and len(content) > CONFIG["LARGE_CONTENT_CHARS"]:
+            # Too big for one clipboard paste: the instruction is typed, the content attached
+            attachment, content = content, ""
+        # Combine instruction and content, avoiding extra newlines
+        if instruction and content:
+            full_text = f"{instruction}\n\n{content}"
+        else:
+            full_text = instruction or content
+        if remember:
+            self.reuse_session = reuse  # Remember for next time
 
-            tk.Label(main, text="CONTENT", bg=self.colors['bg'], fg=self.colors['text_dim'], font=("Segoe UI", 8, "bold")).pack(anchor='w')
-            content_entry = tk.Text(main, height=10, bg=self.colors['secondary'], fg=self.colors['fg'], insertbackground='white', font=("Segoe UI", 9), relief='flat', padx=10, pady=8)
-            content_entry.pack(fill=tk.X, pady=(5, 10))
-            content_entry.insert("1.0", captured_text)
+        # Save instruction to history
+        if instruction:
+            self.history_manager.add(instruction, content or attachment or "")
+        
+        if remember:
+            self.send_backend = backend  # Remember for next time
+        if backend == "api" and targets > 1:
+            scheduler = self.api_scheduler
+            job = scheduler.submit(self.run_api_fanout, full_text, images, targets)
+        elif backend == "api":
+            scheduler = self.api_scheduler
+            job = scheduler.submit(self.run_api, full_text, images, use_cache)
+        elif targets > 1:
+            scheduler = self.scheduler
+            job = scheduler.submit(self.run_fanout, full_text, images, reuse, attachment, targets)
+        else:
+            scheduler = self.scheduler
+            job = scheduler.submit(self.run_automation, full_text, images, reuse, attachment)
+        if job:
+            fanout = f", {targets} targets" if targets > 1 else ""
+            print(f"  Queued {backend} job {job.id} ({scheduler.pending_count()} pending{fanout})")
+        return job
 
-            tk.Checkbutton(main, text="Reuse Gemini Window", variable=reuse_var, bg=self.colors['bg'], fg=self.colors['fg'], selectcolor=self.colors['secondary'], font=("Segoe UI", 9)).pack(anchor='w', pady=(0, 8))
+    def preprocess(self, content):
+        """Run the configured preprocessing stages over the content, reporting what each saved."""
+        if not content or not CONFIG["PREPROCESS_STAGES"]:
+            return content
+        from preprocess import Preprocessor
+        preprocessor = Preprocessor(CONFIG["PREPROCESS_STAGES"], CONFIG["PREPROCESS_MAX_TOKENS"])
+        with self.metrics.span("preprocess", chars=len(content)):
+            content = preprocessor.process(content)
+        for row in preprocessor.report():
+            print(row)
+        return content
 
-            # Image container - now supports multiple images
-            images_list = []
+    def show_popup(self):
+        print("Showing popup...")
+        try:
+            captured_text, initial_img = self.capture_text()
             if initial_img:
-                images_list.append(initial_img)
-            
-            # Image preview frame
-            img_frame = tk.Frame(main, bg=self.colors['bg'])
-            img_frame.pack(fill=tk.X, pady=(0, 8))
-            
-            preview_frame = tk.Frame(img_frame, bg=self.colors['bg'])
-            preview_frame.pack(fill=tk.X)
-            
-            def show_preview(img, root_ref):
-                """Show enlarged preview of an image in a popup."""
-                preview_win = tk.Toplevel(root_ref)
-                preview_win.title("Image Preview")
-                preview_win.configure(bg='#1e1e2e')
-                preview_win.attributes("-topmost", True)
-                
-                # Resize image to fit screen (max 800x600)
-                display_img = img.copy()
-                display_img.thumbnail((800, 600))
-                photo = tk.PhotoImage(data=self._image_to_bytes(display_img))
-                
-                lbl = tk.Label(preview_win, image=photo, bg='#1e1e2e')
-                lbl.image = photo
-                lbl.pack(padx=10, pady=10)
-                
-                # Show size info
-                tk.Label(preview_win, text=f"Size: {img.width} x {img.height} | Click anywhere or press Esc to close", 
-                        bg='#1e1e2e', fg='#6c7086', font=("Segoe UI", 8)).pack(pady=(0, 10))
-                
-                # Center the window
-                preview_win.update_idletasks()
-                w, h = preview_win.winfo_width(), preview_win.winfo_height()
-                sw, sh = preview_win.winfo_screenwidth(), preview_win.winfo_screenheight()
-                preview_win.geometry(f"+{sw//2-w//2}+{sh//2-h//2}")
-                
-                # Close on click or Escape
-                preview_win.bind("<Button-1>", lambda e: preview_win.destroy())
-                preview_win.bind("<Escape>", lambda e: preview_win.destroy())
-            
-            def update_image_preview():
-                # Clear existing previews
-                for widget in preview_frame.winfo_children():
-                    widget.destroy()
-                
-                if not images_list:
-                    tk.Label(preview_frame, text="No images (click 📷 to add)", bg=self.colors['bg'], fg=self.colors['text_dim'], font=("Segoe UI", 8)).pack(side=tk.LEFT)
-                else:
-                    tk.Label(preview_frame, text=f"{len(images_list)} image(s): ", bg=self.colors['bg'], fg=self.colors['success'], font=("Segoe UI", 8, "bold")).pack(side=tk.LEFT)
-                    for i, img in enumerate(images_list):
-                        # Create thumbnail
-                        thumb = img.copy()
-                        thumb.thumbnail((40, 40))
-                        photo = tk.PhotoImage(data=self._image_to_bytes(thumb))
-                        
-                        thumb_frame = tk.Frame(preview_frame, bg=self.colors['secondary'], padx=2, pady=2)
-                        thumb_frame.pack(side=tk.LEFT, padx=2)
-                        
-                        lbl = tk.Label(thumb_frame, image=photo, bg=self.colors['secondary'], cursor="hand2")
-                        lbl.image = photo  # Keep reference
-                        lbl.pack()
-                        
-                        # Left-click to preview
-                        def preview_img(event, image=img):
-                            show_preview(image, root)
-                        lbl.bind("<Button-1>", preview_img)
-                        
-                        # Right-click to remove
-                        def remove_img(event, idx=i):
-                            del images_list[idx]
-                            update_image_preview()
-                        lbl.bind("<Button-3>", remove_img)
-            
-            update_image_preview()
-            
-            # Focus instruction field after window is shown
-            root.after(100, desc_entry.focus_set)
-
-            def refresh_from_clipboard():
-                img = self.get_clipboard_image()
-                if img:
-                    images_list.append(img)
-                    update_image_preview()
-
-            def do_screenshot():
-                root.withdraw()
-                time.sleep(0.3)
-                
-                # Take a screenshot of the entire screen to show as background
-                screen_img = ImageGrab.grab()
-                
-                overlay = tk.Toplevel(root)
-                overlay.attributes("-fullscreen", True, "-topmost", True)
-                overlay.configure(bg='black')
-                
-                # Convert screen to PhotoImage
-                screen_photo = tk.PhotoImage(data=self._image_to_bytes(screen_img))
-                
-                canvas = tk.Canvas(overlay, cursor="cross", highlightthickness=0)
-                canvas.pack(fill="both", expand=True)
-                
-                # Draw the screen image on canvas
-                canvas.create_image(0, 0, anchor='nw', image=screen_photo)
-                canvas.screen_photo = screen_photo  # Keep reference
-                
-                # Variables for selection
-                start_x, start_y = [0], [0]
-                rect_id = [None]
-                
-                def on_press(e):
-                    start_x[0], start_y[0] = e.x, e.y
-                    if rect_id[0]:
-                        canvas.delete(rect_id[0])
-                    rect_id[0] = canvas.create_rectangle(e.x, e.y, e.x, e.y, outline='red', width=2)
-                
-                def on_drag(e):
-                    if rect_id[0]:
-                        canvas.coords(rect_id[0], start_x[0], start_y[0], e.x, e.y)
-                
-                def on_release(e):
-                    x1, y1 = min(start_x[0], e.x), min(start_y[0], e.y)
-                    x2, y2 = max(start_x[0], e.x), max(start_y[0], e.y)
-                    overlay.destroy()
-                    
-                    if x2 - x1 > 10 and y2 - y1 > 10:
-                        # Capture the selected region from the original screenshot
-                        cropped = screen_img.crop((x1, y1, x2, y2))
-                        images_list.append(cropped)
-                        update_image_preview()
-                    
-                    root.deiconify()
-                
-                def on_escape(e):
-                    overlay.destroy()
-                    root.deiconify()
-                
-                canvas.bind("<ButtonPress-1>", on_press)
-                canvas.bind("<B1-Motion>", on_drag)
-                canvas.bind("<ButtonRelease-1>", on_release)
-                overlay.bind("<Escape>", on_escape)
-
-            btn_frame = tk.Frame(main, bg=self.colors['bg'])
-            btn_frame.pack(fill=tk.X)
-            tk.Button(btn_frame, text="📷 ADD SCREENSHOT", command=do_screenshot, bg=self.colors['secondary'], fg=self.colors['fg'], relief='flat', padx=12, pady=8).pack(side=tk.LEFT)
-            tk.Button(btn_frame, text="📋 PASTE IMG", command=refresh_from_clipboard, bg=self.colors['secondary'], fg=self.colors['fg'], relief='flat', padx=12, pady=8).pack(side=tk.LEFT, padx=10)
-            
-            def clear_all_images():
-                images_list.clear()
-                update_image_preview()
-            
-            tk.Button(btn_frame, text="🗑️ CLEAR", command=clear_all_images, bg=self.colors['error'], fg=self.colors['bg'], relief='flat', padx=12, pady=8).pack(side=tk.LEFT)
-            
-            def on_send():
-                instruction = desc_entry.get('1.0', tk.END).strip()
-                content = content_entry.get('1.0', tk.END).strip()
-                # Combine instruction and content, avoiding extra newlines
-                if instruction and content:
-                    full_text = f"{instruction}\n\n{content}"
-                else:
-                    full_text = instruction or content
-                reuse = reuse_var.get()
-                self.reuse_session = reuse  # Remember for next time
-                
-                # Save instruction to history
-                if instruction:
-                    self.history_manager.add(instruction, content)
-                
-                imgs = images_list.copy()  # Copy the list
-                root.destroy()
-                threading.Thread(target=self.run_automation, args=(full_text, imgs, reuse), daemon=True).start()
-
-            tk.Button(btn_frame, text="SEND TO GEMINI", command=on_send, bg=self.colors['accent'], fg=self.colors['bg'], font=("Segoe UI", 9, "bold"), relief='flat', padx=25, pady=8).pack(side=tk.RIGHT)
-            
-            # Keyboard shortcuts hint
-            hint_frame = tk.Frame(main, bg=self.colors['bg'])
-            hint_frame.pack(fill=tk.X, pady=(10, 0))
-            tk.Label(hint_frame, text="💡 Ctrl+Enter: Send | Esc: Close | Right-click image: Remove", 
-                    bg=self.colors['bg'], fg=self.colors['text_dim'], font=("Segoe UI", 8)).pack()
-            
-            # Bind keyboard shortcuts
-            def on_ctrl_enter(event):
-                on_send()
-                return "break"
-            
-            root.bind("<Control-Return>", on_ctrl_enter)
-            root.bind("<Escape>", lambda e: root.destroy())
-            
-            print("  Popup ready.")
-            root.mainloop()
-            print("  Popup closed.")
+                from imagestore import CompactImage
+                # Lets the preparer drop the full-resolution pixels while the popup is open
+                initial_img = CompactImage(initial_img)
+            self.popup.show(captured_text, initial_img)
         except Exception as e:
             print(f"Popup Error: {e}")
             import traceback
@@ -496,17 +689,149 @@ class GeminiDesktopTool:
 
     def on_hotkey(self):
         print(">>> Hotkey triggered! <<<")
-        self.should_show_popup = True
+        self.dispatcher.post(EventType.SHOW_POPUP)
+
+    def on_tray_open(self, icon=None, item=None):
+        self.dispatcher.post(EventType.SHOW_POPUP)
 
     def on_exit(self, icon=None, item=None):
         """Exit the program (can be called from hotkey or tray menu)."""
         print("Exiting...")
-        self.should_exit = True
+        self.dispatcher.post(EventType.EXIT)
+
+    def _handle_show_popup(self, event):
+        latency_ms = (time.perf_counter() - event.posted_at) * 1000
+        print(f"  Dispatch latency: {latency_ms:.1f}ms")
+        self.metrics.record("hotkey", latency_ms)
+        self.show_popup()
+
+    def _handle_show_result(self, event):
+        self.popup.show_result(event.payload)
+
+    def _handle_exit(self, event):
+        # If the Tk loop owns the main thread, this returns control to run()
+        self.popup.close_all()
+
+    # ---- IPC requests (connection threads) ----
+    def handle_request(self, request):
+        """Serve an ipc.py request: ping, show, submit, status or cancel."""
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "warmed_up": self.warmed_up_ms is not None}
+        if op == "show":
+            self.dispatcher.post(EventType.SHOW_POPUP)
+            return {"ok": True}
+        if op == "submit":
+            return self._submit_request(request)
+        if op in ("status", "cancel"):
+            job_id = request.get("job")
+            job = self.scheduler.get(job_id) or self.api_scheduler.get(job_id)
+            if not job:
+                return {"ok": False, "error": f"unknown job {job_id}"}
+            if op == "cancel":
+                job.cancel()
+            elif request.get("wait"):
+                job.wait(request.get("timeout"))
+            return self._job_reply(job)
+        return {"ok": False, "error": f"unknown request {op!r}"}
+
+    def _submit_request(self, request):
+        from PIL import Image
+        from imagestore import CompactImage
+        backend = request.get("backend") or self.send_backend
+        if backend not in ("browser", "api"):
+            return {"ok": False, "error": f"unknown backend {backend!r}"}
+        targets = request.get("targets")
+        if targets is not None and (type(targets) is not int or not 1 <= targets <= CONFIG["FANOUT_MAX_TARGETS"]):
+            return {"ok": False, "error": f"targets must be a number from 1 to {CONFIG['FANOUT_MAX_TARGETS']}"}
+        images = []
+        for path in request.get("images") or []:
+            img = Image.open(path)
+            img.load()
+            images.append(CompactImage(img))
+            del img
+            self.preparer.submit(images[-1])  # Prepared while the job waits in the queue
+        job = self.submit(request.get("instruction") or "", request.get("content") or "", images,
+                          request.get("reuse", self.reuse_session), backend=backend, remember=False,
+                          use_cache=not request.get("bypass_cache"), targets=targets)
+        if not job:
+            return {"ok": False, "error": "job queue full"}
+        if request.get("wait"):
+            job.wait(request.get("timeout"))
+        return self._job_reply(job)
+
+    def _job_reply(self, job):
+        reply = {"ok": True, "job": job.id, "status": job.status.value,
+                 "error": str(job.error) if job.error else None}
+        if job.result is not None:
+            reply["result"] = job.result
+        return reply
+
+    def on_job_status(self, job):
+        """Scheduler callback (any thread): reflect job status in the tray icon."""
+        print(f"  Job {job.id}: {job.status.value}")
+        self.last_job = job
+        icon = self.tray_icon
         if icon:
-            icon.stop()
+            try:
+                icon.title = f"Gemini Desktop Tool - {self._job_status_text()}"
+                icon.update_menu()
+            except Exception as e:
+                print(f"  Tray update failed: {e}")
+
+    def _job_status_text(self, menu_item=None):
+        job = self.scheduler.current or self.last_job
+        pending = self.scheduler.pending_count()
+        if not job:
+            return "No jobs yet"
+        text = f"Job {job.id}: {job.status.value}"
+        if pending:
+            text += f" ({pending} queued)"
+        return text
+
+    def _latency_items(self):
+        """Tray submenu: rolling p50/p95 per stage, rebuilt on every update_menu()."""
+        rows = self.metrics.summary()
+        if not rows:
+            return (item("No measurements yet", None, enabled=False),)
+        return tuple(item(f"{stage}: p50 {p50:.0f}ms / p95 {p95:.0f}ms (n={count})", None, enabled=False)
+                     for stage, count, p50, p95 in rows)
+
+    def _delay_ceilings(self):
+        """Static timeout (upper bound) of each tuned wait step."""
+        return {"window_focus": CONFIG["PASTE_DELAY_REUSE"], "input_focus_reuse": CONFIG["PASTE_DELAY_REUSE"],
+                "page_load": CONFIG["READY_TIMEOUT"], "page_foreground": CONFIG["PASTE_DELAY_NEW"],
+                "input_focus_new": CONFIG["PASTE_DELAY_NEW"]}
+
+    def _delay_items(self):
+        """Tray submenu: the tuned timeout of each wait for the current browser profile."""
+        ceilings = self._delay_ceilings()
+        rows = self.delays.summary(ceilings)
+        if not rows:
+            return (item("No waits recorded yet", None, enabled=False),)
+        return (item(self.delays.profile, None, enabled=False),) + tuple(
+            item(f"{step}: {timeout:.2f}s of {ceilings[step]:.2f}s ({count} waits, {failures} unconfirmed)",
+                 None, enabled=False)
+            for step, count, failures, timeout in rows)
+
+    def _cache_status_text(self, menu_item=None):
+        cache = self._components.get("response_cache")
+        if not cache or not cache.hits + cache.misses:
+            return "Response cache: no lookups yet"
+        return f"Response cache: {cache.hits} hits / {cache.misses} misses"
+
+    def _has_active_jobs(self, menu_item=None):
+        return any(s.current is not None or s.pending_count() > 0
+                   for s in (self.scheduler, self.api_scheduler))
+
+    def on_cancel_jobs(self, icon=None, item=None):
+        print("Cancelling jobs...")
+        self.scheduler.cancel_all()
+        self.api_scheduler.cancel_all()
 
     def create_tray_icon(self):
         """Create a simple icon for the system tray."""
+        from PIL import Image, ImageDraw  # Already loaded by pystray
         # Create a simple colored icon
         size = 64
         img = Image.new('RGB', (size, size), color=(137, 180, 250))  # Gemini-like blue
@@ -518,12 +843,68 @@ class GeminiDesktopTool:
         return img
 
     def run(self):
+        import ipc
+        self.instance_lock = ipc.InstanceLock()
+        if not self.instance_lock.acquire():
+            print("Gemini Tool is already running; opening its popup instead.")
+            try:
+                ipc.request({"op": "show"})
+            except Exception as e:
+                print(f"  Could not reach the running instance: {e}")
+            return
+
         print(f"Gemini Tool Active.")
         print(f"  Trigger: {CONFIG['HOTKEY']}")
         print(f"  Exit: {CONFIG['EXIT_HOTKEY']}")
         print(f"  (Running in system tray)")
         print("-" * 30)
+        self.start()
+        if CONFIG["IPC_ENABLED"]:
+            self.ipc_server = ipc.IpcServer(self.handle_request, ipc.default_endpoints(CONFIG["IPC_PORT"]))
+            self.ipc_server.start()
+
+        # Build the popup once; hotkeys only show/hide it. A hotkey pressed
+        # meanwhile is queued and handled once the dispatcher runs.
+        from popup import PopupController
+        with self.metrics.span("popup_build"):
+            self.popup = PopupController(self, paint_target_ms=CONFIG["POPUP_PAINT_TARGET_MS"],
+                                         large_content_chars=CONFIG["LARGE_CONTENT_CHARS"],
+                                         dedupe_distance=CONFIG["IMAGE_DEDUPE_DISTANCE"])
+
+        # Main loop: block until an event arrives
+        self.dispatcher.on(EventType.SHOW_POPUP, self._handle_show_popup)
+        self.dispatcher.on(EventType.SHOW_RESULT, self._handle_show_result)
+        self.dispatcher.on(EventType.EXIT, self._handle_exit)
+        self.dispatcher.run()
         
+        # Cleanup
+        keyboard.unhook_all()
+        if self.ipc_server:
+            self.ipc_server.close()
+        self.scheduler.shutdown()
+        self.api_scheduler.shutdown()
+        # Only shut down what was actually created
+        if self._components.get("preparer"):
+            self._components["preparer"].shutdown()
+        if self._components.get("history"):
+            self._components["history"].close()
+        if self._components.get("response_cache"):
+            self._components["response_cache"].close()
+        if self._api_client:
+            self._api_client.close()
+        self.metrics.close()
+        try:
+            self.tray_icon.stop()
+        except:
+            pass
+        self._tray_thread.join(timeout=2.0)
+        self.popup.destroy()
+        self.instance_lock.release()
+        print("Exited.")
+
+    def start(self):
+        """The critical startup path: hotkeys and tray, then warm up in the background."""
+        start = time.perf_counter()
         # Register hotkeys
         keyboard.add_hotkey(CONFIG['HOTKEY'], self.on_hotkey, suppress=True)
         keyboard.add_hotkey(CONFIG['EXIT_HOTKEY'], lambda: self.on_exit())
@@ -531,31 +912,24 @@ class GeminiDesktopTool:
         # Create system tray icon
         icon_image = self.create_tray_icon()
         menu = pystray.Menu(
-            item(f"Gemini Tool ({CONFIG['HOTKEY']})", None, enabled=False),
+            item(f"Gemini Tool ({CONFIG['HOTKEY']})", self.on_tray_open, default=True),
+            item(self._job_status_text, None, enabled=False),
+            item('Cancel Jobs', self.on_cancel_jobs, enabled=self._has_active_jobs),
+            item('Latency', pystray.Menu(self._latency_items), visible=self.metrics.enabled),
+            item('Wait Timeouts', pystray.Menu(self._delay_items), visible=CONFIG["ADAPTIVE_DELAYS"]),
+            item(self._cache_status_text, None, enabled=False, visible=bool(CONFIG["RESPONSE_CACHE_MB"])),
             pystray.Menu.SEPARATOR,
             item('Exit', self.on_exit)
         )
         self.tray_icon = pystray.Icon("Gemini Tool", icon_image, "Gemini Desktop Tool", menu)
         
         # Run tray icon in a separate thread
-        tray_thread = threading.Thread(target=self.tray_icon.run, daemon=True)
-        tray_thread.start()
-        
-        # Main loop
-        while not self.should_exit:
-            if self.should_show_popup:
-                self.should_show_popup = False
-                time.sleep(0.2)
-                self.show_popup()
-            time.sleep(0.05)
-        
-        # Cleanup
-        keyboard.unhook_all()
-        try:
-            self.tray_icon.stop()
-        except:
-            pass
-        print("Exited.")
+        self._tray_thread = threading.Thread(target=self.tray_icon.run, daemon=True)
+        self._tray_thread.start()
+        print(f"  Hotkeys and tray ready in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        self._warm_thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        self._warm_thread.start()
 
 if __name__ == "__main__":
     tool = GeminiDesktopTool()
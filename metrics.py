@@ -0,0 +1,134 @@
+"""
+Latency metrics for Gemini Desktop Tool.
+Stages are timed with spans; each finished span is kept in a rolling
+window for p50/p95 and appended to a rotating JSON-lines file by a
+background writer. A disabled Metrics returns a shared no-op span.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_FILE = os.path.join(BASE_DIR, "metrics.jsonl")
+
+_NULL_SPAN = nullcontext()
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class _Span:
+    __slots__ = ("metrics", "stage", "fields", "start")
+
+    def __init__(self, metrics, stage, fields):
+        self.metrics = metrics
+        self.stage = stage
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        self.metrics.record(self.stage, (time.perf_counter() - self.start) * 1000, **self.fields)
+        return False
+
+
+class Metrics:
+    """Span/timer API with rolling per-stage percentiles and a rotating log file."""
+
+    def __init__(self, path=None, enabled=True, window=200, max_bytes=1_000_000, backups=3):
+        self.path = path or METRICS_FILE
+        self.enabled = enabled
+        self.window = window
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._samples = {}  # stage -> deque of ms, in first-seen stage order
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def span(self, stage, **fields):
+        """Context manager timing one stage: with metrics.span("paste_text"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, fields)
+
+    def record(self, stage, ms, **fields):
+        """Record an already measured duration."""
+        if not self.enabled or ms is None:
+            return
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(ms)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="metrics-writer", daemon=True)
+                self._writer.start()
+        self._queue.put(dict(fields, ts=round(time.time(), 3), stage=stage, ms=round(ms, 2)))
+
+    def summary(self):
+        """Return [(stage, count, p50, p95)] over the rolling window."""
+        with self._lock:
+            snapshot = [(stage, list(samples)) for stage, samples in self._samples.items()]
+        return [(stage, len(values), percentile(values, 50), percentile(values, 95))
+                for stage, values in snapshot if values]
+
+    # ---- File output ----
+    def _write_loop(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            lines = [record]
+            # Batch whatever else is queued into one write
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(lines)
+                    return
+                lines.append(record)
+            self._write(lines)
+
+    def _write(self, records):
+        try:
+            self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        except Exception as e:
+            print(f"  Failed to write metrics: {e}")
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def close(self, timeout=2.0):
+        """Flush queued records and stop the writer."""
+        writer = self._writer
+        if writer:
+            self._queue.put(None)
+            writer.join(timeout=timeout)
+            self._writer = None
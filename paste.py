@@ -0,0 +1,132 @@
+"""
+Image paste strategies for Gemini Desktop Tool.
+"batch" stages every prepared image as a temp file and pastes them all
+with one clipboard file-list operation; "per_image" pastes one clipboard
+image at a time. Batch mode falls back to per-image if staging fails.
+Oversized text is attached the same way, as a staged .txt file, or pasted
+in chunks.
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from content import split_chunks
+from metrics import Metrics
+
+STRATEGIES = ("batch", "per_image")
+TEXT_MODES = ("file", "chunks")
+
+
+class ImagePaster:
+    """Pastes PreparedImages (and oversized text) into the focused window through a backend."""
+
+    def __init__(self, backend, strategy="batch", settle=1.0, batch_settle_per_image=0.1,
+                 staging_root=None, keep_staged=300.0, metrics=None):
+        if strategy not in STRATEGIES:
+            print(f"  Unknown paste strategy '{strategy}', using per_image")
+            strategy = "per_image"
+        self.backend = backend
+        self.strategy = strategy
+        self.settle = settle
+        self.batch_settle_per_image = batch_settle_per_image
+        self.staging_root = staging_root or os.path.join(tempfile.gettempdir(), "gemini_desktop_paste")
+        # Staged files must outlive the paste: the browser may read them lazily
+        self.keep_staged = keep_staged
+        self.metrics = metrics or Metrics(enabled=False)
+
+    def paste(self, prepared, check=None):
+        """Paste all images in order. Returns the strategy actually used."""
+        if not prepared:
+            return None
+        if self.strategy == "batch" and len(prepared) > 1:
+            try:
+                paths = self.stage_files(prepared)
+                self.backend.set_clipboard_files(paths)
+            except Exception as e:
+                print(f"  Batch staging failed ({e}), pasting images one by one")
+            else:
+                print(f"  Pasting {len(paths)} images in one batch...")
+                with self.metrics.span("image_paste", strategy="batch", images=len(paths)):
+                    self.backend.send_keys('ctrl+v')
+                    self.backend.sleep(self.settle + self.batch_settle_per_image * (len(paths) - 1))
+                return "batch"
+        self._paste_each(prepared, check)
+        return "per_image"
+
+    def _paste_each(self, prepared, check):
+        for i, item in enumerate(prepared):
+            if check:
+                check()
+            print(f"  Pasting image {i+1}/{len(prepared)}...")
+            with self.metrics.span("image_paste", strategy="per_image", index=i + 1):
+                self.backend.set_clipboard_image(item)
+                self.backend.send_keys('ctrl+v')
+                self.backend.sleep(self.settle)
+
+    def paste_text(self, text, mode="file", chunk_chars=20000, chunk_settle=0.3, check=None):
+        """Paste oversized text as a .txt attachment or in chunks. Returns the mode used."""
+        if mode == "file":
+            try:
+                path = self.stage_text(text)
+                self.backend.set_clipboard_files([path])
+            except Exception as e:
+                print(f"  Staging text attachment failed ({e}), pasting in chunks")
+            else:
+                print(f"  Attaching {len(text):,} characters as {os.path.basename(path)}...")
+                with self.metrics.span("text_attach", mode="file", chars=len(text)):
+                    self.backend.send_keys('ctrl+v')
+                    self.backend.sleep(self.settle)
+                return "file"
+        pieces = split_chunks(text, chunk_chars)
+        with self.metrics.span("text_attach", mode="chunks", chars=len(text)):
+            for i, piece in enumerate(pieces):
+                if check:
+                    check()
+                print(f"  Pasting text chunk {i+1}/{len(pieces)}...")
+                self.backend.set_clipboard_text(piece)
+                self.backend.send_keys('ctrl+v')
+                self.backend.sleep(chunk_settle)
+        return "chunks"
+
+    def stage_text(self, text):
+        """Write text to a fresh staging directory as content.txt; returns its path."""
+        return self._stage_folder_file("content.txt", text.encode("utf-8"))
+
+    def _stage_folder_file(self, name, data):
+        self._cleanup_stale()
+        os.makedirs(self.staging_root, exist_ok=True)
+        folder = tempfile.mkdtemp(prefix="text_", dir=self.staging_root)
+        path = os.path.join(folder, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def stage_files(self, prepared):
+        """Write prepared PNG payloads to a fresh staging directory, in order."""
+        self._cleanup_stale()
+        os.makedirs(self.staging_root, exist_ok=True)
+        folder = tempfile.mkdtemp(prefix="batch_", dir=self.staging_root)
+        paths = []
+        for i, item in enumerate(prepared):
+            if not item.png:
+                raise ValueError("batch paste needs PNG payloads")
+            path = os.path.join(folder, f"image_{i+1:02d}.png")
+            with open(path, 'wb') as f:
+                f.write(item.png)
+            paths.append(path)
+        return paths
+
+    def _cleanup_stale(self):
+        try:
+            entries = os.listdir(self.staging_root)
+        except OSError:
+            return
+        cutoff = time.time() - self.keep_staged
+        for name in entries:
+            path = os.path.join(self.staging_root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
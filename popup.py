@@ -0,0 +1,569 @@
+"""
+Popup window for Gemini Desktop Tool.
+The widget tree is built once at startup and then shown/hidden with
+deiconify/withdraw, so a hotkey only has to reset state, not rebuild UI.
+"""
+import queue
+import time
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from content import LargeContent, format_size
+from imagestore import CompactImage, pixels
+from result_window import ResultWindow
+from screenshot import RegionSelector
+from thumbnails import ThumbnailCache
+
+HISTORY_PLACEHOLDER = "📜 Recent..."
+SUGGESTION_LIMIT = 6
+# Keys that move around or select rather than change the instruction text
+_NAV_KEYS = {"Up", "Down", "Left", "Right", "Return", "Escape", "Tab", "Home", "End",
+             "Prior", "Next", "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+SEND_BACKENDS = {"browser": "via Browser", "api": "via Gemini API"}
+
+
+class _Thumb:
+    """One entry in the image strip."""
+
+    def __init__(self, img, frame, label):
+        self.img = img
+        self.frame = frame
+        self.label = label
+        self.identity = None  # Set once hashed, see ImageStrip._drain_ready
+
+
+class ImageStrip:
+    """
+    Row of image thumbnails that adds and removes single entries in place.
+    Thumbnails are rendered by a ThumbnailCache off the UI thread and shown
+    when ready; the resulting PhotoImages are cached by content hash.
+    An image that duplicates one already in the strip is passed to on_duplicate.
+    """
+
+    def __init__(self, parent, tool, on_preview, on_remove, thumbnails, max_photos=64,
+                 on_duplicate=None, dedupe_distance=4):
+        self.tool = tool
+        self.colors = tool.colors
+        self.on_preview = on_preview
+        self.on_remove = on_remove
+        self.on_duplicate = on_duplicate or on_remove
+        self.dedupe_distance = dedupe_distance
+        self.thumbnails = thumbnails
+        self.max_photos = max_photos
+        self.frame = tk.Frame(parent, bg=self.colors['bg'])
+        self.frame.pack(fill=tk.X)
+        self.status_label = tk.Label(self.frame, bg=self.colors['bg'], font=("Segoe UI", 8))
+        self.status_label.pack(side=tk.LEFT)
+        self.entries = []
+        self._photos = OrderedDict()  # content hash -> PhotoImage
+        self._ready = queue.Queue()
+        w, h = thumbnails.size
+        self._placeholder = tk.PhotoImage(width=w, height=h)
+        self.frame.winfo_toplevel().bind("<<ThumbsReady>>", lambda e: self._drain_ready(), add="+")
+        self._update_status()
+
+    def _update_status(self):
+        if not self.entries:
+            self.status_label.config(text="No images (click 📷 to add)", fg=self.colors['text_dim'],
+                                     font=("Segoe UI", 8))
+        else:
+            self.status_label.config(text=f"{len(self.entries)} image(s): ", fg=self.colors['success'],
+                                     font=("Segoe UI", 8, "bold"))
+
+    def add(self, img):
+        """Append one thumbnail without touching the existing ones."""
+        thumb_frame = tk.Frame(self.frame, bg=self.colors['secondary'], padx=2, pady=2)
+        thumb_frame.pack(side=tk.LEFT, padx=2)
+        lbl = tk.Label(thumb_frame, image=self._placeholder, bg=self.colors['secondary'], cursor="hand2")
+        lbl.pack()
+
+        entry = _Thumb(img, thumb_frame, lbl)
+        # Left-click to preview, right-click to remove
+        lbl.bind("<Button-1>", lambda e: self.on_preview(img))
+        lbl.bind("<Button-3>", lambda e: self.on_remove(self.index_of(entry)))
+        self.entries.append(entry)
+        self._update_status()
+        self.thumbnails.request(pixels(img), lambda identity, data: self._on_rendered(entry, identity, data))
+
+    def _on_rendered(self, entry, identity, data):
+        # Worker thread: hand the result to the Tk thread
+        self._ready.put((entry, identity, data))
+        try:
+            self.frame.event_generate("<<ThumbsReady>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _drain_ready(self):
+        while True:
+            try:
+                entry, identity, data = self._ready.get_nowait()
+            except queue.Empty:
+                return
+            if entry not in self.entries:
+                continue
+            entry.identity = identity
+            if self._drop_duplicate(entry):
+                continue
+            key = identity.key
+            photo = self._photos.get(key)
+            if photo is None:
+                photo = tk.PhotoImage(data=data, format="PPM")
+                self._photos[key] = photo
+                while len(self._photos) > self.max_photos:
+                    self._photos.popitem(last=False)
+            else:
+                self._photos.move_to_end(key)
+            entry.label.config(image=photo)
+            entry.label.image = photo  # Keep reference
+
+    def _drop_duplicate(self, entry):
+        """Drop the later of entry and an image it duplicates; True if entry was dropped."""
+        for other in self.entries:
+            if other is entry or other.identity is None:
+                continue
+            if entry.identity.is_duplicate(other.identity, self.dedupe_distance):
+                later = max(entry, other, key=self.index_of)
+                self.on_duplicate(self.index_of(later))
+                return later is entry
+        return False
+
+    def index_of(self, entry):
+        return self.entries.index(entry)
+
+    def remove(self, idx):
+        """Remove the thumbnail at idx."""
+        entry = self.entries.pop(idx)
+        entry.frame.destroy()
+        self._update_status()
+
+    def clear(self):
+        for entry in self.entries:
+            entry.frame.destroy()
+        self.entries = []
+        self._update_status()
+
+
+class PopupController:
+    """Long-lived popup window, built once and reused for every hotkey."""
+
+    def __init__(self, tool, paint_target_ms=100, large_content_chars=100000, dedupe_distance=4):
+        self.tool = tool
+        self.colors = tool.colors
+        self.paint_target_ms = paint_target_ms
+        # Captured text beyond this is shown as a preview and kept in large_content
+        self.large_content_chars = large_content_chars
+        self.dedupe_distance = dedupe_distance
+        self.large_content = None
+        self.images_list = []  # CompactImages
+        self._image_peak_bytes = 0
+        self.history_items = []
+        self._suggestions = []
+        self.last_paint_ms = None
+        self._shown_at = None
+        self._visible = False
+        self._in_loop = False
+        self.result_windows = []
+        self.thumbnails = ThumbnailCache(size=(40, 40), disk=tool.image_cache)
+
+        start = time.perf_counter()
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self._build()
+        print(f"  Popup built in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    def _build(self):
+        root = self.root
+        colors = self.colors
+        root.title("Gemini Assistant")
+        root.geometry("600x680")
+        root.configure(bg=colors['bg'])
+        root.overrideredirect(True)
+        root.attributes("-topmost", True)
+        sw, sh = root.winfo_screenwidth(), root.winfo_screenheight()
+        root.geometry(f"+{sw//2-300}+{sh//2-340}")
+
+        self.reuse_var = tk.BooleanVar(value=self.tool.reuse_session)
+
+        title_bar = tk.Frame(root, bg=colors['secondary'], height=40)
+        title_bar.pack(fill=tk.X)
+        tk.Label(title_bar, text="GEMINI DESKTOP", bg=colors['secondary'], fg=colors['accent'], font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=15)
+        tk.Button(title_bar, text="✕", command=self.hide, bg=colors['secondary'], fg=colors['fg'], bd=0, padx=15).pack(side=tk.RIGHT)
+
+        main = tk.Frame(root, bg=colors['bg'], padx=25, pady=15)
+        main.pack(fill=tk.BOTH, expand=True)
+
+        # Instruction header with history dropdown
+        inst_header = tk.Frame(main, bg=colors['bg'])
+        inst_header.pack(fill=tk.X)
+        tk.Label(inst_header, text="INSTRUCTION", bg=colors['bg'], fg=colors['accent'], font=("Segoe UI", 8, "bold")).pack(side=tk.LEFT)
+
+        self.history_var = tk.StringVar(value=HISTORY_PLACEHOLDER)
+        self.history_menu = ttk.Combobox(inst_header, textvariable=self.history_var, state="readonly", width=25)
+        self.history_menu.bind("<<ComboboxSelected>>", self._on_history_select)
+        self._history_values = None
+
+        self.desc_entry = tk.Text(main, height=3, bg=colors['input_bg'], fg=colors['fg'], insertbackground='white', font=("Segoe UI", 10), relief='flat', padx=10, pady=8, undo=True)
+        self.desc_entry.pack(fill=tk.X, pady=(5, 12))
+        self.desc_entry.bind("<KeyRelease>", self._on_instruction_key)
+        self.desc_entry.bind("<Down>", self._focus_suggestions)
+        self.desc_entry.bind("<Escape>", self._escape_suggestions)
+
+        # Type-ahead suggestions from history; packed under the entry only when non-empty
+        self.suggestion_list = tk.Listbox(main, height=SUGGESTION_LIMIT, bg=colors['secondary'], fg=colors['fg'],
+                                          selectbackground=colors['accent'], selectforeground=colors['bg'],
+                                          font=("Segoe UI", 9), relief='flat', activestyle='none')
+        self.suggestion_list.bind("<Return>", self._accept_suggestion)
+        self.suggestion_list.bind("<ButtonRelease-1>", self._accept_suggestion)
+        self.suggestion_list.bind("<Escape>", self._escape_suggestions)
+        self.suggestion_list.bind("<Up>", self._suggestion_up)
+        self._suggestion_job = None
+
+        content_header = tk.Frame(main, bg=colors['bg'])
+        content_header.pack(fill=tk.X)
+        tk.Label(content_header, text="CONTENT", bg=colors['bg'], fg=colors['text_dim'], font=("Segoe UI", 8, "bold")).pack(side=tk.LEFT)
+        # Shown only in large-content mode
+        self.large_clear = tk.Button(content_header, text="✕ Clear", command=self.clear_large_content, bg=colors['secondary'], fg=colors['fg'], bd=0, padx=8)
+        self.large_label = tk.Label(content_header, text="", bg=colors['bg'], fg=colors['warning'], font=("Segoe UI", 8))
+        self.content_entry = tk.Text(main, height=10, bg=colors['secondary'], fg=colors['fg'], insertbackground='white', font=("Segoe UI", 9), relief='flat', padx=10, pady=8, undo=True)
+        self.content_entry.pack(fill=tk.X, pady=(5, 10))
+
+        tk.Checkbutton(main, text="Reuse Gemini Window", variable=self.reuse_var, bg=colors['bg'], fg=colors['fg'], selectcolor=colors['secondary'], font=("Segoe UI", 9)).pack(anchor='w', pady=(0, 8))
+
+        # Image preview strip
+        img_frame = tk.Frame(main, bg=colors['bg'])
+        img_frame.pack(fill=tk.X, pady=(0, 8))
+        self.image_strip = ImageStrip(img_frame, self.tool, self.show_preview, self.remove_image, self.thumbnails,
+                                      on_duplicate=self.remove_duplicate,
+                                      dedupe_distance=self.dedupe_distance)
+
+        btn_frame = tk.Frame(main, bg=colors['bg'])
+        btn_frame.pack(fill=tk.X)
+        tk.Button(btn_frame, text="📷 ADD SCREENSHOT", command=self.do_screenshot, bg=colors['secondary'], fg=colors['fg'], relief='flat', padx=12, pady=8).pack(side=tk.LEFT)
+        tk.Button(btn_frame, text="📋 PASTE IMG", command=self.refresh_from_clipboard, bg=colors['secondary'], fg=colors['fg'], relief='flat', padx=12, pady=8).pack(side=tk.LEFT, padx=10)
+        tk.Button(btn_frame, text="🗑️ CLEAR", command=self.clear_all_images, bg=colors['error'], fg=colors['bg'], relief='flat', padx=12, pady=8).pack(side=tk.LEFT)
+        tk.Button(btn_frame, text="SEND TO GEMINI", command=self.on_send, bg=colors['accent'], fg=colors['bg'], font=("Segoe UI", 9, "bold"), relief='flat', padx=25, pady=8).pack(side=tk.RIGHT)
+        self.backend_var = tk.StringVar(value=SEND_BACKENDS.get(self.tool.send_backend, SEND_BACKENDS["browser"]))
+        ttk.Combobox(btn_frame, textvariable=self.backend_var, values=list(SEND_BACKENDS.values()), state="readonly", width=14).pack(side=tk.RIGHT, padx=(0, 8))
+
+        # Keyboard shortcuts hint
+        hint_frame = tk.Frame(main, bg=colors['bg'])
+        hint_frame.pack(fill=tk.X, pady=(10, 0))
+        tk.Label(hint_frame, text="💡 Ctrl+Enter: Send (+Shift: skip API cache) | Esc: Close | Right-click image: Remove",
+                 bg=colors['bg'], fg=colors['text_dim'], font=("Segoe UI", 8)).pack()
+
+        # Bind keyboard shortcuts
+        def on_ctrl_enter(event):
+            self.on_send()
+            return "break"
+
+        def on_ctrl_shift_enter(event):
+            self.on_send(use_cache=False)
+            return "break"
+
+        root.bind("<Control-Return>", on_ctrl_enter)
+        root.bind("<Control-Shift-Return>", on_ctrl_shift_enter)
+        root.bind("<Escape>", lambda e: self.hide())
+        root.bind("<Map>", self._on_map)
+        # Events posted while the popup owns the main thread are drained here
+        root.bind("<<Dispatch>>", lambda e: self.tool.dispatcher.dispatch_pending())
+        root.protocol("WM_DELETE_WINDOW", self.hide)
+
+    # ---- History ----
+    def _refresh_history(self):
+        """Update combobox values only when the history actually changed."""
+        self.history_items = self.tool.history_manager.get_recent(5)
+        values = tuple(h['instruction'][:40] + "..." if len(h['instruction']) > 40 else h['instruction'] for h in self.history_items)
+        if values == self._history_values:
+            return
+        self._history_values = values
+        if values:
+            self.history_menu['values'] = (HISTORY_PLACEHOLDER,) + values
+            if not self.history_menu.winfo_ismapped():
+                self.history_menu.pack(side=tk.RIGHT)
+        else:
+            self.history_menu.pack_forget()
+
+    def _on_history_select(self, event):
+        idx = self.history_menu.current()
+        if idx > 0:  # Skip the placeholder
+            self.desc_entry.delete("1.0", tk.END)
+            self.desc_entry.insert("1.0", self.history_items[idx-1]['instruction'])
+            self.history_var.set(HISTORY_PLACEHOLDER)
+
+    # ---- Type-ahead ----
+    def _on_instruction_key(self, event):
+        if event.keysym in _NAV_KEYS:
+            return
+        # Coalesce bursts of keystrokes into one search once Tk is idle
+        if self._suggestion_job is None:
+            self._suggestion_job = self.root.after_idle(self._update_suggestions)
+
+    def _update_suggestions(self):
+        self._suggestion_job = None
+        query = self.desc_entry.get("1.0", tk.END).strip()
+        matches = self.tool.search_index.search(query, limit=SUGGESTION_LIMIT)
+        if not matches:
+            self.hide_suggestions()
+            return
+        self.suggestion_list.delete(0, tk.END)
+        for instruction in matches:
+            self.suggestion_list.insert(tk.END, instruction.replace("\n", " ")[:90])
+        self._suggestions = matches
+        self.suggestion_list.config(height=len(matches))
+        if not self.suggestion_list.winfo_ismapped():
+            self.suggestion_list.pack(fill=tk.X, pady=(0, 12), after=self.desc_entry)
+
+    def hide_suggestions(self):
+        self._suggestions = []
+        if self.suggestion_list.winfo_ismapped():
+            self.suggestion_list.pack_forget()
+
+    def _focus_suggestions(self, event):
+        if not self.suggestion_list.winfo_ismapped():
+            return None
+        self.suggestion_list.focus_set()
+        self.suggestion_list.selection_clear(0, tk.END)
+        self.suggestion_list.selection_set(0)
+        self.suggestion_list.activate(0)
+        return "break"
+
+    def _suggestion_up(self, event):
+        if self.suggestion_list.curselection() == (0,):
+            self.desc_entry.focus_set()
+            return "break"
+        return None
+
+    def _accept_suggestion(self, event):
+        selection = self.suggestion_list.curselection()
+        if selection:
+            self.desc_entry.delete("1.0", tk.END)
+            self.desc_entry.insert("1.0", self._suggestions[selection[0]])
+        self.hide_suggestions()
+        self.desc_entry.focus_set()
+        return "break"
+
+    def _escape_suggestions(self, event):
+        """Esc closes the suggestion list first, the popup second."""
+        if not self.suggestion_list.winfo_ismapped():
+            return None
+        self.hide_suggestions()
+        self.desc_entry.focus_set()
+        return "break"
+
+    # ---- Images ----
+    def add_image(self, img):
+        stored = img if isinstance(img, CompactImage) else CompactImage(img)
+        del img  # The preparer compacts stored; don't pin the pixels here
+        self.images_list.append(stored)
+        self.tool.preparer.submit(stored)
+        self.image_strip.add(stored)
+        self._image_peak_bytes = max(self._image_peak_bytes, self.image_bytes())
+
+    def image_bytes(self):
+        """Memory currently held by the attached images."""
+        return sum(stored.nbytes for stored in self.images_list)
+
+    def _report_image_memory(self):
+        if self._image_peak_bytes:
+            print(f"  Images: {len(self.images_list)} attached, {format_size(self.image_bytes())} held,"
+                  f" session peak {format_size(self._image_peak_bytes)}")
+
+    def remove_image(self, idx):
+        del self.images_list[idx]
+        self.image_strip.remove(idx)
+
+    def remove_duplicate(self, idx):
+        print("  Image already attached, skipped")
+        self.remove_image(idx)
+
+    def clear_all_images(self):
+        self.images_list.clear()
+        self.image_strip.clear()
+
+    def refresh_from_clipboard(self):
+        img = self.tool.get_clipboard_image()
+        if img:
+            self.add_image(img)
+
+    def show_preview(self, img):
+        """Show enlarged preview of an image in a popup."""
+        preview_win = tk.Toplevel(self.root)
+        preview_win.title("Image Preview")
+        preview_win.configure(bg='#1e1e2e')
+        preview_win.attributes("-topmost", True)
+
+        # Resize image to fit screen (max 800x600); a compacted image is decoded just for this
+        photo = tk.PhotoImage(data=self.tool._image_to_bytes(img.preview((800, 600))))
+
+        lbl = tk.Label(preview_win, image=photo, bg='#1e1e2e')
+        lbl.image = photo
+        lbl.pack(padx=10, pady=10)
+
+        # Show size info
+        tk.Label(preview_win, text=f"Size: {img.width} x {img.height} | Click anywhere or press Esc to close",
+                 bg='#1e1e2e', fg='#6c7086', font=("Segoe UI", 8)).pack(pady=(0, 10))
+
+        # Center the window
+        preview_win.update_idletasks()
+        w, h = preview_win.winfo_width(), preview_win.winfo_height()
+        sw, sh = preview_win.winfo_screenwidth(), preview_win.winfo_screenheight()
+        preview_win.geometry(f"+{sw//2-w//2}+{sh//2-h//2}")
+
+        # Close on click or Escape
+        preview_win.bind("<Button-1>", lambda e: preview_win.destroy())
+        preview_win.bind("<Escape>", lambda e: preview_win.destroy())
+
+    def do_screenshot(self):
+        root = self.root
+        root.withdraw()
+        root.update_idletasks()
+        time.sleep(0.3)
+
+        def on_done(cropped):
+            if cropped is not None:
+                self.add_image(cropped)
+            root.deiconify()
+
+        RegionSelector(root, on_done, grab=self.tool.backend.grab_screen).start()
+
+    # ---- Lifecycle ----
+    def reset(self, captured_text, initial_img=None):
+        """Reset all per-trigger state without rebuilding widgets."""
+        self.desc_entry.delete("1.0", tk.END)
+        self.desc_entry.edit_reset()
+        self.hide_suggestions()
+        self.clear_large_content()
+        if len(captured_text) > self.large_content_chars:
+            self.set_large_content(captured_text)
+        else:
+            self.content_entry.insert("1.0", captured_text)
+        self.content_entry.edit_reset()
+        self.reuse_var.set(self.tool.reuse_session)
+        self.history_var.set(HISTORY_PLACEHOLDER)
+        self._refresh_history()
+        self.clear_all_images()
+        self._image_peak_bytes = 0
+        if initial_img:
+            self.add_image(initial_img)
+
+    # ---- Large content ----
+    def set_large_content(self, text):
+        """Show a bounded, read-only preview; the full text is sent from the side buffer."""
+        self.large_content = LargeContent(text)
+        self.content_entry.insert("1.0", self.large_content.preview())
+        self.content_entry.config(state=tk.DISABLED)
+        self.large_label.config(text=f"Large content: {self.large_content.summary()} (preview; full text is sent)")
+        self.large_clear.pack(side=tk.RIGHT)
+        self.large_label.pack(side=tk.RIGHT, padx=8)
+        print(f"  Large content mode: {self.large_content.summary()}")
+
+    def clear_large_content(self):
+        self.large_content = None
+        self.content_entry.config(state=tk.NORMAL)
+        self.content_entry.delete("1.0", tk.END)
+        self.large_label.pack_forget()
+        self.large_clear.pack_forget()
+
+    def show(self, captured_text, initial_img=None, triggered_at=None):
+        """Reset, show and run the event loop until the popup is hidden."""
+        if self._visible:
+            # Already open (e.g. triggered while a result window owns the loop)
+            self.root.lift()
+            return
+        self._shown_at = triggered_at or time.perf_counter()
+        self.last_paint_ms = None
+        self.reset(captured_text, initial_img)
+        initial_img = None  # Held compactly in images_list from here on
+        self._visible = True
+        self.root.deiconify()
+        self.root.lift()
+        self.root.after(100, self.desc_entry.focus_force)
+        print("  Popup ready.")
+        self.run_ui()
+
+    def run_ui(self):
+        """Run the Tk loop until neither the popup nor a result window is open."""
+        if self._in_loop:
+            # Called from an event dispatched inside the running loop
+            return
+        self._in_loop = True
+        self.tool.dispatcher.set_wakeup(self._wake)
+        try:
+            self.tool.dispatcher.dispatch_pending()
+            self.root.mainloop()
+        finally:
+            self.tool.dispatcher.set_wakeup(None)
+            self._in_loop = False
+
+    def _maybe_quit(self):
+        if not self._visible and not self.result_windows:
+            self.root.quit()
+
+    def show_result(self, stream):
+        """Open a window that shows a streamed response."""
+        self.result_windows.append(ResultWindow(self.root, self.colors, stream, on_close=self._on_result_closed))
+        self.run_ui()
+
+    def _on_result_closed(self, window):
+        if window in self.result_windows:
+            self.result_windows.remove(window)
+        self._maybe_quit()
+
+    def close_all(self):
+        """Hide the popup and close every result window (used on exit)."""
+        for window in list(self.result_windows):
+            window.close()
+        self.hide()
+        if self._in_loop:
+            self.root.quit()
+
+    def _wake(self):
+        """Called from other threads to make the Tk loop dispatch queued events."""
+        self.root.event_generate("<<Dispatch>>", when="tail")
+
+    def _on_map(self, event):
+        if event.widget is self.root and self._shown_at is not None and self.last_paint_ms is None:
+            # Idle callbacks run after pending redraws, i.e. after the first paint
+            self.root.after_idle(self._record_paint)
+
+    def _record_paint(self):
+        if self._shown_at is None:
+            return
+        self.last_paint_ms = (time.perf_counter() - self._shown_at) * 1000
+        self._shown_at = None
+        self.tool.metrics.record("popup_paint", self.last_paint_ms)
+        status = "OK" if self.last_paint_ms <= self.paint_target_ms else "over target"
+        print(f"  Time to first paint: {self.last_paint_ms:.0f}ms (target {self.paint_target_ms}ms, {status})")
+
+    def hide(self):
+        """Withdraw the popup; the loop ends once no result window is open."""
+        if not self._visible:
+            return
+        self._visible = False
+        self.hide_suggestions()
+        self.root.withdraw()
+        # Sent images were handed over in on_send; release the rest now, not on the next hotkey
+        self._report_image_memory()
+        self.clear_all_images()
+        print("  Popup closed.")
+        self._maybe_quit()
+
+    def on_send(self, use_cache=True):
+        instruction = self.desc_entry.get('1.0', tk.END).strip()
+        if self.large_content:
+            content = self.large_content.text.strip()
+        else:
+            content = self.content_entry.get('1.0', tk.END).strip()
+        imgs = self.images_list.copy()  # Copy the list
+        reuse = self.reuse_var.get()
+        labels = {label: name for name, label in SEND_BACKENDS.items()}
+        backend = labels.get(self.backend_var.get(), "browser")
+        self.hide()
+        self.tool.submit(instruction, content, imgs, reuse, backend=backend, use_cache=use_cache)
+
+    def destroy(self):
+        self.thumbnails.shutdown()
+        try:
+            self.root.destroy()
+        except tk.TclError:
+            pass
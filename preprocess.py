@@ -0,0 +1,301 @@
+"""
+Content preprocessing for Gemini Desktop Tool.
+Captured text is cleaned up before it is sent. The default stages don't
+change what the text says: terminal escape codes and control characters
+are removed, trailing whitespace stripped and runs of blank lines cut to
+one. Opt-in stages go further: squeezing runs of spaces, folding repeated
+(or, for logs, nearly identical) lines, and cutting the result to a token
+budget keeping its start and end. Each stage is a generator over blocks of
+whole lines, so multi-megabyte captures stream through in bounded pieces,
+and each reports the bytes it saved and its time.
+"""
+import re
+import time
+from collections import deque
+
+from content import CHARS_PER_TOKEN, format_size
+
+BLOCK_CHARS = 64 * 1024
+ANSI_RE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+OVERWRITE_RE = re.compile(r"^[^\n]*\r(?=[^\r\n])", re.MULTILINE)  # Text redrawn after a bare carriage return
+CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), *range(0x0b, 0x20), 0x7f])  # Tab and newline kept
+DIGITS = str.maketrans("0123456789", "##########")
+DEFAULT_STAGES = ("control", "trailing", "blank_lines")  # Lossless
+STAGES = ("control", "trailing", "blank_lines", "spaces", "duplicates", "similar", "budget")
+
+
+def iter_blocks(text, size=BLOCK_CHARS):
+    """
+    Split text into blocks of about size chars, each a run of whole lines
+    ending in a newline (one is added to the last line if missing).
+    """
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start + size)
+        if end < 0:
+            block = text[start:]
+            yield block if block.endswith("\n") else block + "\n"
+            return
+        yield text[start:end + 1]
+        start = end + 1
+
+
+def strip_control(blocks):
+    """
+    Drop ANSI escape sequences and control characters (tabs kept). Of a line
+    redrawn with carriage returns (progress bars) only the last state is kept.
+    """
+    for block in blocks:
+        if "\x1b" in block:
+            block = ANSI_RE.sub("", block)
+        if "\r" in block:
+            block = block.replace("\r\n", "\n")
+            if "\r" in block:
+                block = OVERWRITE_RE.sub("", block)
+        yield block.translate(CONTROL_CHARS)
+
+
+def _squeeze(line):
+    """Collapse runs of spaces and tabs after the indentation."""
+    body = line.lstrip()
+    return line[:len(line) - len(body)] + " ".join(body.split())
+
+
+def strip_trailing(blocks):
+    """Strip trailing spaces and tabs from every line."""
+    for block in blocks:
+        yield "\n".join([line.rstrip(" \t") for line in block.split("\n")])
+
+
+def squeeze_spaces(blocks):
+    """
+    Collapse runs of spaces and tabs after the indentation. Opt-in: it also
+    changes string literals and aligned tables.
+    """
+    for block in blocks:
+        yield "\n".join([_squeeze(line) if "  " in line or "\t" in line else line for line in block.split("\n")])
+
+
+def limit_blank_lines(blocks):
+    """Keep at most one blank line in a row, and none at the start."""
+    tail = "\n\n"  # Last two chars emitted; no blank lines at the start
+    for block in blocks:
+        while "\n\n\n" in block:
+            block = block.replace("\n\n\n", "\n\n")
+        if tail == "\n\n":
+            block = block.lstrip("\n")
+        elif block.startswith("\n\n"):
+            block = "\n" + block.lstrip("\n")
+        if block:
+            tail = (tail + block)[-2:]
+            yield block
+
+
+def fold_duplicates(blocks, min_run=3, similar=False):
+    """
+    Replace runs of a repeated line with the line and a count. With similar
+    (meant for logs), runs of at least min_run lines that only differ in
+    their digits (timestamps, ids) are folded too, keeping the first and last
+    around a count. Runs are folded only where the marker is shorter than
+    what it replaces.
+    """
+    first = key = last = None
+    count = replaced = 0  # Lines in the run after first; chars of those before last
+    exact = True
+    pending = []  # The run verbatim, until it is sure to fold
+
+    def flush():
+        if exact:
+            marker = f"[previous line repeated {count} more time{'s' if count > 1 else ''}]"
+            kept, saved = [], replaced + len(last) + 1
+        else:
+            marker = f"[... {count - 1} similar line{'s' if count > 2 else ''} ...]"
+            kept = [last]
+            saved = replaced if count + 1 >= min_run else 0
+        if count and len(marker) < saved:
+            return [first, marker] + kept
+        return pending
+
+    for block in blocks:
+        out = []
+        body = block[:-1]
+        lines = body.split("\n")
+        for line, line_key in zip(lines, body.translate(DIGITS).split("\n") if similar else lines):
+            if line_key == key:
+                if count:
+                    replaced += len(last) + 1
+                count += 1
+                exact = exact and line == first
+                last = line
+                if pending is not None:
+                    pending.append(line)
+                    if replaced > 64 and count + 1 >= min_run:
+                        pending = None  # Sure to fold: no need to hold the lines
+                continue
+            if first is not None:
+                out += flush()
+            first, key, last = line, line_key, line
+            count = replaced = 0
+            exact = True
+            pending = [line]
+        if out:
+            yield "\n".join(out) + "\n"
+    if first is not None:
+        yield "\n".join(flush()) + "\n"
+
+
+def truncate_to_budget(blocks, max_tokens, tail_share=0.25):
+    """
+    Keep whole lines up to about max_tokens: the start of the text and, in a
+    bounded buffer, its end (tail_share of the budget), with a marker for the
+    lines cut from the middle.
+    """
+    if not max_tokens:
+        yield from blocks
+        return
+    budget = max_tokens * CHARS_PER_TOKEN
+    tail_budget = int(budget * tail_share)
+    head_left = budget - tail_budget
+    blocks = iter(blocks)
+    tail = deque()
+    for block in blocks:
+        if len(block) <= head_left:
+            head_left -= len(block)
+            yield block
+            continue
+        cut = block.rfind("\n", 0, head_left) + 1
+        if cut:
+            yield block[:cut]
+        tail.append(block[cut:])
+        break
+    else:
+        return
+    tail_chars = len(tail[0])
+    dropped = dropped_chars = 0
+    for block in blocks:
+        tail.append(block)
+        tail_chars += len(block)
+        while len(tail) > 1 and tail_chars - len(tail[0]) >= tail_budget:
+            removed = tail.popleft()
+            tail_chars -= len(removed)
+            dropped += removed.count("\n")
+            dropped_chars += len(removed)
+    # Trim the oldest kept block to whole lines within the budget
+    excess = tail_chars - tail_budget
+    if excess > 0:
+        oldest = tail[0]
+        cut = oldest.find("\n", excess - 1) + 1
+        dropped += oldest.count("\n", 0, cut)
+        dropped_chars += cut
+        tail[0] = oldest[cut:]
+    if dropped:
+        yield (f"[... {dropped:,} lines (~{dropped_chars // CHARS_PER_TOKEN:,} tokens) "
+               f"omitted to fit the {max_tokens:,} token budget ...]\n")
+    yield from tail
+
+
+class StageStats:
+    """What one stage did: bytes and lines in and out, and its own time (upstream stages excluded)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.lines_in = 0
+        self.lines_out = 0
+        self.seconds = 0.0
+
+    @property
+    def saved(self):
+        return self.bytes_in - self.bytes_out
+
+    def __repr__(self):
+        return (f"{self.name}: -{format_size(self.saved)} "
+                f"({self.lines_in}->{self.lines_out} lines) in {self.seconds * 1000:.1f}ms")
+
+
+def _size(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8", "replace"))
+
+
+def _metered(stage, upstream, stats):
+    """
+    Yield stage(upstream), counting its output. stats.seconds is the time
+    spent pulling from it, which includes upstream stages; Preprocessor
+    subtracts those once the run is over.
+    """
+    output = stage(upstream)
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                block = next(output)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            stats.bytes_out += _size(block)
+            stats.lines_out += block.count("\n")
+            yield block
+    finally:
+        stats.seconds = elapsed
+
+
+class Preprocessor:
+    """Runs the configured stages over a text; stats of the last run are kept in .stats."""
+
+    def __init__(self, stages=DEFAULT_STAGES, max_tokens=0):
+        unknown = [name for name in stages if name not in STAGES]
+        if unknown:
+            print(f"  Unknown preprocess stages ignored: {', '.join(unknown)}")
+        self.stages = [name for name in stages if name in STAGES]
+        self.max_tokens = max_tokens
+        self.stats = []
+
+    def _factories(self):
+        return {
+            "control": strip_control,
+            "trailing": strip_trailing,
+            "blank_lines": limit_blank_lines,
+            "spaces": squeeze_spaces,
+            "duplicates": fold_duplicates,
+            "similar": lambda blocks: fold_duplicates(blocks, similar=True),
+            "budget": lambda blocks: truncate_to_budget(blocks, self.max_tokens),
+        }
+
+    def blocks(self, text):
+        """Generator over the processed text in blocks; stats are complete once it is exhausted."""
+        factories = self._factories()
+        source = StageStats("input")
+        self.stats = []
+        blocks = _metered(lambda blocks: blocks, iter_blocks(text), source)
+        for name in self.stages:
+            stats = StageStats(name)
+            self.stats.append(stats)
+            blocks = _metered(factories[name], blocks, stats)
+        yield from blocks
+        # Each stage's input is the previous stage's output; its time excludes upstream stages
+        upstream = source.seconds
+        previous = source
+        for stats in self.stats:
+            stats.bytes_in, stats.lines_in = previous.bytes_out, previous.lines_out
+            stats.seconds, upstream = stats.seconds - upstream, stats.seconds
+            previous = stats
+
+    def process(self, text):
+        if not self.stages or not text:
+            self.stats = []
+            return text
+        return "".join(self.blocks(text)).rstrip("\n")
+
+    def report(self):
+        """One console line per stage plus the total."""
+        if not self.stats:
+            return []
+        before, after = self.stats[0].bytes_in, self.stats[-1].bytes_out
+        total_ms = sum(s.seconds for s in self.stats) * 1000
+        rows = [f"  Preprocessed content: {format_size(before)} -> {format_size(after)} "
+                f"({(before - after) / max(before, 1):.0%} smaller) in {total_ms:.0f}ms"]
+        rows += [f"    {s!r}" for s in self.stats]
+        return rows
@@ -0,0 +1,233 @@
+"""
+Readiness detection for Gemini Desktop Tool.
+Waits on real window conditions (existence, title change, foreground,
+input focus) with bounded exponential backoff instead of fixed sleeps.
+"""
+import threading
+
+GEMINI_TITLE_PATTERNS = ("Gemini", "gemini.google.com")
+
+
+def wait_until(condition, timeout, clock, sleep, initial_delay=0.01, max_delay=0.25, backoff=2.0):
+    """
+    Poll condition() until it returns a truthy value or the deadline passes.
+    Returns the condition's value, or None on timeout.
+    """
+    deadline = clock() + timeout
+    delay = initial_delay
+    while True:
+        result = condition()
+        if result:
+            return result
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return None
+        sleep(min(delay, remaining))
+        delay = min(delay * backoff, max_delay)
+
+
+class WindowTracker:
+    """
+    Remembers the last Gemini window so a lookup costs one IsWindow and one
+    title read; the full EnumWindows scan only runs on a miss. Where the
+    backend reports window create/title events, they feed changed().
+    """
+
+    def __init__(self, backend, matches):
+        self.backend = backend
+        self.matches = matches
+        self.hwnd = None
+        self.hits = 0
+        self.misses = 0
+        self._changed = set()
+        self._lock = threading.Lock()
+        self._unsubscribe = None
+
+    @property
+    def subscribed(self):
+        return self._unsubscribe is not None
+
+    def subscribe(self):
+        """Start following window events; returns False if the backend can't."""
+        if self._unsubscribe is None:
+            try:
+                self._unsubscribe = self.backend.watch_windows(self._on_window_event)
+            except Exception as e:
+                print(f"  Window events unavailable: {e}")
+        return self.subscribed
+
+    def unsubscribe(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _on_window_event(self, event, hwnd):
+        # Runs on the backend's event thread
+        with self._lock:
+            if event == "destroy":
+                self._changed.discard(hwnd)
+                if hwnd == self.hwnd:
+                    self.hwnd = None
+            else:
+                self._changed.add(hwnd)
+
+    def changed(self):
+        """Return and forget the windows created or retitled since the last call."""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def remember(self, hwnd):
+        self.hwnd = hwnd
+
+    def is_match(self, hwnd):
+        return bool(hwnd) and self.backend.is_window(hwnd) and self.matches(self.backend.get_title(hwnd))
+
+    def find(self):
+        """Return the cached window if it still matches, else scan for one."""
+        if self.is_match(self.hwnd):
+            self.hits += 1
+            return self.hwnd
+        self.misses += 1
+        self.hwnd = next(iter(self.scan()), None)
+        return self.hwnd
+
+    def scan(self):
+        """Full scan: {hwnd: title} of every matching window, in z-order."""
+        result = {}
+        for hwnd in self.backend.list_windows():
+            title = self.backend.get_title(hwnd)
+            if self.matches(title):
+                result[hwnd] = title
+        return result
+
+
+class ReadinessEngine:
+    """Event-driven replacement for the fixed focus/paste delays."""
+
+    def __init__(self, backend, patterns=GEMINI_TITLE_PATTERNS,
+                 initial_delay=0.01, max_delay=0.25, stale_grace=2.0,
+                 scan_interval=0.5, window_events=True):
+        self.backend = backend
+        self.patterns = patterns
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        # After this long, an unchanged matching window in the foreground is accepted
+        self.stale_grace = stale_grace
+        # Without window events, new windows are only discovered by a full scan this often
+        self.scan_interval = scan_interval
+        self.tracker = WindowTracker(backend, self.matches)
+        if window_events:
+            self.tracker.subscribe()
+
+    def _wait(self, condition, timeout):
+        return wait_until(condition, timeout, self.backend.monotonic, self.backend.sleep,
+                          initial_delay=self.initial_delay, max_delay=self.max_delay)
+
+    def matches(self, title):
+        return any(p in title for p in self.patterns)
+
+    def find_window(self):
+        """Return the last used Gemini window if still valid, else the first match."""
+        return self.tracker.find()
+
+    def snapshot(self):
+        """Return {hwnd: title} for every currently matching window."""
+        self.tracker.changed()  # Only events after the snapshot are interesting
+        return self.tracker.scan()
+
+    def wait_for_window(self, timeout, baseline=None):
+        """
+        Wait for a matching window that is new, or whose title changed,
+        compared to the baseline snapshot taken before opening the page.
+        """
+        backend = self.backend
+        tracker = self.tracker
+        baseline = baseline or {}
+        start = backend.monotonic()
+        transitioned = set()
+        last_scan = [start]
+
+        def candidates():
+            # The foreground window and the baseline are cheap to check every
+            # poll; new windows come from events, or a periodic full scan
+            hwnds = [backend.get_foreground()]
+            if tracker.subscribed:
+                hwnds.extend(tracker.changed())
+            elif backend.monotonic() - last_scan[0] >= self.scan_interval:
+                hwnds.extend(backend.list_windows())
+                last_scan[0] = backend.monotonic()
+            hwnds.extend(baseline)
+            seen = set()
+            return [h for h in hwnds if h and not (h in seen or seen.add(h)) and backend.is_window(h)]
+
+        def condition():
+            stale = None
+            for hwnd in candidates():
+                title = backend.get_title(hwnd)
+                if not self.matches(title):
+                    if hwnd in baseline:
+                        transitioned.add(hwnd)
+                    continue
+                if hwnd not in baseline or hwnd in transitioned or title != baseline[hwnd]:
+                    return hwnd
+                stale = hwnd
+            if stale and backend.monotonic() - start >= self.stale_grace \
+                    and backend.get_foreground() == stale:
+                return stale
+            return None
+
+        hwnd = self._wait(condition, timeout)
+        if hwnd:
+            tracker.remember(hwnd)
+            print(f"  Gemini window ready after {backend.monotonic() - start:.2f}s")
+        else:
+            print("  Timeout waiting for Gemini window")
+        return hwnd
+
+    def wait_for_foreground(self, hwnd, timeout):
+        """Bring the window to the foreground and wait until the OS confirms it."""
+        backend = self.backend
+
+        def condition():
+            if not backend.is_window(hwnd):
+                return None
+            if backend.get_foreground() == hwnd:
+                return True
+            if backend.is_minimized(hwnd):
+                backend.restore(hwnd)
+            backend.set_foreground(hwnd)
+            return None
+
+        return bool(self._wait(condition, timeout))
+
+    def input_point(self, hwnd):
+        """Screen coordinates of the Gemini input box (bottom center of the window)."""
+        left, top, right, bottom = self.backend.get_rect(hwnd)
+        return left + (right - left) // 2, bottom - 160
+
+    def wait_for_input_focus(self, hwnd, timeout):
+        """
+        Click the input area, then wait until keyboard focus is confirmed inside
+        the window. Focus there may be on the address bar or the sidebar, so the
+        input box is always clicked first; where the backend can tell (UI
+        Automation), focus must also be in a text field of the page.
+        """
+        backend = self.backend
+        x, y = self.input_point(hwnd)
+        clicked_at = [None]
+
+        def condition():
+            if clicked_at[0] is not None and backend.has_input_focus(hwnd) \
+                    and backend.focus_in_editable(hwnd) is not False:
+                return True
+            now = backend.monotonic()
+            # Re-click at most every max_delay, the first click usually suffices
+            if clicked_at[0] is None or now - clicked_at[0] >= self.max_delay:
+                if backend.get_foreground() != hwnd:
+                    backend.set_foreground(hwnd)
+                backend.click(x, y)
+                clicked_at[0] = now
+            return None
+
+        return bool(self._wait(condition, timeout))
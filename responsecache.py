@@ -0,0 +1,130 @@
+"""
+Response cache for Gemini Desktop Tool.
+Answers from the Gemini API are stored in a small SQLite database keyed by
+a hash of the model, the normalized prompt text and the content hashes of
+the attached images, so resending the same prompt shows the earlier answer
+at once. Entries expire after a TTL; beyond the size cap the least recently
+used are evicted.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from imagecache import cache_key
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = os.path.join(BASE_DIR, "responses.db")
+
+
+def normalize_prompt(text):
+    """Ignore line endings, trailing spaces and surrounding blank lines."""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip()
+
+
+def response_key(text, image_keys=(), model=""):
+    return cache_key("response", model, normalize_prompt(text), *image_keys)
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache of response text, bounded by total size and entry count."""
+
+    def __init__(self, path=None, max_bytes=16 * 1024 * 1024, max_entries=2000, ttl=24 * 3600.0,
+                 clock=time.time):
+        self.path = path or CACHE_FILE
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, response TEXT NOT NULL,
+            created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._count, self._total = self._totals()
+
+    def _totals(self):
+        return self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    def get(self, key):
+        """Cached response text, or None (counted as a miss) if absent or expired."""
+        now = self.clock()
+        with self._lock:
+            row = self._db.execute("SELECT response, created, size FROM responses WHERE key = ?",
+                                   (key,)).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                self._total -= row[2]
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def age(self, key):
+        """Seconds since key was stored, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+        return self.clock() - row[0] if row else None
+
+    def put(self, key, response):
+        size = len(response.encode("utf-8"))
+        if not response or size > self.max_bytes:
+            return
+        now = self.clock()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                             (key, response, now, now, size))
+            self._count += 0 if old else 1
+            self._total += size - (old[0] if old else 0)
+            if self._count > self.max_entries or self._total > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now):
+        """Drop expired entries, then least recently used ones until within both caps."""
+        if self.ttl:
+            self.evicted += self._db.execute("DELETE FROM responses WHERE created < ?",
+                                             (now - self.ttl,)).rowcount
+        count, total = self._totals()
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self.evicted += len(stale)
+        self._count, self._total = count, total
+
+    def stats(self):
+        return {"entries": self._count, "bytes": self._total, "hits": self.hits, "misses": self.misses,
+                "expired": self.expired, "evicted": self.evicted}
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._count, self._total = 0, 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        return self.stats()["entries"]
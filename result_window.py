@@ -0,0 +1,118 @@
+"""
+Result window for Gemini Desktop Tool.
+Shows a response as it streams in from a backend thread. The worker puts
+text into a ResultStream; the Tk thread drains it on a virtual event.
+"""
+import queue
+import time
+import tkinter as tk
+
+
+def format_age(seconds):
+    if seconds < 90:
+        return f"{seconds:.0f}s"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+class ResultStream:
+    """Thread-safe hand-off of streamed response text to the UI."""
+
+    def __init__(self, title="Gemini"):
+        self.title = title
+        self.started_at = time.perf_counter()
+        self.cached_age = None  # Seconds, when the answer came from the response cache
+        self._queue = queue.Queue()
+        self._listener = None
+
+    def put(self, text):
+        self._queue.put(("text", text))
+        self._notify()
+
+    def finish(self, error=None):
+        self._queue.put(("done", error))
+        self._notify()
+
+    def set_listener(self, callback):
+        """Called from any thread whenever new items are queued."""
+        self._listener = callback
+        self._notify()
+
+    def _notify(self):
+        listener = self._listener
+        if listener:
+            try:
+                listener()
+            except (tk.TclError, RuntimeError):
+                pass
+
+    def drain(self):
+        """Yield (kind, value) items queued so far, without blocking."""
+        while True:
+            try:
+                yield self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+class ResultWindow:
+    """Toplevel window that appends streamed text as it arrives."""
+
+    def __init__(self, root, colors, stream, on_close=None):
+        self.stream = stream
+        self.on_close = on_close
+        self.colors = colors
+        self.first_chunk_ms = None
+
+        self.win = tk.Toplevel(root)
+        self.win.title(stream.title)
+        self.win.geometry("640x480")
+        self.win.configure(bg=colors['bg'])
+        self.win.attributes("-topmost", True)
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+        self.win.bind("<Escape>", lambda e: self.close())
+
+        self.text = tk.Text(self.win, wrap='word', bg=colors['secondary'], fg=colors['fg'],
+                            insertbackground='white', font=("Segoe UI", 10), relief='flat', padx=10, pady=8)
+        self.text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+
+        bottom = tk.Frame(self.win, bg=colors['bg'])
+        bottom.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.status = tk.Label(bottom, text="Waiting for response...", bg=colors['bg'],
+                               fg=colors['text_dim'], font=("Segoe UI", 8))
+        self.status.pack(side=tk.LEFT)
+        tk.Button(bottom, text="Close", command=self.close, bg=colors['secondary'], fg=colors['fg'],
+                  relief='flat', padx=12, pady=4).pack(side=tk.RIGHT)
+        tk.Button(bottom, text="📋 Copy", command=self.copy, bg=colors['secondary'], fg=colors['fg'],
+                  relief='flat', padx=12, pady=4).pack(side=tk.RIGHT, padx=6)
+
+        self.win.bind("<<ResultChunk>>", lambda e: self._drain())
+        stream.set_listener(lambda: self.win.event_generate("<<ResultChunk>>", when="tail"))
+
+    def _drain(self):
+        for kind, value in self.stream.drain():
+            elapsed = time.perf_counter() - self.stream.started_at
+            if kind == "text":
+                if self.first_chunk_ms is None:
+                    self.first_chunk_ms = elapsed * 1000
+                    self.status.config(text=f"Streaming... (first chunk after {self.first_chunk_ms:.0f}ms)")
+                self.text.insert(tk.END, value)
+                self.text.see(tk.END)
+            elif value is not None:
+                self.status.config(text=f"Error: {value}", fg=self.colors['error'])
+            elif self.stream.cached_age is not None:
+                self.status.config(text=f"Cached answer from {format_age(self.stream.cached_age)} ago "
+                                        f"(Ctrl+Shift+Enter in the popup asks again)", fg=self.colors['success'])
+            else:
+                self.status.config(text=f"Done in {elapsed:.1f}s", fg=self.colors['success'])
+
+    def copy(self):
+        self.win.clipboard_clear()
+        self.win.clipboard_append(self.text.get("1.0", tk.END).rstrip())
+
+    def close(self):
+        self.stream.set_listener(None)
+        self.win.destroy()
+        if self.on_close:
+            self.on_close(self)
@@ -0,0 +1,220 @@
+"""
+Automation job scheduler for Gemini Desktop Tool.
+A single worker runs automation jobs one at a time from a bounded queue,
+so back-to-back sends never race on the clipboard or the keyboard.
+"""
+import itertools
+import queue
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from enum import Enum
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class JobTimeout(Exception):
+    """Raised inside a job when its deadline has passed."""
+
+
+class ClipboardOwner:
+    """Process-wide clipboard ownership: only the holder may touch the clipboard."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.owner = None
+
+    @contextmanager
+    def hold(self, owner, timeout=None):
+        """Acquire exclusive clipboard ownership; raises TimeoutError if busy."""
+        acquired = self._lock.acquire(timeout=-1 if timeout is None else timeout)
+        if not acquired:
+            raise TimeoutError(f"Clipboard busy (held by {self.owner})")
+        previous = self.owner
+        self.owner = owner
+        try:
+            yield
+        finally:
+            self.owner = previous
+            self._lock.release()
+
+
+class Job:
+    """One queued automation run."""
+
+    def __init__(self, job_id, func, args, timeout):
+        self.id = job_id
+        self.func = func
+        self.args = args
+        self.timeout = timeout
+        self.status = JobStatus.QUEUED
+        self.error = None
+        self.result = None  # What func returned, e.g. a fan-out's per-target report
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.deadline = None
+        self._cancel = threading.Event()
+        self._done = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def remaining(self, default=None):
+        """Seconds left before the deadline (default if the job has no deadline)."""
+        if self.deadline is None:
+            return default
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise if the job was cancelled or ran out of time. Call between steps."""
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise JobTimeout(f"Job {self.id} timed out after {self.timeout}s")
+
+    def wait(self, timeout=None):
+        """Block until the job finished; returns True if it did."""
+        return self._done.wait(timeout)
+
+    def __repr__(self):
+        return f"<Job {self.id} {self.status.value}>"
+
+
+class AutomationScheduler:
+    """Single-worker scheduler with a bounded job queue. Pass clipboard=None for jobs that don't paste."""
+
+    def __init__(self, clipboard, max_queue=8, default_timeout=60.0, on_status=None, keep_finished=50,
+                 ids=None, name="automation"):
+        self.clipboard = clipboard
+        self.keep_finished = keep_finished
+        self.default_timeout = default_timeout
+        self.on_status = on_status
+        self.jobs = {}
+        self.current = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Schedulers may share an id counter so job ids stay unique across them
+        self._ids = ids or itertools.count(1)
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._worker = threading.Thread(target=self._run, name=f"{name}-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, func, *args, timeout=None):
+        """Queue func(*args, job=job). Returns the Job, or None if the queue is full."""
+        with self._lock:
+            if self._stopping:
+                print("  Scheduler stopped, dropping job")
+                return None
+            job = Job(next(self._ids), func, args, timeout or self.default_timeout)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                print(f"  Job queue full, dropping job {job.id}")
+                return None
+            self.jobs[job.id] = job
+        self._notify(job)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job and job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+            job.cancel()
+            return True
+        return False
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+
+    def pending_count(self):
+        return self._queue.qsize()
+
+    def shutdown(self, wait=True, timeout=5.0):
+        """Cancel everything and stop the worker; doesn't block on a full queue."""
+        drained = []
+        with self._lock:
+            # No submit can refill the queue once it is drained, so the sentinel fits
+            self._stopping = True
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    drained.append(job)
+            self._queue.put_nowait(None)
+        for job in drained:
+            job.cancel()
+            self._finish(job, JobStatus.CANCELLED)
+        self.cancel_all()
+        if wait:
+            self._worker.join(timeout)
+
+    def _notify(self, job):
+        if self.on_status:
+            try:
+                self.on_status(job)
+            except Exception as e:
+                print(f"  Job status callback failed: {e}")
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        job._done.set()
+        self._notify(job)
+        self._prune()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond keep_finished."""
+        with self._lock:
+            finished = [j for j in self.jobs.values() if j._done.is_set()]
+            for job in finished[:max(0, len(finished) - self.keep_finished)]:
+                del self.jobs[job.id]
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.cancelled:
+                self._finish(job, JobStatus.CANCELLED)
+                continue
+
+            self.current = job
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            job.deadline = time.monotonic() + job.timeout
+            self._notify(job)
+            try:
+                # Jobs that never touch the clipboard (clipboard=None) skip ownership
+                hold = self.clipboard.hold(f"job {job.id}", timeout=job.timeout) if self.clipboard else nullcontext()
+                with hold:
+                    job.result = job.func(*job.args, job=job)
+                self._finish(job, JobStatus.DONE)
+            except JobCancelled as e:
+                print(f"  {e}")
+                self._finish(job, JobStatus.CANCELLED)
+            except Exception as e:
+                print(f"  Job {job.id} failed: {e}")
+                self._finish(job, JobStatus.FAILED, e)
+            finally:
+                self.current = None
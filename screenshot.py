@@ -0,0 +1,143 @@
+"""
+Screen region selection for Gemini Desktop Tool.
+The overlay shows a display-sized copy of the desktop, blitted straight
+into a PhotoImage (no PNG round-trip), and crops the full-resolution grab
+when the selection is released. It covers the whole virtual desktop, so
+every monitor can be selected.
+"""
+import ctypes
+import sys
+import tkinter as tk
+from PIL import Image, ImageGrab
+
+try:
+    from PIL import ImageTk
+except ImportError:
+    ImageTk = None
+
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+
+
+def virtual_screen_bounds(root):
+    """Return (x, y, width, height) of the desktop spanning all monitors."""
+    if sys.platform == "win32":
+        try:
+            metrics = ctypes.windll.user32.GetSystemMetrics
+            x, y = metrics(SM_XVIRTUALSCREEN), metrics(SM_YVIRTUALSCREEN)
+            w, h = metrics(SM_CXVIRTUALSCREEN), metrics(SM_CYVIRTUALSCREEN)
+            if w and h:
+                return x, y, w, h
+        except Exception as e:
+            print(f"  Virtual screen query failed: {e}")
+    try:
+        return (root.winfo_vrootx(), root.winfo_vrooty(),
+                root.winfo_vrootwidth(), root.winfo_vrootheight())
+    except tk.TclError:
+        return 0, 0, root.winfo_screenwidth(), root.winfo_screenheight()
+
+
+def grab_screen():
+    """Grab every monitor at full (physical pixel) resolution."""
+    try:
+        return ImageGrab.grab(all_screens=True)
+    except TypeError:
+        # Older Pillow without multi-monitor support
+        return ImageGrab.grab()
+
+
+def display_buffer(img, width, height):
+    """Return an RGB image of exactly width x height for on-screen display."""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if img.size != (width, height):
+        img = img.resize((width, height), Image.BILINEAR, reducing_gap=2.0)
+    return img
+
+
+def ppm_bytes(img):
+    """Wrap raw RGB pixels in a PPM header; no compression step involved."""
+    header = f"P6 {img.width} {img.height} 255\n".encode("ascii")
+    return header + img.tobytes()
+
+
+def photo_from_image(img, master=None):
+    """Build a Tk PhotoImage from an RGB image without a PNG encode/decode."""
+    if ImageTk is not None:
+        try:
+            return ImageTk.PhotoImage(img, master=master)
+        except Exception:
+            pass
+    return tk.PhotoImage(master=master, data=ppm_bytes(img), format="PPM")
+
+
+class RegionSelector:
+    """Full-desktop overlay that lets the user drag out a region."""
+
+    def __init__(self, root, on_done, min_size=10, grab=grab_screen):
+        self.root = root
+        self.on_done = on_done
+        self.min_size = min_size
+        self.grab = grab
+
+    def start(self):
+        root = self.root
+        vx, vy, vw, vh = virtual_screen_bounds(root)
+        screen_img = self.grab()
+        # The grab is in physical pixels; the overlay is in Tk (logical) pixels
+        scale_x = screen_img.width / vw
+        scale_y = screen_img.height / vh
+
+        overlay = tk.Toplevel(root)
+        overlay.overrideredirect(True)
+        overlay.geometry(f"{vw}x{vh}+{vx}+{vy}")
+        overlay.attributes("-topmost", True)
+        overlay.configure(bg='black')
+
+        screen_photo = photo_from_image(display_buffer(screen_img, vw, vh), master=overlay)
+
+        canvas = tk.Canvas(overlay, cursor="cross", highlightthickness=0, width=vw, height=vh)
+        canvas.pack(fill="both", expand=True)
+        canvas.create_image(0, 0, anchor='nw', image=screen_photo)
+        canvas.screen_photo = screen_photo  # Keep reference
+
+        start_x, start_y = [0], [0]
+        rect_id = [None]
+        state = {"img": screen_img}
+
+        def finish(region):
+            # Drop the full-screen buffers as soon as the overlay goes away
+            img = state.pop("img", None)
+            canvas.screen_photo = None
+            overlay.destroy()
+            cropped = img.crop(region) if (img is not None and region) else None
+            img = None  # Free the full-screen grab before on_done keeps the crop
+            self.on_done(cropped)
+
+        def on_press(e):
+            start_x[0], start_y[0] = e.x, e.y
+            if rect_id[0]:
+                canvas.delete(rect_id[0])
+            rect_id[0] = canvas.create_rectangle(e.x, e.y, e.x, e.y, outline='red', width=2)
+
+        def on_drag(e):
+            if rect_id[0]:
+                canvas.coords(rect_id[0], start_x[0], start_y[0], e.x, e.y)
+
+        def on_release(e):
+            x1, y1 = min(start_x[0], e.x), min(start_y[0], e.y)
+            x2, y2 = max(start_x[0], e.x), max(start_y[0], e.y)
+            if x2 - x1 > self.min_size and y2 - y1 > self.min_size:
+                # Map the display selection back onto the full-resolution grab
+                finish((round(x1 * scale_x), round(y1 * scale_y),
+                        round(x2 * scale_x), round(y2 * scale_y)))
+            else:
+                finish(None)
+
+        canvas.bind("<ButtonPress-1>", on_press)
+        canvas.bind("<B1-Motion>", on_drag)
+        canvas.bind("<ButtonRelease-1>", on_release)
+        overlay.bind("<Escape>", lambda e: finish(None))
+        overlay.focus_force()
@@ -0,0 +1,204 @@
+"""
+Type-ahead search over instruction history for Gemini Desktop Tool.
+Prefix matching uses a sorted word index, fuzzy matching a trigram index;
+results are ranked by frecency (use count x recency decay). The index is
+updated incrementally as HistoryManager records new entries.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _words(text):
+    return _WORD_RE.findall(text.lower())
+
+
+def _trigrams(text):
+    text = f"  {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _timestamp(value):
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _Doc:
+    __slots__ = ("id", "instruction", "lower", "count", "last_used", "words", "trigrams", "alive", "rank")
+
+    def __init__(self, doc_id, instruction):
+        self.id = doc_id
+        self.instruction = instruction
+        self.lower = instruction.lower()
+        self.words = set(_words(instruction))
+        self.trigrams = _trigrams(instruction)
+        self.count = 0
+        self.last_used = 0.0
+        self.alive = True
+        self.rank = 0.0
+
+
+class HistorySearchIndex:
+    """Incremental prefix + fuzzy index over history entries, ranked by frecency."""
+
+    def __init__(self, half_life_days=7.0, fuzzy_threshold=0.5, max_fuzzy_postings=4, max_fuzzy_candidates=1000):
+        self.half_life = half_life_days * 86400
+        self.fuzzy_threshold = fuzzy_threshold
+        # Only the rarest query trigrams are used to gather fuzzy candidates,
+        # and only the most recently added of those are scored
+        self.max_fuzzy_postings = max_fuzzy_postings
+        self.max_fuzzy_candidates = max_fuzzy_candidates
+        self._docs = {}  # instruction -> _Doc
+        self._by_id = []
+        self._words = []  # sorted distinct words
+        self._word_postings = {}  # word -> set(doc_id)
+        self._trigram_postings = {}  # trigram -> set(doc_id)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    # ---- Maintenance ----
+    def attach(self, history_manager):
+        """
+        Index the manager's current entries and follow future changes. Changes
+        made during the rebuild wait on the index lock and are applied after it.
+        """
+        history_manager.subscribe(self._on_history_change)
+        with self._lock:
+            self.rebuild(history_manager.history)
+
+    def _on_history_change(self, event, payload=None):
+        if event == "add":
+            self.add(payload)
+        elif event == "remove":
+            self.discard(payload)
+        elif event == "clear":
+            self.clear()
+
+    def rebuild(self, entries):
+        with self._lock:
+            self.clear()
+            # Defer sorting the word list to one pass instead of an insort per word
+            self._words = None
+            for entry in reversed(entries):
+                self.add(entry)
+            self._words = sorted(self._word_postings)
+
+    def clear(self):
+        with self._lock:
+            self._docs = {}
+            self._by_id = []
+            self._words = []
+            self._word_postings = {}
+            self._trigram_postings = {}
+
+    def add(self, entry):
+        """Add or update one history entry; O(words + trigrams) plus sorted inserts."""
+        instruction = entry['instruction']
+        with self._lock:
+            doc = self._docs.get(instruction)
+            if doc is None:
+                doc = _Doc(len(self._by_id), instruction)
+                self._docs[instruction] = doc
+                self._by_id.append(doc)
+                for word in doc.words:
+                    postings = self._word_postings.get(word)
+                    if postings is None:
+                        postings = self._word_postings[word] = set()
+                        if self._words is not None:
+                            insort(self._words, word)
+                    postings.add(doc.id)
+                for gram in doc.trigrams:
+                    self._trigram_postings.setdefault(gram, set()).add(doc.id)
+            doc.count = max(doc.count + 1, entry.get('count', 1))
+            doc.last_used = max(doc.last_used, _timestamp(entry.get('timestamp')))
+            doc.rank = self._log_frecency(doc)
+
+    def discard(self, instruction):
+        """Hide an entry (e.g. trimmed from history) without reindexing."""
+        with self._lock:
+            doc = self._docs.pop(instruction, None)
+            if doc:
+                doc.alive = False
+
+    # ---- Queries ----
+    def frecency(self, doc, now=None):
+        age = max(0.0, (now or time.time()) - doc.last_used)
+        return doc.count * math.pow(0.5, age / self.half_life)
+
+    def _log_frecency(self, doc):
+        """
+        log2 of frecency plus a constant that only depends on the current time:
+        the decay is the same for every entry, so this ranks identically to
+        frecency() and never needs recomputing as time passes.
+        """
+        return math.log2(doc.count) + doc.last_used / self.half_life
+
+    def _prefix_ids(self, token):
+        words = self._words
+        i = bisect_left(words, token)
+        matched = []
+        while i < len(words) and words[i].startswith(token):
+            matched.append(self._word_postings[words[i]])
+            i += 1
+        if len(matched) == 1:
+            return matched[0]
+        return set().union(*matched)
+
+    def _prefix_matches(self, query):
+        tokens = _words(query)
+        if not tokens:
+            return set()
+        # Every query word must prefix some word of the instruction
+        postings = sorted((self._prefix_ids(t) for t in tokens), key=len)
+        result = postings[0]
+        for ids in postings[1:]:
+            result = result & ids
+            if not result:
+                break
+        return result
+
+    def _fuzzy_matches(self, query):
+        grams = _trigrams(query)
+        if not grams:
+            return set()
+        postings = sorted((self._trigram_postings.get(g, ()) for g in grams), key=len)
+        candidates = set()
+        for ids in postings[:self.max_fuzzy_postings]:
+            candidates.update(ids)
+        if len(candidates) > self.max_fuzzy_candidates:
+            candidates = heapq.nlargest(self.max_fuzzy_candidates, candidates)
+        needed = self.fuzzy_threshold * len(grams)
+        return {i for i in candidates if len(grams & self._by_id[i].trigrams) >= needed}
+
+    def search(self, query, limit=8, min_length=2):
+        """Return up to limit history instructions matching query, best first."""
+        query = query.strip()
+        if len(query) < min_length:
+            return []
+        with self._lock:
+            prefix_ids = self._prefix_matches(query)
+            ids = prefix_ids
+            if len(ids) < limit:
+                ids = prefix_ids | self._fuzzy_matches(query)
+            q = query.lower()
+            by_id = self._by_id
+
+            def score(i):
+                doc = by_id[i]
+                # In log2 space: whole-string prefix x4, word prefix x2, fuzzy x1
+                if doc.lower.startswith(q):
+                    return doc.rank + 2
+                return doc.rank + 1 if i in prefix_ids else doc.rank
+
+            live = (i for i in ids if by_id[i].alive and by_id[i].lower != q)
+            return [by_id[i].instruction for i in heapq.nlargest(limit, live, key=score)]
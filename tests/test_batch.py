@@ -0,0 +1,95 @@
+"""Batch mode: reading a manifest, resuming from the output, retries."""
+import json
+
+from batch import BatchRunner, iter_manifest
+from gemini_api import GeminiApiError
+
+
+class EchoClient:
+    """Answers every prompt with itself; a prompt in `failures` first fails with each listed status."""
+
+    def __init__(self, failures=None):
+        self.failures = {prompt: list(statuses) for prompt, statuses in (failures or {}).items()}
+        self.prompts = []
+
+    def generate(self, prompt, pngs=()):
+        self.prompts.append(prompt)
+        statuses = self.failures.get(prompt)
+        if statuses:
+            status = statuses.pop(0)
+            raise GeminiApiError(f"HTTP {status}", status)
+        return f"echo: {prompt}"
+
+
+def write_manifest(tmp_path, lines):
+    path = tmp_path / "manifest.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def run(client, manifest, output, **kwargs):
+    runner = BatchRunner(client, str(output), concurrency=2, requests_per_minute=0, backoff=0.001, **kwargs)
+    return runner.run(iter_manifest(manifest, "Summarize"))
+
+
+def results(output):
+    """Latest record per id; a line cut off by an interrupted run is skipped."""
+    records = {}
+    for line in output.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        records[record["id"]] = record
+    return records
+
+
+def test_manifest_items_and_malformed_lines(tmp_path):
+    (tmp_path / "notes.txt").write_text("from a file", encoding="utf-8")
+    manifest = write_manifest(tmp_path, [
+        '# a comment',
+        '{"id": "inline", "text": "some text"}',
+        '',
+        '{"file": "notes.txt", "instruction": "Translate"}',
+        '{"id": "cut off',
+        '["not", "an", "object"]',
+    ])
+    output = tmp_path / "results.jsonl"
+    stats = run(EchoClient(), manifest, output)
+    assert (stats["done"], stats["failed"]) == (2, 2)
+    records = results(output)
+    assert records["inline"]["response"] == "echo: Summarize\n\nsome text"
+    assert records["notes.txt"]["response"] == "echo: Translate\n\nfrom a file"
+    assert not records["line-5"]["ok"] and "not valid JSON" in records["line-5"]["error"]
+    assert not records["line-6"]["ok"] and "not a JSON object" in records["line-6"]["error"]
+    assert records["line-5"]["attempts"] == 0
+
+
+def test_rerun_resumes_after_the_items_that_succeeded(tmp_path):
+    manifest = write_manifest(tmp_path, [json.dumps({"id": f"item{i}", "text": str(i)}) for i in range(4)])
+    output = tmp_path / "results.jsonl"
+    output.write_text('{"id": "item0", "ok": true, "response": "earlier"}\n'
+                      '{"id": "item1", "ok": false, "error": "HTTP 500"}\n'
+                      '{"id": "item2", "ok": tr', encoding="utf-8")  # Interrupted mid-write
+    client = EchoClient()
+    stats = run(client, manifest, output)
+    assert (stats["skipped"], stats["done"]) == (1, 3)
+    assert sorted(client.prompts) == ["Summarize\n\n1", "Summarize\n\n2", "Summarize\n\n3"]
+    records = results(output)
+    assert records["item0"]["response"] == "earlier"
+    assert all(records[f"item{i}"]["ok"] for i in range(4))
+    # A third run has nothing left to send
+    client = EchoClient()
+    assert run(client, manifest, output)["skipped"] == 4
+    assert client.prompts == []
+
+
+def test_transient_errors_are_retried_and_others_are_not(tmp_path):
+    manifest = write_manifest(tmp_path, ['{"id": "busy", "text": "a"}', '{"id": "bad", "text": "b"}'])
+    output = tmp_path / "results.jsonl"
+    client = EchoClient({"Summarize\n\na": (503, 429), "Summarize\n\nb": (400,)})
+    stats = run(client, manifest, output, max_retries=3)
+    records = results(output)
+    assert records["busy"]["ok"] and records["busy"]["attempts"] == 3
+    assert not records["bad"]["ok"] and records["bad"]["attempts"] == 1
+    assert (stats["requests"], stats["retries"]) == (4, 2)
@@ -0,0 +1,60 @@
+"""Selected-text capture on the fake clipboard: adaptive timeout and the user's clipboard."""
+from backends import FakeBackend
+from capture import TextCapture
+
+ORIGINAL = ("bitmap", "screenshot")
+
+
+def capture_once(backend, capture, selection, latency):
+    backend._set_clipboard(ORIGINAL)
+    backend.selection = selection
+    backend.copy_latency = latency
+    return capture.capture()
+
+
+def test_selection_is_captured_and_clipboard_restored():
+    backend = FakeBackend()
+    capture = TextCapture(backend)
+    assert capture_once(backend, capture, "selected text", 0.03) == ("selected text", None)
+    assert backend.clipboard == ORIGINAL
+
+
+def test_copied_image_is_returned_but_not_a_stale_one():
+    backend = FakeBackend()
+    capture = TextCapture(backend)
+    image = object()
+    assert capture_once(backend, capture, image, 0.03) == ("", image)
+    assert capture_once(backend, capture, None, 0.03) == ("", None)
+    assert backend.clipboard == ORIGINAL
+
+
+def test_timeout_widens_after_a_slow_copy_is_missed():
+    backend = FakeBackend()
+    capture = TextCapture(backend)
+    for _ in range(6):
+        assert capture_once(backend, capture, "fast", 0.03)[0] == "fast"
+    fast_timeout = capture.timeout()
+    assert fast_timeout < 0.25
+
+    results = [capture_once(backend, capture, "slow", 0.25)[0] for _ in range(4)]
+    # The first slow copy may be missed, but the estimate grows until they are caught
+    assert results[-2:] == ["slow", "slow"]
+    assert capture.timeout() > fast_timeout
+
+
+def test_late_copy_does_not_replace_the_users_clipboard():
+    backend = FakeBackend()
+    capture = TextCapture(backend)
+    for _ in range(6):
+        capture_once(backend, capture, "fast", 0.03)
+    capture_once(backend, capture, "slow", 0.25)
+    backend.sleep(1.0)  # Long enough for any late copy to land
+    backend.clipboard_sequence()
+    assert backend.clipboard == ORIGINAL
+
+
+def test_empty_selection_keeps_the_clipboard():
+    backend = FakeBackend()
+    capture = TextCapture(backend)
+    assert capture_once(backend, capture, None, 0.03) == ("", None)
+    assert backend.clipboard == ORIGINAL
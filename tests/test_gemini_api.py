@@ -0,0 +1,67 @@
+"""The API client against the local stub server: streaming, pooling and retry."""
+import pytest
+
+from benchmarks.stub_gemini_server import start_stub_server
+from gemini_api import GeminiApiClient, GeminiApiError
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server, url = start_stub_server(**options)
+        servers.append(server)
+        return server, url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_answer_streams_in_chunks(stub):
+    _, url = stub(words_per_chunk=2)
+    client = GeminiApiClient("key", base_url=url)
+    chunks = list(client.stream_generate("one two three four", [b"png"]))
+    client.close()
+    assert len(chunks) > 1
+    assert "".join(chunks).split() == "Echo (1 image(s)): one two three four".split()
+
+
+def test_connections_are_reused(stub):
+    server, url = stub()
+    client = GeminiApiClient("key", base_url=url)
+    for i in range(3):
+        assert client.generate(f"prompt {i}").strip().endswith(f"prompt {i}")
+    client.close()
+    assert client.pool.created == 1
+    assert (server.state.requests, server.state.connections) == (3, 1)
+
+
+def test_overloaded_answers_are_retried(stub):
+    server, url = stub(fail_every=2)
+    client = GeminiApiClient("key", base_url=url, backoff=0.01)
+    assert client.generate("first").strip().endswith("first")
+    assert client.generate("second").strip().endswith("second")  # 503, then retried
+    client.close()
+    assert server.state.requests == 3
+
+
+def test_retries_run_out(stub):
+    server, url = stub(fail_every=1)
+    client = GeminiApiClient("key", base_url=url, max_retries=2, backoff=0.01)
+    with pytest.raises(GeminiApiError):
+        client.generate("never answered")
+    client.close()
+    assert server.state.requests == 3
+
+
+def test_client_errors_are_not_retried(stub):
+    server, url = stub()
+    client = GeminiApiClient("", base_url=url, backoff=0.01)
+    with pytest.raises(GeminiApiError) as error:
+        client.generate("no key")
+    client.close()
+    assert error.value.status == 403
+    assert server.state.requests == 1
@@ -0,0 +1,97 @@
+"""History journal: replay, compaction and what survives a reload."""
+import threading
+
+from history import HistoryManager
+
+
+def make(tmp_path, **kwargs):
+    return HistoryManager(path=str(tmp_path / "history.jsonl"), fsync=False, **kwargs)
+
+
+def instructions(manager):
+    return [entry['instruction'] for entry in manager.history]
+
+
+def test_entries_survive_a_reload_most_recent_first(tmp_path):
+    manager = make(tmp_path, max_items=3)
+    for text in ("a", "b", "c", "a", "d"):
+        manager.add(text)
+    manager.close()
+    reloaded = make(tmp_path, max_items=3)
+    assert instructions(reloaded) == ["d", "a", "c"]
+    assert reloaded.history[1]['count'] == 2
+
+
+def test_compaction_keeps_appends_made_meanwhile(tmp_path):
+    manager = make(tmp_path)
+    for i in range(5):
+        manager.add(f"entry {i}")
+    snapshot = manager._snapshot
+
+    def add_during_compaction(entries):
+        manager._snapshot = snapshot
+        manager.add("added while compacting")
+        return snapshot(entries)
+
+    manager._snapshot = add_during_compaction
+    manager.compact()
+    manager.close()
+    assert instructions(make(tmp_path))[0] == "added while compacting"
+    assert len(make(tmp_path).history) == 6
+
+
+def test_clear_during_compaction_is_not_undone(tmp_path):
+    manager = make(tmp_path)
+    for i in range(5):
+        manager.add(f"entry {i}")
+    snapshot = manager._snapshot
+
+    def clear_during_compaction(entries):
+        # Runs while compact() writes its snapshot outside the lock
+        manager._snapshot = snapshot
+        manager.clear()
+        return snapshot(entries)
+
+    manager._snapshot = clear_during_compaction
+    manager.compact()
+    manager.add("after clear")
+    manager.close()
+    assert manager.history[0]['instruction'] == "after clear"
+    assert instructions(make(tmp_path)) == ["after clear"]
+
+
+def test_uncompacted_journal_is_compacted_on_load(tmp_path):
+    manager = make(tmp_path, max_items=10, compact_slack=1000)
+    for i in range(100):
+        manager.add(f"entry {i % 15}")
+    manager.close()
+    with open(tmp_path / "history.jsonl", 'a', encoding='utf-8') as f:
+        f.write('{"instruction": "torn')  # Cut off mid-append
+    reloaded = make(tmp_path, max_items=10, compact_slack=20)
+    for thread in threading.enumerate():
+        if thread.name == "history-compact":
+            thread.join()
+    reloaded.close()
+    with open(tmp_path / "history.jsonl", 'rb') as f:
+        assert f.read().count(b"\n") <= 11
+    assert instructions(make(tmp_path, max_items=10)) == instructions(reloaded)
+
+
+def test_snapshot_rows_and_older_per_line_snapshots_load(tmp_path):
+    manager = make(tmp_path)
+    manager.add("first")
+    manager.add("second", "some content")
+    manager.compact()
+    manager.add("first")
+    manager.close()
+    reloaded = make(tmp_path)
+    assert instructions(reloaded) == ["first", "second"]
+    assert reloaded.history[0]['count'] == 2
+    assert reloaded.history[1]['content_preview'] == "some content"
+    # The layout written before snapshots were rows: one entry per line after the header
+    with open(tmp_path / "history.jsonl", 'w', encoding='utf-8') as f:
+        f.write('{"op": "snapshot", "entries": 2}\n'
+                '{"instruction": "old", "content_preview": "", "timestamp": "t", "count": 3}\n'
+                '{"instruction": "older", "content_preview": "", "timestamp": "t", "count": 1}\n'
+                '{"op": "add", "instruction": "new", "content_preview": "", "timestamp": "t", "count": 1}\n')
+    assert instructions(make(tmp_path)) == ["new", "older", "old"]
@@ -0,0 +1,80 @@
+"""Multi-image paste on the fake clipboard: order, fallback and time spent."""
+from types import SimpleNamespace
+
+import pytest
+
+from backends import FakeBackend
+from paste import ImagePaster
+
+
+def fake_images(n):
+    return [SimpleNamespace(key=f"img{i}", png=f"png-{i}".encode(), dib=None) for i in range(n)]
+
+
+def pasted_payloads(pasted):
+    """PNG payloads in the order the page received them."""
+    seen = []
+    for kind, data in pasted:
+        if kind == "files":
+            for path in data:
+                with open(path, 'rb') as f:
+                    seen.append(f.read())
+        elif kind == "image":
+            seen.append(data.png)
+    return seen
+
+
+def paste(images, tmp_path, strategy="batch", supports_files=True):
+    backend = FakeBackend()
+    backend.supports_files = supports_files
+    paster = ImagePaster(backend, strategy=strategy, staging_root=str(tmp_path))
+    start = backend.monotonic()
+    used = paster.paste(images)
+    return used, backend.monotonic() - start, backend, paster
+
+
+@pytest.mark.parametrize("strategy", ["batch", "per_image"])
+def test_images_arrive_in_order(tmp_path, strategy):
+    images = fake_images(6)
+    used, _, backend, _ = paste(images, tmp_path, strategy)
+    assert used == strategy
+    assert pasted_payloads(backend.pasted) == [img.png for img in images]
+
+
+def test_batch_is_one_paste(tmp_path):
+    images = fake_images(4)
+    _, _, backend, _ = paste(images, tmp_path)
+    assert [kind for kind, _ in backend.pasted] == ["files"]
+    assert [a[2] for a in backend.actions if a[1] == "keys"] == ["ctrl+v"]
+
+
+def test_batch_falls_back_to_per_image(tmp_path):
+    images = fake_images(4)
+    used, _, backend, _ = paste(images, tmp_path, supports_files=False)
+    assert used == "per_image"
+    assert [kind for kind, _ in backend.pasted] == ["image"] * 4
+    assert pasted_payloads(backend.pasted) == [img.png for img in images]
+
+
+def test_single_image_is_pasted_directly(tmp_path):
+    used, _, backend, _ = paste(fake_images(1), tmp_path)
+    assert used == "per_image"
+    assert [kind for kind, _ in backend.pasted] == ["image"]
+
+
+@pytest.mark.parametrize("n", [2, 8, 16])
+def test_batch_wall_clock_bound(tmp_path, n):
+    images = fake_images(n)
+    _, batch, _, paster = paste(images, tmp_path)
+    _, per_image, _, _ = paste(images, tmp_path, strategy="per_image")
+    # One settle for the whole batch plus a little per extra image, vs one settle per image
+    assert batch <= paster.settle + paster.batch_settle_per_image * (n - 1) + 1e-9
+    assert per_image == pytest.approx(n * paster.settle)
+    assert batch < per_image
+
+
+def test_nothing_to_paste(tmp_path):
+    used, elapsed, backend, _ = paste([], tmp_path)
+    assert used is None
+    assert elapsed == 0
+    assert backend.pasted == []
@@ -0,0 +1,170 @@
+"""The waits in readiness.py and the window tracker against the fake platform, and what the fake promises them."""
+from backends import FakeBackend
+from readiness import ReadinessEngine, wait_until
+
+GEMINI = "Google Gemini - Fake Browser"
+
+
+def make(**latencies):
+    backend = FakeBackend(**latencies)
+    return backend, ReadinessEngine(backend, window_events=False)
+
+
+def clicks(backend):
+    return [a for a in backend.actions if a[1] == "click"]
+
+
+def test_wait_until_returns_the_value_or_none_at_the_timeout():
+    backend = FakeBackend()
+    assert wait_until(lambda: backend.monotonic() >= 0.3 and "ready", 1.0,
+                      backend.monotonic, backend.sleep) == "ready"
+    start = backend.monotonic()
+    assert wait_until(lambda: None, 0.5, backend.monotonic, backend.sleep) is None
+    assert 0.5 <= backend.monotonic() - start < 0.5 + 0.25
+
+
+def test_foreground_is_confirmed_only_after_the_os_switches():
+    backend, readiness = make(foreground_delay=0.2)
+    hwnd = backend.add_window(GEMINI)
+    assert backend.get_foreground() != hwnd
+    assert readiness.wait_for_foreground(hwnd, 1.0)
+    assert backend.get_foreground() == hwnd
+    assert backend.monotonic() >= 0.2
+
+
+def test_foreground_of_a_closed_window_times_out():
+    backend, readiness = make()
+    hwnd = backend.add_window(GEMINI)
+    backend.windows[hwnd].closed = True
+    assert not readiness.wait_for_foreground(hwnd, 0.5)
+
+
+def test_window_focus_is_not_input_focus():
+    backend, readiness = make(focus_delay=0.1)
+    hwnd = backend.add_window(GEMINI)
+    assert readiness.wait_for_foreground(hwnd, 1.0)
+    # Focus is somewhere in the window, but the input box was never clicked
+    assert backend.has_input_focus(hwnd)
+    assert backend.focus_in_editable(hwnd) is False
+    backend.send_keys('ctrl+v')
+    assert [combo for _, _, combo in backend.misdirected] == ['ctrl+v']
+
+
+def test_input_focus_clicks_even_in_the_foreground():
+    backend, readiness = make(focus_delay=0.1)
+    hwnd = backend.add_window(GEMINI)
+    assert readiness.wait_for_foreground(hwnd, 1.0)
+    start = backend.monotonic()
+    assert readiness.wait_for_input_focus(hwnd, 1.0)
+    assert clicks(backend)
+    assert backend.monotonic() - start >= 0.1
+    assert backend.focus_in_editable(hwnd)
+
+
+def test_input_focus_is_lost_when_another_window_comes_forward():
+    backend, readiness = make()
+    first = backend.add_window(GEMINI)
+    second = backend.add_window("Notes - Editor")
+    assert readiness.wait_for_input_focus(first, 1.0)
+    assert readiness.wait_for_foreground(second, 1.0)
+    assert readiness.wait_for_foreground(first, 1.0)
+    assert not backend.focus_in_editable(first)
+    assert readiness.wait_for_input_focus(first, 1.0)
+    assert len(clicks(backend)) >= 2
+
+
+def test_pastes_after_input_focus_reach_the_window():
+    backend, readiness = make(upload_latency=0.5)
+    hwnd = backend.add_window(GEMINI)
+    assert readiness.wait_for_input_focus(hwnd, 1.0)
+    backend.set_clipboard_text("prompt")
+    backend.send_keys('ctrl+v')
+    backend.sleep(0.5)
+    backend.send_keys('enter')
+    assert backend.misdirected == []
+    (_, sent_to, received, complete), = backend.sent
+    assert (sent_to, received, complete) == (hwnd, [("text", "prompt")], True)
+
+
+def test_enter_before_the_page_took_the_paste_is_incomplete():
+    backend, readiness = make(upload_latency=0.5)
+    hwnd = backend.add_window(GEMINI)
+    assert readiness.wait_for_input_focus(hwnd, 1.0)
+    backend.set_clipboard_text("prompt")
+    backend.send_keys('ctrl+v')
+    backend.send_keys('enter')
+    assert backend.sent[0][3] is False
+
+
+def test_new_window_is_found_once_its_title_matches():
+    backend, readiness = make(load_latency=1.0, title_latency=0.3)
+    existing = backend.add_window(GEMINI)
+    baseline = readiness.snapshot()
+    assert backend.open_url("https://gemini.google.com/app", new_window=True)
+    hwnd = readiness.wait_for_window(5.0, baseline=baseline)
+    assert hwnd not in (None, existing)
+    assert backend.monotonic() >= 1.3
+    assert readiness.find_window() == hwnd
+
+
+def test_wait_for_window_times_out_without_a_new_page():
+    backend, readiness = make()
+    backend.add_window(GEMINI)
+    baseline = readiness.snapshot()
+    assert readiness.wait_for_window(1.0, baseline=baseline) is None
+
+
+def test_open_url_tabs_and_new_windows():
+    backend, _ = make()
+    front = backend.add_window("Docs - Fake Browser")
+    backend.open_in_tabs = True
+    assert backend.open_url("https://gemini.google.com/app")
+    assert list(backend.windows) == [front]  # A tab of the open window
+    assert backend.open_url("https://gemini.google.com/app", new_window=True)
+    assert len(backend.windows) == 2
+    backend.supports_new_window = False
+    assert not backend.open_url("https://gemini.google.com/app", new_window=True)
+    assert len(backend.windows) == 2
+
+
+def test_tracker_reuses_the_window_it_found():
+    backend, readiness = make()
+    for i in range(40):
+        backend.add_window(f"Other {i} - Editor")
+    hwnd = backend.add_window(GEMINI)
+    assert readiness.find_window() == hwnd
+    assert backend.scans == 1
+    for _ in range(10):
+        assert readiness.find_window() == hwnd
+    assert backend.scans == 1
+    assert (readiness.tracker.hits, readiness.tracker.misses) == (10, 1)
+
+
+def test_tracker_rescans_when_the_window_closes_or_is_retitled():
+    backend, readiness = make()
+    first = backend.add_window(GEMINI)
+    second = backend.add_window(GEMINI)
+    assert readiness.find_window() == first
+    backend.windows[first].closed = True
+    assert readiness.find_window() == second
+    backend.windows[second].title = "Docs - Fake Browser"
+    assert readiness.find_window() is None
+    assert (backend.scans, readiness.tracker.misses) == (3, 3)
+
+
+def test_tracker_events_report_new_and_retitled_windows():
+    backend = FakeBackend()
+    backend.supports_window_events = True
+    readiness = ReadinessEngine(backend)
+    assert readiness.tracker.subscribed
+    hwnd = backend.add_window("Untitled - Fake Browser", titles=[(0.5, GEMINI)])
+    backend.sleep(0.1)
+    assert readiness.tracker.changed() == {hwnd}
+    backend.sleep(0.5)
+    assert readiness.tracker.changed() == {hwnd}
+    backend.sleep(0.1)
+    assert readiness.tracker.changed() == set()
+    readiness.tracker.remember(hwnd)
+    backend.windows[hwnd].closed = True
+    backend.sleep(0.1)
+    assert readiness.tracker.hwnd is None
@@ -0,0 +1,56 @@
+"""Response cache: what the key ignores, expiry and LRU eviction, on the fake clock."""
+from backends import FakeBackend
+from responsecache import ResponseCache, response_key
+
+
+def make(tmp_path, **kwargs):
+    backend = FakeBackend()
+    cache = ResponseCache(path=str(tmp_path / "responses.db"), clock=backend.monotonic, **kwargs)
+    return backend, cache
+
+
+def test_key_ignores_line_endings_and_trailing_space_only():
+    key = response_key("Summarize\n\nsome text", ["img1"], model="flash")
+    assert response_key("Summarize  \r\n\r\nsome text\n\n", ["img1"], model="flash") == key
+    assert response_key("Summarize\n\nsome text", ["img2"], model="flash") != key
+    assert response_key("Summarize\n\nsome text", ["img1", "img2"], model="flash") != key
+    assert response_key("Summarize\n\nsome text", ["img1"], model="pro") != key
+    assert response_key("Summarize\nsome text", ["img1"], model="flash") != key
+
+
+def test_hit_and_miss_are_counted(tmp_path):
+    _, cache = make(tmp_path)
+    key = response_key("prompt")
+    assert cache.get(key) is None
+    cache.put(key, "answer")
+    assert cache.get(key) == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+    _, reopened = make(tmp_path)
+    assert reopened.get(key) == "answer"
+    assert len(reopened) == 1
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    backend, cache = make(tmp_path, ttl=60.0)
+    key = response_key("prompt")
+    cache.put(key, "answer")
+    backend.sleep(30.0)
+    assert cache.get(key) == "answer"
+    assert cache.age(key) == 30.0
+    backend.sleep(31.0)
+    assert cache.get(key) is None
+    assert (cache.expired, len(cache)) == (1, 0)
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    backend, cache = make(tmp_path, max_entries=3)
+    for name in ("a", "b", "c"):
+        cache.put(name, f"answer {name}")
+        backend.sleep(1.0)
+    assert cache.get("a") == "answer a"  # Now the most recently used
+    backend.sleep(1.0)
+    cache.put("d", "answer d")
+    assert cache.get("b") is None
+    assert [cache.get(name) for name in ("a", "c", "d")] == ["answer a", "answer c", "answer d"]
+    assert (cache.evicted, len(cache)) == (1, 3)
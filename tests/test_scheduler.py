@@ -0,0 +1,52 @@
+"""AutomationScheduler: jobs run one at a time, and shutdown never hangs."""
+import threading
+import time
+
+from scheduler import AutomationScheduler, ClipboardOwner, JobStatus
+
+
+def blocking_job(started, release):
+    def run(job=None):
+        started.set()
+        while not release.wait(0.01):
+            job.check()
+    return run
+
+
+def test_jobs_run_in_order_and_return_results():
+    scheduler = AutomationScheduler(ClipboardOwner())
+    order = []
+    jobs = [scheduler.submit(lambda i, job=None: order.append(i) or i * 2, i) for i in range(3)]
+    assert all(job.wait(2.0) for job in jobs)
+    assert order == [0, 1, 2]
+    assert [job.result for job in jobs] == [0, 2, 4]
+    scheduler.shutdown()
+
+
+def test_submit_to_a_full_queue_is_dropped():
+    scheduler = AutomationScheduler(ClipboardOwner(), max_queue=2)
+    started, release = threading.Event(), threading.Event()
+    running = scheduler.submit(blocking_job(started, release))
+    assert started.wait(2.0)
+    queued = [scheduler.submit(lambda job=None: None) for _ in range(2)]
+    assert all(queued)
+    assert scheduler.submit(lambda job=None: None) is None
+    release.set()
+    scheduler.shutdown()
+    assert running.status is JobStatus.DONE
+
+
+def test_shutdown_with_a_full_queue_returns_and_cancels_everything():
+    scheduler = AutomationScheduler(ClipboardOwner(), max_queue=2)
+    started, release = threading.Event(), threading.Event()
+    running = scheduler.submit(blocking_job(started, release))
+    assert started.wait(2.0)
+    queued = [scheduler.submit(lambda job=None: None) for _ in range(2)]
+
+    start = time.monotonic()
+    scheduler.shutdown(timeout=2.0)
+    assert time.monotonic() - start < 1.0
+    assert not scheduler._worker.is_alive()
+    assert running.status is JobStatus.CANCELLED
+    assert [job.status for job in queued] == [JobStatus.CANCELLED] * 2
+    assert scheduler.submit(lambda job=None: None) is None
@@ -0,0 +1,150 @@
+"""
+Thumbnail cache for Gemini Desktop Tool.
+Thumbnails are rendered on a worker pool, keyed by image content hash,
+and encoded as PPM so Tk can load them without a PNG decode. The same
+pass computes a perceptual hash so the popup can drop duplicate images.
+"""
+import hashlib
+import io
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from imagecache import cache_key
+
+_identities = {}  # id(img) -> (weakref to img, ImageIdentity)
+_identities_lock = threading.Lock()
+
+
+def image_key(img):
+    """Content hash of a PIL image (mode, size and pixels)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img.mode}:{img.width}x{img.height}".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def perceptual_hash(img):
+    """64-bit difference hash: brightness gradients of a 9x8 grayscale reduction."""
+    small = img.resize((9, 8), Image.BOX)
+    pixels = list(small.convert("L").getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class ImageIdentity:
+    """Content hash and perceptual hash of one image."""
+    __slots__ = ("key", "phash", "size")
+
+    def __init__(self, key, phash, size):
+        self.key = key
+        self.phash = phash
+        self.size = size
+
+    def is_duplicate(self, other, max_distance=4):
+        """Same pixels, or (if max_distance >= 0) the same picture at another resolution."""
+        if self.key == other.key:
+            return True
+        # Equal-sized images that differ are treated as distinct on purpose,
+        # e.g. before/after screenshots of the same window
+        return (max_distance >= 0 and self.size != other.size
+                and hamming(self.phash, other.phash) <= max_distance)
+
+
+def identify(img):
+    """ImageIdentity of img, computed once per image object."""
+    with _identities_lock:
+        cached = _identities.get(id(img))
+    if cached is not None and cached[0]() is img:
+        return cached[1]
+    identity = ImageIdentity(image_key(img), perceptual_hash(img), img.size)
+    img_id = id(img)
+
+    def forget(_ref):
+        with _identities_lock:
+            if _identities.get(img_id, (None,))[0] is _ref:
+                del _identities[img_id]
+    with _identities_lock:
+        _identities[img_id] = (weakref.ref(img, forget), identity)
+    return identity
+
+
+def render_thumbnail(img, size):
+    """Return PPM bytes of a thumbnail no larger than size."""
+    thumb = img.copy()
+    thumb.thumbnail(size)
+    if thumb.mode != "RGB":
+        thumb = thumb.convert("RGB")
+    buffer = io.BytesIO()
+    thumb.save(buffer, format="PPM")
+    return buffer.getvalue()
+
+
+class ThumbnailCache:
+    """LRU cache of encoded thumbnails, filled off the UI thread."""
+
+    def __init__(self, size=(40, 40), max_entries=128, workers=2, disk=None):
+        self.size = size
+        self.disk = disk  # Optional BlobCache shared across sessions
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._data.get(key)
+            if data is not None:
+                self._data.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._data[key] = data
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def _load(self, img):
+        identity = identify(img)
+        key = identity.key
+        data = self.get(key)
+        if data is None and self.disk is not None:
+            data = self.disk.get(cache_key("thumb", key, *self.size))
+            if data is not None:
+                self.put(key, data)
+        if data is None:
+            self.misses += 1
+            data = render_thumbnail(img, self.size)
+            self.put(key, data)
+            if self.disk is not None:
+                self.disk.put(cache_key("thumb", key, *self.size), data)
+        else:
+            self.hits += 1
+        return identity, data
+
+    def request(self, img, callback):
+        """Hash and render img on the pool, then call callback(identity, data) from the worker."""
+        def task():
+            try:
+                identity, data = self._load(img)
+            except Exception as e:
+                print(f"  Thumbnail Error: {e}")
+                return
+            callback(identity, data)
+        return self._executor.submit(task)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
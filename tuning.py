@@ -0,0 +1,130 @@
+"""
+Adaptive wait tuning for Gemini Desktop Tool.
+Each automation wait records how long its condition took to confirm, in a
+profile per browser and machine. The timeout for the next wait is a high
+percentile of those times plus a margin, so a miss no longer costs the
+static worst case; timeouts count as needing the full static value, so a
+failure rate above the target restores it. Profiles persist in
+delay_profile.json next to config.json; a profile written by an older
+version, whose waits measured something else, is discarded.
+"""
+import json
+import os
+import platform
+import threading
+from collections import deque
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_FILE = os.path.join(BASE_DIR, "delay_profile.json")
+# Bumped when a step's wait changes meaning (2: input focus is confirmed in the
+# input box itself, before that it was the window reaching the foreground)
+PROFILE_VERSION = 2
+
+
+def browser_name(title):
+    """Browser part of a window title: 'Google Gemini - Google Chrome' -> 'Google Chrome'."""
+    if " - " not in title:
+        return "unknown"
+    return title.rsplit(" - ", 1)[1].strip() or "unknown"
+
+
+class DelayTuner:
+    """Per-browser, per-machine timings of automation waits and the timeouts derived from them."""
+
+    def __init__(self, path=None, enabled=True, target_failure_rate=0.05, margin=1.5, floor=0.2,
+                 window=50, min_samples=8):
+        self.path = path or PROFILE_FILE
+        self.enabled = enabled
+        self.target_failure_rate = target_failure_rate
+        self.margin = margin
+        self.floor = floor
+        self.window = window
+        self.min_samples = min_samples
+        self.machine = platform.node() or "local"
+        self.browser = "unknown"
+        self._profiles = {}  # "browser on machine" -> {step: deque of (seconds, ok)}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if enabled:
+            self._load()
+
+    @property
+    def profile(self):
+        return f"{self.browser} on {self.machine}"
+
+    def set_browser(self, title):
+        """Switch to the profile of the browser showing the given window title."""
+        self.browser = browser_name(title)
+
+    def _samples(self, step):
+        steps = self._profiles.setdefault(self.profile, {})
+        samples = steps.get(step)
+        if samples is None:
+            samples = steps[step] = deque(maxlen=self.window)
+        return samples
+
+    def timeout(self, step, ceiling):
+        """Timeout for the next wait of step; ceiling is the static value and upper bound."""
+        if not self.enabled:
+            return ceiling
+        with self._lock:
+            samples = list(self._samples(step))
+        if len(samples) < self.min_samples:
+            return ceiling
+        # A wait that timed out counts as needing the whole ceiling, so once
+        # failures exceed the target rate the percentile lands on it
+        values = sorted(seconds if ok else ceiling for seconds, ok in samples)
+        needed = values[min(len(values) - 1, int(len(values) * (1 - self.target_failure_rate)))]
+        return min(ceiling, max(self.floor, needed * self.margin))
+
+    def observe(self, step, seconds, ok):
+        """Record how long a wait took and whether its condition was confirmed."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples(step).append((round(seconds, 3), bool(ok)))
+            self._dirty = True
+
+    def summary(self, ceilings):
+        """Return [(step, samples, failures, timeout)] for the current profile."""
+        with self._lock:
+            steps = {step: list(samples) for step, samples in self._profiles.get(self.profile, {}).items()}
+        return [(step, len(samples), sum(1 for _, ok in samples if not ok), self.timeout(step, ceilings[step]))
+                for step, samples in steps.items() if samples and step in ceilings]
+
+    # ---- Persistence ----
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != PROFILE_VERSION:
+                print("  Discarding delay profile from an older version")
+                self._dirty = True
+                return
+            for name, steps in data.get("profiles", {}).items():
+                self._profiles[name] = {
+                    step: deque(((float(s), bool(ok)) for s, ok in samples), maxlen=self.window)
+                    for step, samples in steps.items()
+                }
+        except Exception as e:
+            print(f"  Failed to load delay profile: {e}")
+
+    def save(self):
+        """Write the profiles if anything changed since the last save."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": PROFILE_VERSION,
+                    "profiles": {name: {step: [list(sample) for sample in samples]
+                                        for step, samples in steps.items()}
+                                 for name, steps in self._profiles.items()}}
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"  Failed to save delay profile: {e}")